@@ -6,6 +6,10 @@ Command-line interface for Archie Guardian.
 import cmd
 import sys
 
+from core.agent_utils import Event, PERMISSION_LEVEL_BY_VALUE, tail_lines
+
+_LEVEL_NAMES = ", ".join(PERMISSION_LEVEL_BY_VALUE)
+
 
 class GuardianCLI(cmd.Cmd):
     """Interactive CLI for Archie Guardian."""
@@ -49,55 +53,59 @@ class GuardianCLI(cmd.Cmd):
     def do_logs(self, arg):
         """Show recent audit logs."""
         try:
-            with open("logs/audit.log", "r") as f:
-                lines = f.readlines()
-                # Show last 20 lines
-                recent = lines[-20:] if len(lines) > 20 else lines
-                print("\n" + "="*60)
-                print("RECENT AUDIT LOG")
-                print("="*60)
-                for line in recent:
-                    print(line.rstrip())
-                print("="*60 + "\n")
+            # Show last 20 lines
+            recent = tail_lines("logs/audit.log", 20)
+            print("\n" + "="*60)
+            print("RECENT AUDIT LOG")
+            print("="*60)
+            for line in recent:
+                print(line.rstrip())
+            print("="*60 + "\n")
         except FileNotFoundError:
             print("❌ No audit log found yet")
     
     def do_permission(self, arg):
         """Set user permission level. Usage: permission <level>"""
         if not arg:
-            from core.agent_utils import PermissionLevel
-            levels = [p.value for p in PermissionLevel]
             print(f"❌ Usage: permission <level>")
-            print(f"   Available levels: {', '.join(levels)}")
+            print(f"   Available levels: {_LEVEL_NAMES}")
             return
         
         level_str = arg.strip().lower()
-        
-        try:
-            from core.agent_utils import PermissionLevel
-            level = PermissionLevel[level_str.upper()]
-            self.guardian.orch_b.set_permission_level(level)
-            print(f"✅ Permission level set to: {level.value}")
-        except KeyError:
+        level = PERMISSION_LEVEL_BY_VALUE.get(level_str)
+        if level is None:
             print(f"❌ Invalid permission level: {level_str}")
+            return
+        
+        self.guardian.orch_b.set_permission_level(level)
+        print(f"✅ Permission level set to: {level.value}")
     
     def do_analyze(self, arg):
         """Manually trigger analysis on buffered events."""
         print("🔍 Analyzing buffered events...")
         
-        total_analyzed = 0
+        # Collect everything first so OrchA can analyze in one batch
+        pending = []
         for widget_name, widget in self.guardian.widgets.items():
             if widget.enabled:
-                events = widget.get_events()
-                for event in events:
-                    analysis = self.guardian.orch_a.analyze_event(event)
-                    alert = self.guardian.orch_b.handle_alert(analysis)
-                    
-                    print(f"   [{widget_name}] {alert['message']}")
-                    total_analyzed += 1
-                
+                # Widgets buffer plain dicts; OrchA analyzes Event objects
+                pending.extend(
+                    (widget_name, Event(event.get("event_type", "unknown"), widget_name, event))
+                    for event in widget.get_events()
+                )
                 widget.clear_events()
         
+        analyses = self.guardian.orch_a.analyze_batch([event for _, event in pending])
+        
+        results = []
+        for (widget_name, _), analysis in zip(pending, analyses):
+            alert = self.guardian.orch_b.format_alert(analysis)
+            results.append(f"   [{widget_name}]{alert}")
+        total_analyzed = len(results)
+        
+        # Single write instead of one print() per event
+        sys.stdout.write("".join(results))
+        
         print(f"✅ Analyzed {total_analyzed} events\n")
     
     def do_feedback(self, arg):
@@ -11,15 +11,6 @@ __email__ = "archiesgate42@gmail.com"
 __license__ = "MIT"
 __docformat__ = "restructuredtext"
 
-try:
-    from .agent_utils import AuditLogger, PermissionLevel, ThreatLevel
-    from .orch_a import OrchA
-    from .orch_b import OrchB
-    from .orchestrator import MasterOrchestrator
-    from .ollama_connector import OllamaConnector
-except ImportError as e:
-    print(f"Warning: Could not import all core modules: {e}")
-
 __all__ = [
     "AuditLogger",
     "PermissionLevel",
@@ -30,6 +21,32 @@ __all__ = [
     "OllamaConnector",
 ]
 
+# Public name -> submodule; loaded on first access (PEP 562) so that
+# e.g. `from core import PermissionLevel` does not pull in requests.
+_LAZY_IMPORTS = {
+    "AuditLogger": ".agent_utils",
+    "PermissionLevel": ".agent_utils",
+    "ThreatLevel": ".agent_utils",
+    "OrchA": ".orch_a",
+    "OrchB": ".orch_b",
+    "MasterOrchestrator": ".orchestrator",
+    "OllamaConnector": ".ollama_connector",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
 # Project Description
 PROJECT_DESCRIPTION = """
 Archie Guardian v1.0
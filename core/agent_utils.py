@@ -3,12 +3,64 @@ core/agent_utils.py
 Utility functions and base classes for Archie Guardian agents.
 """
 
+import atexit
+import copy
+import functools
 import logging
+import logging.handlers
+import math
+import os
 import json
+import json.encoder
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from itertools import islice
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from enum import Enum
 
+try:
+    import orjson
+    
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _json_dumps = json.dumps
+
+_json_str = json.encoder.encode_basestring
+
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+def deque_tail(items: deque, n: int) -> list:
+    """Return the last n items of a deque in order, in O(n)."""
+    if n <= 0:
+        return []
+    tail = list(islice(reversed(items), n))
+    tail.reverse()
+    return tail
+
+
+def tail_lines(path: str, n: int, block: int = 16384) -> List[str]:
+    """Return the last n lines of a file, reading backwards in blocks from the end."""
+    if n <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        while pos > 0 and buf.count(b"\n") <= n:
+            read_size = min(block, pos)
+            pos -= read_size
+            f.seek(pos)
+            buf = f.read(read_size) + buf
+    return buf.decode("utf-8", errors="replace").splitlines()[-n:]
+
 
 # ============================================================================
 # Permission Levels
@@ -23,6 +75,10 @@ class PermissionLevel(Enum):
     AUTO_RESPOND = "auto_respond"  # Automatic actions
 
 
+# "observe"/"alert"/... -> PermissionLevel, in escalation order
+PERMISSION_LEVEL_BY_VALUE = {level.value: level for level in PermissionLevel}
+
+
 # ============================================================================
 # Threat Levels
 # ============================================================================
@@ -34,20 +90,69 @@ class ThreatLevel(Enum):
     HIGH = "high"
 
 
+# "low"/"medium"/"high" -> ThreatLevel, for analysis dicts that carry the value
+THREAT_LEVEL_BY_VALUE = {level.value: level for level in ThreatLevel}
+
+
+# ============================================================================
+# Timestamps
+# ============================================================================
+
+# (epoch second, its ISO text) for the last second formatted; swapped atomically
+_iso_second = (0, "")
+
+
+def iso_from_ns(ns: int) -> str:
+    """Local ISO-8601 time for a time.time_ns() value; formats the date part once per second."""
+    global _iso_second
+    sec, frac = divmod(ns, 1_000_000_000)
+    cached = _iso_second
+    if cached[0] != sec:
+        cached = _iso_second = (sec, datetime.fromtimestamp(sec).isoformat())
+    return f"{cached[1]}.{frac // 1000:06d}"
+
+
+def iso_now() -> str:
+    """Cheap equivalent of datetime.now().isoformat()."""
+    return iso_from_ns(time.time_ns())
+
+
+class _Timestamped:
+    """Stores creation time as integer ns; ISO string is formatted once, on demand."""
+    
+    __slots__ = ()
+    
+    def _stamp(self):
+        self.timestamp_ns = time.time_ns()
+        self._timestamp_iso = None
+    
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
+    
+    @property
+    def timestamp_iso(self) -> str:
+        if self._timestamp_iso is None:
+            self._timestamp_iso = iso_from_ns(self.timestamp_ns)
+        return self._timestamp_iso
+
+
 # ============================================================================
 # Decision Models
 # ============================================================================
 
-class Decision:
+class Decision(_Timestamped):
     """AI agent decision with reasoning & confidence."""
     
+    __slots__ = ("agent", "action", "confidence", "reasoning", "timestamp_ns", "_timestamp_iso", "decision_id")
+    
     def __init__(self, agent: str, action: str, confidence: float = 0.5, reasoning: str = ""):
         self.agent = agent
         self.action = action
         self.confidence = confidence  # 0-1.0
         self.reasoning = reasoning
-        self.timestamp = datetime.now()
-        self.decision_id = f"dec_{int(self.timestamp.timestamp() * 1000)}"
+        self._stamp()
+        self.decision_id = f"dec_{self.timestamp_ns // 1_000_000}"
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -56,25 +161,38 @@ class Decision:
             "action": self.action,
             "confidence": self.confidence,
             "reasoning": self.reasoning,
-            "timestamp": self.timestamp.isoformat()
+            "timestamp": self.timestamp_iso
         }
+    
+    def to_json(self) -> str:
+        """Serialize straight to JSON without building an intermediate dict."""
+        confidence = float(self.confidence)
+        # NaN/inf have no JSON form; write null like orjson does
+        confidence_json = repr(confidence) if math.isfinite(confidence) else "null"
+        return (
+            f'{{"decision_id":{_json_str(self.decision_id)},"agent":{_json_str(self.agent)},'
+            f'"action":{_json_str(self.action)},"confidence":{confidence_json},'
+            f'"reasoning":{_json_str(self.reasoning)},"timestamp":"{self.timestamp_iso}"}}'
+        )
 
 
-class ThreatScore:
+class ThreatScore(_Timestamped):
     """Threat assessment with breakdown."""
     
+    __slots__ = ("threat_level", "score", "factors", "timestamp_ns", "_timestamp_iso")
+    
     def __init__(self, threat_level: ThreatLevel, score: float, factors: Dict[str, float] = None):
         self.threat_level = threat_level
         self.score = score  # 0-100
         self.factors = factors or {}  # e.g., {"process_anomaly": 0.8, "network_suspicious": 0.6}
-        self.timestamp = datetime.now()
+        self._stamp()
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "threat_level": self.threat_level.value,
             "score": self.score,
             "factors": self.factors,
-            "timestamp": self.timestamp.isoformat()
+            "timestamp": self.timestamp_iso
         }
 
 
@@ -82,63 +200,235 @@ class ThreatScore:
 # Audit Logger (Enhanced)
 # ============================================================================
 
+class _BatchedMemoryHandler(logging.handlers.MemoryHandler):
+    """MemoryHandler that writes all buffered records to the target stream in one call."""
+    
+    def flush(self):
+        self.acquire()
+        try:
+            if self.target and self.buffer:
+                target = self.target
+                text = "".join(target.format(record) + target.terminator for record in self.buffer)
+                target.stream.write(text)
+                target.stream.flush()
+                self.buffer.clear()
+        finally:
+            self.release()
+
+
 class AuditLogger:
     """Centralized audit trail for all Guardian decisions."""
     
+    BUFFER_CAPACITY = 512       # Records held in memory before a forced flush
+    FLUSH_INTERVAL = 1.0        # Seconds between background flushes
+    STREAM_BUFFERING = 65536    # 64 KiB file buffer
+    
     def __init__(self, log_file: str = "logs/audit.log"):
         self.log_file = log_file
         self.logger = logging.getLogger("ArchieGuardian.Audit")
         
-        # Create file handler
-        handler = logging.FileHandler(log_file)
+        # Buffered file stream; records are batched in memory and written together
+        self._stream = open(log_file, "a", buffering=self.STREAM_BUFFERING, encoding="utf-8")
+        stream_handler = logging.StreamHandler(self._stream)
         formatter = logging.Formatter(
             '[%(asctime)s] %(name)s - %(levelname)s - %(message)s'
         )
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        stream_handler.setFormatter(formatter)
+        
+        # WARNING and above (alerts) flush immediately
+        self.handler = _BatchedMemoryHandler(
+            capacity=self.BUFFER_CAPACITY,
+            flushLevel=logging.WARNING,
+            target=stream_handler
+        )
+        self.logger.addHandler(self.handler)
         self.logger.setLevel(logging.INFO)
+        
+        # One background thread flushes every FLUSH_INTERVAL until close()
+        self._closed = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="AuditFlush", daemon=True)
+        self._flush_thread.start()
+        atexit.register(self.close)
+    
+    def _flush_loop(self):
+        while not self._closed.wait(self.FLUSH_INTERVAL):
+            self.flush()
+    
+    def close(self):
+        """Stop the background flusher and write what is still buffered."""
+        self._closed.set()
+        self.flush()
+    
+    def flush(self):
+        """Write any buffered records to disk."""
+        try:
+            self.handler.flush()
+        except ValueError:
+            pass  # Stream already closed
     
     def log_decision(self, decision: Decision):
         """Log an agent decision with context."""
-        self.logger.info(f"DECISION: {json.dumps(decision.to_dict())}")
+        if not self.logger.isEnabledFor(logging.INFO):
+            return  # Filtered out: skip serialization entirely
+        self.logger.info(f"DECISION: {decision.to_json()}")
+    
+    def log_activity(self, agent: str, activity: str, details: Dict = None):
+        """Log an agent lifecycle/bookkeeping step (start, stop, ingest, feedback)."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info(
+            f'ACTIVITY: {{"agent":{_json_str(agent)},"activity":{_json_str(activity)},'
+            f'"details":{_json_dumps(details or {})}}}'
+        )
+    
+    def log_analysis(self, agent: str, event_id: str, threat_level: str, confidence_score: int):
+        """Log an event analysis result."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info(
+            f'ANALYSIS: {{"agent":{_json_str(agent)},"event_id":{_json_str(event_id)},'
+            f'"threat_level":{_json_str(threat_level)},"confidence_score":{int(confidence_score)}}}'
+        )
     
     def log_alert(self, alert_id: str, level: ThreatLevel, message: str, context: Dict):
         """Log a security alert."""
         entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_now(),
             "alert_id": alert_id,
             "level": level.value,
             "message": message,
             "context": context
         }
-        self.logger.warning(f"ALERT: {json.dumps(entry)}")
+        self.logger.warning(f"ALERT: {_json_dumps(entry)}")
     
     def log_action_executed(self, widget: str, action: str, result: Dict):
         """Log an action execution."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_now(),
             "widget": widget,
             "action": action,
             "result": result
         }
-        self.logger.info(f"ACTION: {json.dumps(entry)}")
+        self.logger.info(f"ACTION: {_json_dumps(entry)}")
+
+
+class AuditWriter:
+    """
+    Off-hot-path audit file writer.
+    Callers enqueue finished lines; a single daemon thread drains them in
+    batches of up to DRAIN_LINES and appends each batch to an O_APPEND file
+    descriptor with one os.writev() (one os.write() where writev is missing).
+    """
+    
+    DRAIN_LINES = 256
+    _STOP = object()
+    
+    def __init__(self, path: str = "logs/audit.log", max_queue: int = 10000):
+        self.path = path
+        self.dropped = 0  # Lines discarded because the queue was full
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="AuditWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def write(self, line: str):
+        """Queue a line for writing; never blocks the caller."""
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+    
+    def close(self, timeout: float = 5.0):
+        """Flush queued lines and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout=timeout)
+    
+    def _run(self):
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fd = os.open(self.path, flags, 0o644)
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                
+                # Take whatever else is already queued without blocking
+                while len(batch) < self.DRAIN_LINES:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                if self._STOP in batch:
+                    batch = batch[:batch.index(self._STOP)]
+                    stopping = True
+                if batch:
+                    self._write_lines(fd, [line.encode("utf-8") for line in batch])
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def _write_lines(fd: int, chunks: List[bytes]):
+        """Append chunks in one syscall where possible, finishing any short write."""
+        if hasattr(os, "writev"):
+            written = os.writev(fd, chunks)
+        else:
+            written = 0
+        remaining = memoryview(b"".join(chunks))[written:]
+        while remaining:
+            remaining = remaining[os.write(fd, remaining):]
 
 
 # ============================================================================
 # Event Model (Enhanced)
 # ============================================================================
 
-class Event:
+def _lowercase_values(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of payload with string values lowercased."""
+    return {k: v.lower() if isinstance(v, str) else v for k, v in payload.items()}
+
+
+class Event(_Timestamped):
     """Base class for system events detected by widgets."""
     
+    __slots__ = (
+        "event_type", "source", "payload", "severity",
+        "timestamp_ns", "_timestamp_iso", "event_id", "processed", "_payload_lower"
+    )
+    
     def __init__(self, event_type: str, source: str, payload: Dict[str, Any], severity: str = "info"):
         self.event_type = event_type
         self.source = source  # e.g., "file_integrity", "process_monitor"
         self.payload = payload
         self.severity = severity  # info, warning, critical
-        self.timestamp = datetime.now()
-        self.event_id = f"{source}_{int(self.timestamp.timestamp() * 1000)}"
+        self._stamp()
+        self.event_id = f"{source}_{self.timestamp_ns // 1_000_000}"
         self.processed = False  # Track if OrchA has analyzed
+        self._payload_lower = None
+    
+    @property
+    def payload_lower(self) -> Dict[str, Any]:
+        """Payload with string values lowercased (computed once, on first use)."""
+        if self._payload_lower is None:
+            self._payload_lower = _lowercase_values(self.payload)
+        return self._payload_lower
+    
+    def normalize(self) -> "Event":
+        """
+        Prepare the event for analysis once, at ingest: intern the source
+        (it keys the scorer dispatch) and build payload_lower, which scoring
+        and factor extraction share.
+        """
+        self.source = sys.intern(self.source)
+        if self._payload_lower is None:
+            self._payload_lower = _lowercase_values(self.payload)
+        return self
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -146,66 +436,142 @@ class Event:
             "event_type": self.event_type,
             "source": self.source,
             "severity": self.severity,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp_iso,
             "payload": self.payload,
             "processed": self.processed
         }
+    
+    def to_json(self) -> str:
+        """Serialize straight to JSON without building an intermediate dict."""
+        return (
+            f'{{"event_id":{_json_str(self.event_id)},"event_type":{_json_str(self.event_type)},'
+            f'"source":{_json_str(self.source)},"severity":{_json_str(self.severity)},'
+            f'"timestamp":"{self.timestamp_iso}","payload":{_json_dumps(self.payload)},'
+            f'"processed":{"true" if self.processed else "false"}}}'
+        )
 
 
 class EventQueue:
     """Thread-safe event queue for widget->orchestrator flow."""
     
+    __slots__ = ("queue", "_unprocessed", "max_size", "_lock")
+    
     def __init__(self, max_size: int = 1000):
-        self.queue: List[Event] = []
+        # Bounded deques evict the oldest entries automatically
+        self.queue: deque = deque(maxlen=max_size)
+        self._unprocessed: deque = deque(maxlen=max_size)
         self.max_size = max_size
+        # Condition so consumers can block in pop() until push() signals
+        self._lock = threading.Condition()
     
     def push(self, event: Event):
         """Add event to queue."""
-        self.queue.append(event)
-        if len(self.queue) > self.max_size:
-            self.queue = self.queue[-self.max_size:]
-    
-    def pop(self) -> Optional[Event]:
-        """Get next unprocessed event."""
-        for event in self.queue:
-            if not event.processed:
-                return event
-        return None
+        with self._lock:
+            self.queue.append(event)
+            self._unprocessed.append(event)
+            self._lock.notify()
+    
+    def pop(self, timeout: float = 0.0) -> Optional[Event]:
+        """
+        Get next unprocessed event.
+        Waits up to timeout seconds for one to arrive; None if there is none.
+        """
+        deadline = None
+        with self._lock:
+            while True:
+                while self._unprocessed:
+                    event = self._unprocessed.popleft()
+                    if not event.processed:
+                        return event
+                if deadline is None:
+                    deadline = time.monotonic() + timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._lock.wait(remaining)
+    
+    def drain_batch(self, max_n: int = 512) -> List[Event]:
+        """Atomically remove and return up to max_n unprocessed events."""
+        batch = []
+        with self._lock:
+            pending = self._unprocessed
+            while pending and len(batch) < max_n:
+                event = pending.popleft()
+                if not event.processed:
+                    batch.append(event)
+        return batch
     
     def get_all_unprocessed(self) -> List[Event]:
         """Get all unprocessed events."""
-        return [e for e in self.queue if not e.processed]
+        with self._lock:
+            # Drop events that were marked processed since the last call
+            pending = [e for e in self._unprocessed if not e.processed]
+            self._unprocessed = deque(pending, maxlen=self.max_size)
+        return pending
 
 
 # ============================================================================
 # Config Loader (Enhanced)
 # ============================================================================
 
-import yaml
+def _load_yaml(f) -> Any:
+    """Parse YAML with the libyaml-backed loader when available (yaml imported lazily)."""
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(f, Loader=loader)
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    """Modification time of path, or None if it does not exist (cache key part)."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
 
 class ConfigLoader:
-    """Load manifest & user config from YAML."""
+    """
+    Load manifest & user config from YAML. Parsed files are cached per
+    (path, mtime), so edits on disk are picked up; every caller gets its
+    own deep copy to mutate.
+    """
     
     @staticmethod
     def load_manifest(path: str = "config/manifest.yaml") -> Dict[str, Any]:
         """Load widget manifest."""
+        return copy.deepcopy(ConfigLoader._read_manifest(path, _mtime_ns(path)))
+    
+    @staticmethod
+    def load_user_config(path: str = "config/user_config.yaml") -> Dict[str, Any]:
+        """Load user settings."""
+        return copy.deepcopy(ConfigLoader._read_user_config(path, _mtime_ns(path)))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _read_manifest(path: str, mtime_ns: Optional[int]) -> Dict[str, Any]:
         try:
             with open(path, 'r') as f:
-                return yaml.safe_load(f) or {}
+                return _load_yaml(f) or {}
         except FileNotFoundError:
             logging.warning(f"Manifest not found at {path}. Using defaults.")
             return {}
     
     @staticmethod
-    def load_user_config(path: str = "config/user_config.yaml") -> Dict[str, Any]:
-        """Load user settings."""
+    @functools.lru_cache(maxsize=8)
+    def _read_user_config(path: str, mtime_ns: Optional[int]) -> Dict[str, Any]:
         try:
             with open(path, 'r') as f:
-                return yaml.safe_load(f) or {}
+                return _load_yaml(f) or {}
         except FileNotFoundError:
             logging.warning(f"User config not found at {path}. Using defaults.")
             return {
                 "permission_level": "observe",
                 "auto_respond": False,
                 "alert_threshold": 0.75
-            }
\ No newline at end of file
+            }
+    
+    @staticmethod
+    def reload():
+        """Invalidate cached configs so the next load re-reads from disk."""
+        ConfigLoader._read_manifest.cache_clear()
+        ConfigLoader._read_user_config.cache_clear()
@@ -0,0 +1,61 @@
+"""
+control_channel.py
+Address and shared secret of the local Guardian control channel.
+
+A running guardian.py serves widget commands on a Unix socket (named pipe on
+Windows); guardian_api.py connects to it. Both live under a per-user 0700
+runtime directory, and connections must pass the multiprocessing.connection
+HMAC handshake with a key only the owning user can read.
+"""
+
+import os
+import stat
+import tempfile
+from typing import Optional
+
+CONTROL_KEY_FILE = "control.key"
+
+
+def runtime_dir() -> str:
+    """Per-user runtime directory for the control socket and key, created 0700."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        path = os.path.join(base, "ArchieGuardian")
+    elif os.environ.get("XDG_RUNTIME_DIR"):
+        path = os.path.join(os.environ["XDG_RUNTIME_DIR"], "archie-guardian")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"archie-guardian-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if os.name != "nt":
+        # Refuse a directory someone else created (or loosened) in a shared /tmp
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise PermissionError(f"Unsafe control directory: {path}")
+    return path
+
+
+def control_address() -> str:
+    """Unix socket path (named pipe on Windows) of this user's Guardian."""
+    if os.name == "nt":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\archie-guardian-{user}"
+    return os.path.join(runtime_dir(), "control.sock")
+
+
+def publish_control_key(key: bytes) -> None:
+    """Write this run's key (mode 0600) for clients; call once the listener is bound."""
+    path = os.path.join(runtime_dir(), CONTROL_KEY_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp_path, path)
+
+
+def read_control_key() -> Optional[bytes]:
+    """The running Guardian's key, or None if no Guardian has published one."""
+    try:
+        with open(os.path.join(runtime_dir(), CONTROL_KEY_FILE), "rb") as f:
+            return f.read() or None
+    except OSError:
+        return None
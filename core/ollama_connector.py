@@ -4,10 +4,20 @@ Ollama API connector for Archie Guardian
 Handles communication with local Ollama instance (Llama 3)
 """
 
-import requests
 import json
-from typing import Optional, Dict, Any
-from requests.exceptions import RequestException, Timeout
+from typing import Optional, Dict, Any, Iterator, List
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps_indent(obj, default=None) -> str:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps_indent(obj, default=None) -> str:
+        return json.dumps(obj, indent=2, default=default)
 
 
 class OllamaConnector:
@@ -28,6 +38,19 @@ class OllamaConnector:
         self.model = model
         self.timeout = timeout
         self.is_connected = False
+        
+        # requests is imported here so importing this module stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._exceptions = requests.exceptions
+        
+        # Persistent session: reuse the keep-alive connection across calls
+        self._session = requests.Session()
+        self._session.mount(
+            "http://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        )
+        
         self.check_connection()
     
     def check_connection(self) -> bool:
@@ -38,7 +61,7 @@ class OllamaConnector:
             bool: True if connected and model exists
         """
         try:
-            response = requests.get(
+            response = self._session.get(
                 f"{self.base_url}/api/tags",
                 timeout=5
             )
@@ -56,49 +79,80 @@ class OllamaConnector:
             self.is_connected = model_exists
             return model_exists
             
-        except RequestException:
+        except self._exceptions.RequestException:
             self.is_connected = False
             return False
     
-    def chat(self, prompt: str, stream: bool = False) -> str:
+    def chat(self, prompt: str, stream: bool = False):
         """
         Send a prompt to Ollama and get response.
         
         Args:
             prompt: The prompt/question to send
-            stream: Whether to stream response (default: False)
+            stream: Return an iterator of response chunks (see chat_stream)
+                instead of the full text (default: False)
         
         Returns:
-            str: Model response or error message
+            str: Model response or error message (Iterator[str] if stream)
+        """
+        if stream:
+            return self.chat_stream(prompt)
+        return "".join(self.chat_stream(prompt)) or "No response returned"
+    
+    def chat_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Send a prompt to Ollama and yield response chunks as they arrive.
+        
+        Args:
+            prompt: The prompt/question to send
+        
+        Yields:
+            str: Partial model response (or a single error message)
         """
         if not self.is_connected:
-            return "❌ Ollama not connected. Run 'ollama serve' first."
+            yield "❌ Ollama not connected. Run 'ollama serve' first."
+            return
         
         try:
-            response = requests.post(
+            with self._session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model,
                     "prompt": prompt,
-                    "stream": stream,
+                    "stream": True,
                     "options": {
                         "num_thread": 16,
                         "num_gpu": 0,
                         "temperature": 0.3,
                     }
                 },
+                stream=True,
                 timeout=self.timeout
-            )
-            
-            if response.status_code == 200:
-                return response.json().get("response", "No response returned")
-            
-            return f"❌ Error {response.status_code}: {response.text}"
+            ) as response:
+                if response.status_code != 200:
+                    yield f"❌ Error {response.status_code}: {response.text}"
+                    return
+                
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk = _json_loads(line)
+                    except ValueError:  # json and orjson decode errors alike
+                        continue  # Skip a garbled line, keep the rest of the reply
+                    if not isinstance(chunk, dict):
+                        continue
+                    text = chunk.get("response")
+                    if text:
+                        yield text
+                    if chunk.get("done"):
+                        break
             
-        except Timeout:
-            return "⏱️ Request timed out. Model might be slow or overloaded."
-        except RequestException as e:
-            return f"❌ Connection error: {str(e)}"
+        except self._exceptions.Timeout:
+            yield "⏱️ Request timed out. Model might be slow or overloaded."
+        except self._exceptions.RequestException as e:
+            yield f"❌ Connection error: {str(e)}"
     
     def analyze_security_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -119,10 +173,64 @@ class OllamaConnector:
             "model": self.model
         }
     
+    def analyze_security_events(self, events: List[Dict[str, Any]]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Analyze a batch of security events with a single Ollama call.
+        
+        Args:
+            events: Security event dicts, each with an "event_id"
+        
+        Returns:
+            dict: event_id -> {"threat_level", "reasoning"}, or None if
+                  the model reply could not be parsed
+        """
+        if not events:
+            return {}
+        
+        prompt = self._build_batch_security_prompt(events)
+        reply = self.chat(prompt)
+        
+        # The reply may wrap the JSON array in prose; take the outermost [...]
+        start, end = reply.find("["), reply.rfind("]")
+        if start == -1 or end <= start:
+            return None
+        
+        try:
+            entries = _json_loads(reply[start:end + 1])
+        except ValueError:
+            return None
+        
+        if not isinstance(entries, list):
+            return None
+        
+        return {
+            str(entry["event_id"]): {
+                "threat_level": str(entry.get("threat_level", "")).lower(),
+                "reasoning": entry.get("reasoning", "")
+            }
+            for entry in entries
+            if isinstance(entry, dict) and "event_id" in entry
+        }
+    
+    def _build_batch_security_prompt(self, events: List[Dict[str, Any]]) -> str:
+        """Build batched security analysis prompt from a list of events."""
+        details = _json_dumps_indent(events, default=str)
+        
+        return f"""You are a cybersecurity analyst for Archie Guardian, a host-based security monitoring system.
+
+Analyze the following {len(events)} security events:
+
+{details}
+
+Return ONLY a JSON array with one object per event:
+[{{"event_id": "...", "threat_level": "low|medium|high", "reasoning": "..."}}]
+
+Be concise and actionable."""
+    
     def _build_security_prompt(self, event: Dict[str, Any]) -> str:
         """Build security analysis prompt from event data."""
         event_type = event.get("type", "unknown")
-        details = json.dumps(event, indent=2)
+        details = _json_dumps_indent(event)
         
         return f"""You are a cybersecurity analyst for Archie Guardian, a host-based security monitoring system.
 
@@ -151,13 +259,13 @@ Be concise and actionable."""
     def list_models(self) -> list[str]:
         """List available Ollama models."""
         try:
-            response = requests.get(
+            response = self._session.get(
                 f"{self.base_url}/api/tags",
                 timeout=5
             )
             if response.status_code == 200:
                 return [m.get("name") for m in response.json().get("models", [])]
-        except RequestException:
+        except self._exceptions.RequestException:
             pass
         return []
     
@@ -181,3 +289,8 @@ Be concise and actionable."""
         self.model = old_model
         print(f"❌ Model '{model_name}' not available")
         return False
+    
+    def close(self):
+        """Close the underlying HTTP session."""
+        self._session.close()
+        self.is_connected = False
@@ -4,13 +4,285 @@ OrchA: AI Task Master orchestrator for threat analysis & scoring.
 Bridges widgets → threat intelligence → action dispatcher
 """
 
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
 from .agent_utils import (
     Event, ThreatLevel, AuditLogger, PermissionLevel, 
-    ThreatScore, Decision, EventQueue
+    ThreatScore, Decision, EventQueue, deque_tail, iso_now, THREAT_LEVEL_BY_VALUE
 )
-import json
+from collections import deque
+from bisect import bisect_right
+import functools
+import re
+import threading
+
+
+try:
+    import ahocorasick  # optional: pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import numpy as np  # optional: vectorized scoring of large event bursts
+except ImportError:
+    np = None
+
+try:
+    from numba import njit  # optional: JIT-compiled batch classification
+except ImportError:
+    njit = None
+
+
+# ============================================================================
+# Heuristic matchers (compiled once, scoring helpers memoized per string)
+# ============================================================================
+
+class _KeywordMatcher:
+    """
+    Match many keywords in one pass over a string, returning the set of tags hit.
+    Each keyword maps to one tag or a tuple of tags (e.g. a score tag and a
+    factor tag), so score and factor breakdown come from the same scan.
+    Uses an Aho-Corasick automaton when pyahocorasick is installed,
+    otherwise a single compiled regex alternation.
+    """
+    
+    def __init__(self, keywords: Dict[str, Any]):
+        tags = {k: (v,) if isinstance(v, str) else tuple(v) for k, v in keywords.items()}
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, keyword_tags in tags.items():
+                self._automaton.add_word(keyword, keyword_tags)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            # The regex reports one keyword per start position (longest first),
+            # so each keyword also carries the tags of keywords nested in it
+            self._tags = {
+                k: frozenset(t for other, other_tags in tags.items() if other in k for t in other_tags)
+                for k in tags
+            }
+            ordered = sorted(tags, key=len, reverse=True)
+            self._regex = re.compile("(?=(%s))" % "|".join(re.escape(k) for k in ordered))
+    
+    def tags(self, text: str) -> frozenset:
+        if self._automaton is not None:
+            return frozenset(t for _, keyword_tags in self._automaton.iter(text) for t in keyword_tags)
+        return frozenset().union(*(self._tags[m] for m in self._regex.findall(text)))
+
+
+# Keywords are matched against Event.payload_lower, so they are lowercase only.
+# Tags without a "factor:" prefix drive the score; "factor:" tags the breakdown.
+_FILE_PATH_KEYWORDS = {
+    "system32": "system_path",
+    "windows": "system_path",
+    "program files": "system_path",
+    ".exe": ("executable", "factor:executable"),
+    ".dll": ("executable", "factor:executable"),
+    ".sys": "executable",
+    "system": "factor:system_path",
+}
+_FILE_PATH_MATCHER = _KeywordMatcher(_FILE_PATH_KEYWORDS)
+_PROCESS_MATCHER = _KeywordMatcher({
+    "powershell": ("suspicious", "factor:suspicious_process"),
+    "cmd.exe": "suspicious",
+    "wscript": "suspicious",
+    "cscript": "suspicious",
+    "regsrv32": "suspicious",
+    "cmd": "factor:suspicious_process",
+})
+_NET_PROCESS_MATCHER = _KeywordMatcher({
+    "powershell": "suspicious",
+    "cmd": "suspicious",
+    "wscript": "suspicious",
+})
+_SUSPICIOUS_PROCS = frozenset(("powershell", "cmd.exe", "wscript", "cscript", "regsrv32"))
+_TRUSTED_IPS = frozenset(("8.8.8.8", "1.1.1.1", "127.0.0.1"))
+
+
+@functools.lru_cache(maxsize=4096)
+def _file_path_tags(path: str) -> frozenset:
+    """Keyword tags of a file path (scored and factored from one scan)."""
+    return _FILE_PATH_MATCHER.tags(path)
+
+
+@functools.lru_cache(maxsize=4096)
+def _process_tags(name: str) -> frozenset:
+    """Keyword tags of a spawned process name."""
+    return _PROCESS_MATCHER.tags(name)
+
+
+def _score_file_path(path: str) -> int:
+    """Score bonus for high-risk file paths."""
+    tags = _file_path_tags(path)
+    if "system_path" in tags:
+        return 30
+    if "executable" in tags:
+        return 20
+    return 0
+
+
+def _score_process(name: str) -> int:
+    """Base score for a spawned process name."""
+    return 70 if "suspicious" in _process_tags(name) else 25
+
+
+@functools.lru_cache(maxsize=4096)
+def _score_network_process(name: str) -> int:
+    """Base score for a process making network calls."""
+    return 75 if _NET_PROCESS_MATCHER.tags(name) else 0
+
+
+def _score_ip(remote_addr: str) -> int:
+    """Score adjustment for the remote "ip:port" (known safe destinations)."""
+    # A split and set lookup is already cheaper than an LRU hit; not cached
+    return -30 if remote_addr.rsplit(":", 1)[0] in _TRUSTED_IPS else 0
+
+
+# ============================================================================
+# Per-source scorers (pure functions of the lowercased payload)
+# ============================================================================
+
+def _score_file_integrity(payload: Dict[str, Any]) -> int:
+    """File Integrity Widget scoring."""
+    event_type = payload.get("event_type", "")
+    base_score = 0
+    
+    # High-risk operations
+    if event_type == "modified":
+        base_score = 40
+    elif event_type in ("created", "deleted"):
+        base_score = 30
+    
+    # High-risk paths
+    base_score += _score_file_path(payload.get("path", ""))
+    
+    return min(base_score, 100)
+
+
+def _score_file_integrity_batch(payloads: List[Dict[str, Any]]) -> List[int]:
+    """Vectorized _score_file_integrity over many payloads (requires NumPy)."""
+    paths = np.array([p.get("path", "") for p in payloads], dtype=str)
+    event_types = np.array([p.get("event_type", "") for p in payloads], dtype=str)
+    
+    hits = {"system_path": np.zeros(len(payloads), dtype=bool),
+            "executable": np.zeros(len(payloads), dtype=bool)}
+    for keyword, tags in _FILE_PATH_KEYWORDS.items():
+        for tag in ((tags,) if isinstance(tags, str) else tags):
+            if tag in hits:
+                hits[tag] |= np.char.find(paths, keyword) >= 0
+    
+    scores = np.where(event_types == "modified", 40,
+                      np.where(np.isin(event_types, ("created", "deleted")), 30, 0))
+    scores += np.where(hits["system_path"], 30, np.where(hits["executable"], 20, 0))
+    return np.minimum(scores, 100).tolist()
+
+
+def _score_process_monitor(payload: Dict[str, Any]) -> int:
+    """Process Monitor Widget scoring."""
+    # Suspicious process names
+    base_score = _score_process(payload.get("name", ""))
+    
+    # Parent process context (if available)
+    if payload.get("parent") in _SUSPICIOUS_PROCS:
+        base_score += 20
+    
+    return min(base_score, 100)
+
+
+def _score_network_sniffer(payload: Dict[str, Any]) -> int:
+    """Network Sniffer Widget scoring."""
+    # Suspicious processes making network calls
+    base_score = _score_network_process(payload.get("process", ""))
+    
+    # Known safe destinations
+    base_score = max(base_score + _score_ip(payload.get("remote_address", "")), 0)
+    
+    return min(base_score, 100)
+
+
+def _score_windows_defender(payload: Dict[str, Any]) -> int:
+    """Windows Defender widget scoring."""
+    threats_found = payload.get("threats_found", 0)
+    
+    if threats_found > 0:
+        base_score = 80 + min(threats_found * 5, 20)
+    else:
+        base_score = 10
+    
+    return min(base_score, 100)
+
+
+def _score_rrnc(payload: Dict[str, Any]) -> int:
+    """RRNC widget scoring."""
+    action = payload.get("action", "")
+    base_score = 0
+    
+    if action in ("process_kill", "quarantine"):
+        base_score = 85  # RRNC already made a decision
+    elif action == "capture_forensics":
+        base_score = 75
+    
+    return min(base_score, 100)
+
+
+def _default_score(payload: Dict[str, Any]) -> int:
+    """Score for events from unknown sources."""
+    return 45
+
+
+def _factors_file_integrity(payload: Dict[str, Any]) -> Dict[str, float]:
+    factors = {}
+    tags = _file_path_tags(payload.get("path", ""))
+    
+    if "factor:system_path" in tags:
+        factors["system_path"] = 0.8
+    if "factor:executable" in tags:
+        factors["executable"] = 0.7
+    factors["modification"] = 0.6
+    return factors
+
+
+def _factors_process_monitor(payload: Dict[str, Any]) -> Dict[str, float]:
+    if "factor:suspicious_process" in _process_tags(payload.get("name", "")):
+        return {"suspicious_process": 0.9}
+    return {}
+
+
+def _factors_network_sniffer(payload: Dict[str, Any]) -> Dict[str, float]:
+    return {"network_activity": 0.6}
+
+
+def _no_factors(payload: Dict[str, Any]) -> Dict[str, float]:
+    return {}
+
+
+# Below this many events the per-event (memoized) path is cheaper than NumPy setup
+_BATCH_MIN_EVENTS = 32
+
+# Confidence thresholds (percent) shared by the scalar and batch classifiers
+_MEDIUM_THRESHOLD = 60
+_HIGH_THRESHOLD = 85
+_LEVEL_BY_CODE = (ThreatLevel.LOW, ThreatLevel.MEDIUM, ThreatLevel.HIGH)
+
+
+def _classify_scores(scores):
+    """Map an int score array to level codes (0=low, 1=medium, 2=high)."""
+    levels = np.empty(len(scores), dtype=np.uint8)
+    for i in range(len(scores)):
+        if scores[i] < _MEDIUM_THRESHOLD:
+            levels[i] = 0
+        elif scores[i] < _HIGH_THRESHOLD:
+            levels[i] = 1
+        else:
+            levels[i] = 2
+    return levels
+
+
+if njit is not None:
+    _classify_scores = njit(cache=True)(_classify_scores)
+elif np is not None:
+    def _classify_scores(scores):
+        """Map an int score array to level codes (0=low, 1=medium, 2=high)."""
+        return np.digitize(scores, (_MEDIUM_THRESHOLD, _HIGH_THRESHOLD)).astype(np.uint8)
 
 
 class OrchA:
@@ -23,25 +295,69 @@ class OrchA:
     - Integrates with dispatcher for action execution
     """
     
-    def __init__(self, audit_logger: AuditLogger, config: Dict[str, Any] = None):
+    def __init__(self, audit_logger: AuditLogger, config: Dict[str, Any] = None, connector=None,
+                 connector_factory=None):
         self.audit_logger = audit_logger
         self.config = config or {}
+        self.connector = connector  # Optional OllamaConnector for LLM analysis
+        # Or a callable that builds one on the first batch analysis, so
+        # startup never imports requests or probes the Ollama server
+        self._connector_factory = connector_factory
+        self._connector_lock = threading.Lock()
         self.event_queue = EventQueue()
         
         # Threat thresholds (in percentages)
         self.threat_thresholds = {
-            ThreatLevel.LOW: (0, 60),      # < 60% = LOW
-            ThreatLevel.MEDIUM: (60, 85),  # 60-85% = MEDIUM
-            ThreatLevel.HIGH: (85, 100)    # > 85% = HIGH
+            ThreatLevel.LOW: (0, _MEDIUM_THRESHOLD),                   # < 60% = LOW
+            ThreatLevel.MEDIUM: (_MEDIUM_THRESHOLD, _HIGH_THRESHOLD),  # 60-85% = MEDIUM
+            ThreatLevel.HIGH: (_HIGH_THRESHOLD, 100)                   # > 85% = HIGH
+        }
+        
+        # Sorted band cutoffs for _assign_threat_level (bisect, any number of bands)
+        bands = sorted(self.threat_thresholds.items(), key=lambda item: item[1][0])
+        self._level_cuts = [low for _, (low, _) in bands[1:]]
+        self._levels = tuple(level for level, _ in bands)
+        
+        # Source -> scoring / factor functions (dispatch instead of if/elif)
+        self._scorers = {
+            "file_integrity": _score_file_integrity,
+            "process_monitor": _score_process_monitor,
+            "network_sniffer": _score_network_sniffer,
+            "windows_defender": _score_windows_defender,
+            "rrnc": _score_rrnc,
+        }
+        self._factor_extractors = {
+            "file_integrity": _factors_file_integrity,
+            "process_monitor": _factors_process_monitor,
+            "network_sniffer": _factors_network_sniffer,
         }
         
-        # Learning & feedback tracking
-        self.false_positives = []
-        self.learning_history = []
+        # Memoized (score, factors) keyed by (source, payload items); bounded
+        self._score_cache = functools.lru_cache(
+            maxsize=self.config.get("score_cache_size", 4096)
+        )(self._score_from_key)
+        
+        # Learning & feedback tracking (bounded for long-running sessions)
+        history_limit = self.config.get("decision_history", 10000)
+        self.false_positives = deque(maxlen=history_limit)
+        self.learning_history = deque(maxlen=history_limit)
         self.threat_patterns = {}  # Pattern recognition
         
+        # Known-benign (source, event_type) pairs dropped before queueing (opt-in)
+        self._noise = frozenset(tuple(pair) for pair in self.config.get("noise_filter", ()))
+        
         # Decision history (for audit trail)
-        self.decisions = []
+        self.decisions = deque(maxlen=history_limit)
+        
+        # Lifetime totals (the histories above only keep the newest entries)
+        self._counters = {
+            "events": 0,
+            "decisions": 0,
+            "false_positives": 0,
+            "learning_entries": 0,
+        }
+        # decide() runs on the orchestrator's worker threads
+        self._counters_lock = threading.Lock()
         
         self.logger_name = "OrchA"
         self.active = False
@@ -49,6 +365,9 @@ class OrchA:
     def start(self):
         """Activate OrchA."""
         self.active = True
+        if self.connector is not None and not self.connector.is_connected:
+            # Ollama may have come up since the connector was created
+            self.connector.check_connection()
         print(f"   ✓ {self.logger_name} activated")
         return True
     
@@ -62,25 +381,36 @@ class OrchA:
         """Push event into processing queue."""
         if not self.active:
             return
+        event.normalize()
         self.event_queue.push(event)
+        with self._counters_lock:
+            self._counters["events"] += 1
+    
+    def is_noise(self, event: Event) -> bool:
+        """Cheap pre-filter: True for events configured as known-benign."""
+        return (event.source, event.event_type) in self._noise
     
     def process_events(self) -> List[Decision]:
-        """Process all unprocessed events, return decisions."""
+        """Process a batch of unprocessed events, return decisions."""
         decisions = []
-        unprocessed = self.event_queue.get_all_unprocessed()
+        # One lock acquisition; the batch is then processed without contention
+        batch = self.event_queue.drain_batch()
+        if len(batch) > _BATCH_MIN_EVENTS:
+            scores = self.score_batch(batch)
+            levels = self.classify_batch(scores)
+        else:
+            scores = levels = [None] * len(batch)
         
-        for event in unprocessed:
+        for event, score, level in zip(batch, scores, levels):
             try:
-                analysis = self.analyze_event(event)
+                analysis = self.analyze_event(event, score, level, compact_low=True)
                 
                 # Mark as processed
                 event.processed = True
                 
-                # Generate decision if threat detected
-                if analysis["threat_level"] in ["medium", "high"]:
-                    decision = self._generate_decision(event, analysis)
+                decision = self.decide(event, analysis)
+                if decision is not None:
                     decisions.append(decision)
-                    self.decisions.append(decision)
             except Exception as e:
                 self.audit_logger.log_alert(
                     alert_id=f"orcha_error_{event.event_id}",
@@ -91,162 +421,175 @@ class OrchA:
         
         return decisions
     
-    def analyze_event(self, event: Event) -> Dict[str, Any]:
+    def analyze_event(self, event: Event, confidence_score: Optional[int] = None,
+                      threat_level: Optional[ThreatLevel] = None,
+                      compact_low: bool = False) -> Dict[str, Any]:
         """
         Analyze incoming event and assign threat score.
         MVP: heuristic-based. Future: LLM via Ollama/local models.
+        confidence_score / threat_level may be passed in when already computed
+        by score_batch / classify_batch. With compact_low, LOW events get a
+        compact analysis (no factors/reasoning) for callers that discard them.
         """
         
-        # Score the event (0-100)
-        confidence_score = self._score_event(event)
-        threat_level = self._assign_threat_level(confidence_score)
+        # Score the event (0-100) with breakdown of scoring factors
+        factors = None
+        if confidence_score is None:
+            confidence_score, factors = self._score_and_factors(event)
+        if threat_level is None:
+            threat_level = self._assign_threat_level(confidence_score)
+        
+        # Log analysis (formatted straight to a string, no extra dict)
+        self.audit_logger.log_analysis(
+            self.logger_name, event.event_id, threat_level.value, confidence_score
+        )
         
-        # Breakdown of scoring factors
-        factors = self._get_score_factors(event)
+        if compact_low and threat_level is ThreatLevel.LOW:
+            # The common case; process_events discards LOW analyses anyway
+            return {
+                "event_id": event.event_id,
+                "threat_level": threat_level.value,
+                "confidence_score": confidence_score
+            }
         
-        analysis = {
+        if factors is None:
+            factors = self._factor_extractors.get(event.source, _no_factors)(event.payload_lower)
+        
+        return {
             "event_id": event.event_id,
             "source": event.source,
             "event_type": event.event_type,
             "confidence_score": confidence_score,
             "threat_level": threat_level.value,
             "factors": factors,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_now(),
             "reasoning": f"Event '{event.event_type}' from {event.source} scored {confidence_score}% threat"
         }
-        
-        # Log decision
-        self.audit_logger.log_decision(
-            agent=self.logger_name,
-            decision="analyze_event",
-            details=analysis
-        )
-        
-        return analysis
     
-    def _score_event(self, event: Event) -> int:
+    def analyze_events(self, events: List[Event]) -> Dict[str, Dict[str, Any]]:
         """
-        Score event threat level (0-100).
-        MVP: heuristics. Future: LLM-based scoring.
+        Analyze a batch of events, return event_id -> analysis.
+        Heuristic scores are refined by a single LLM call for the whole batch
+        when a connected Ollama connector is available.
         """
+        return {analysis["event_id"]: analysis for analysis in self.analyze_batch(events)}
+    
+    def analyze_batch(self, events: List[Event]) -> List[Dict[str, Any]]:
+        """Like analyze_events, but returns analyses in event order (ids may repeat)."""
+        # Full analyses: the LLM may raise a LOW event, and callers display them all
+        if len(events) > _BATCH_MIN_EVENTS:
+            scores = self.score_batch(events)
+            levels = self.classify_batch(scores)
+        else:
+            scores = levels = [None] * len(events)
+        analyses = [
+            self.analyze_event(event, score, level)
+            for event, score, level in zip(events, scores, levels)
+        ]
         
-        payload = event.payload
-        base_score = 0
+        connector = self._get_connector() if events else None
+        if not (connector and connector.is_connected):
+            return analyses
         
-        # File Integrity Widget scoring
-        if event.source == "file_integrity":
-            event_type = payload.get("event_type", "")
-            path = payload.get("path", "").lower()
-            
-            # High-risk operations
-            if event_type == "modified":
-                base_score = 40
-            elif event_type in ["created", "deleted"]:
-                base_score = 30
-            
-            # High-risk paths
-            if any(x in path for x in ["system32", "windows", "program files"]):
-                base_score += 30
-            elif any(x in path for x in [".exe", ".dll", ".sys"]):
-                base_score += 20
-            
-            return min(base_score, 100)
+        llm_results = connector.analyze_security_events([e.to_dict() for e in events])
+        if not llm_results:
+            return analyses  # Unparseable reply: keep per-event heuristics
         
-        # Process Monitor Widget scoring
-        elif event.source == "process_monitor":
-            process_name = payload.get("name", "").lower()
-            
-            # Suspicious process names
-            suspicious = ["powershell", "cmd.exe", "wscript", "cscript", "regsrv32"]
-            if any(x in process_name for x in suspicious):
-                base_score = 70
-            else:
-                base_score = 25
-            
-            # Parent process context (if available)
-            if "parent" in payload:
-                if payload["parent"] in suspicious:
-                    base_score += 20
-            
-            return min(base_score, 100)
-        
-        # Network Sniffer Widget scoring
-        elif event.source == "network_sniffer":
-            remote_addr = payload.get("remote_address", "")
-            process = payload.get("process", "").lower()
-            
-            # Suspicious processes making network calls
-            if any(x in process for x in ["powershell", "cmd", "wscript"]):
-                base_score = 75
-            
-            # Known safe destinations
-            if any(x in remote_addr for x in ["8.8.8.8", "1.1.1.1", "127.0.0.1"]):
-                base_score = max(base_score - 30, 0)
-            
-            return min(base_score, 100)
+        for analysis in analyses:
+            result = llm_results.get(analysis["event_id"])
+            if result is None:
+                continue
+            level = result["threat_level"]
+            if level == "critical":
+                level = ThreatLevel.HIGH.value
+            if level in THREAT_LEVEL_BY_VALUE:
+                analysis["threat_level"] = level
+            if result["reasoning"]:
+                analysis["reasoning"] = result["reasoning"]
         
-        # Windows Defender widget scoring
-        elif event.source == "windows_defender":
-            threats_found = payload.get("threats_found", 0)
-            scan_type = payload.get("scan_type", "")
-            
-            if threats_found > 0:
-                base_score = 80 + min(threats_found * 5, 20)
-            else:
-                base_score = 10
-            
-            return min(base_score, 100)
+        return analyses
+    
+    def _get_connector(self):
+        """The connector, built through connector_factory on first use."""
+        if self._connector_factory is not None:
+            with self._connector_lock:
+                if self._connector_factory is not None:
+                    try:
+                        self.connector = self._connector_factory()
+                    except ImportError:
+                        self.connector = None  # requests missing: heuristics only
+                    self._connector_factory = None
+        return self.connector
+    
+    def decide(self, event: Event, analysis: Dict[str, Any]) -> Optional[Decision]:
+        """Generate (and record) a decision if the analysis found a threat."""
+        if analysis["threat_level"] not in (ThreatLevel.MEDIUM.value, ThreatLevel.HIGH.value):
+            return None
+        decision = self._generate_decision(event, analysis)
+        with self._counters_lock:
+            self.decisions.append(decision)
+            self._counters["decisions"] += 1
+        return decision
+    
+    def score_batch(self, events: List[Event]) -> List[int]:
+        """
+        Score many events at once (0-100 each, same order as events).
+        Large file_integrity bursts are scored in one NumPy pass when available.
+        """
+        scores: List[Optional[int]] = [None] * len(events)
         
-        # RRNC widget scoring
-        elif event.source == "rrnc":
-            action = payload.get("action", "")
-            
-            if action in ["process_kill", "quarantine"]:
-                base_score = 85  # RRNC already made a decision
-            elif action == "capture_forensics":
-                base_score = 75
-            
-            return min(base_score, 100)
+        fim = [i for i, event in enumerate(events) if event.source == "file_integrity"]
+        if np is not None and len(fim) > _BATCH_MIN_EVENTS:
+            fim_scores = _score_file_integrity_batch([events[i].payload_lower for i in fim])
+            for i, score in zip(fim, fim_scores):
+                scores[i] = score
         
-        # Default
-        return 45
+        return [self._score_event(event) if score is None else score
+                for event, score in zip(events, scores)]
+    
+    def classify_batch(self, scores: List[int]) -> List[ThreatLevel]:
+        """Assign threat levels to many scores (compiled with Numba when available)."""
+        if np is None:
+            return [self._assign_threat_level(score) for score in scores]
+        codes = _classify_scores(np.asarray(scores, dtype=np.int16))
+        return [_LEVEL_BY_CODE[code] for code in codes.tolist()]
+    
+    def _score_event(self, event: Event) -> int:
+        """
+        Score event threat level (0-100).
+        MVP: heuristics. Future: LLM-based scoring.
+        """
+        return self._score_and_factors(event)[0]
     
     def _get_score_factors(self, event: Event) -> Dict[str, float]:
         """Return breakdown of threat factors."""
-        factors = {}
-        
-        if event.source == "file_integrity":
-            payload = event.payload
-            path = payload.get("path", "").lower()
-            
-            if "system" in path:
-                factors["system_path"] = 0.8
-            if ".exe" in path or ".dll" in path:
-                factors["executable"] = 0.7
-            factors["modification"] = 0.6
-        
-        elif event.source == "process_monitor":
-            process = payload.get("name", "").lower()
-            if "powershell" in process or "cmd" in process:
-                factors["suspicious_process"] = 0.9
-        
-        elif event.source == "network_sniffer":
-            factors["network_activity"] = 0.6
-        
-        return factors
+        return self._score_and_factors(event)[1]
+    
+    def _score_and_factors(self, event: Event) -> Tuple[int, Dict[str, float]]:
+        """Score + factors, memoized so duplicate events skip the matchers."""
+        payload = event.payload_lower
+        # The widget timestamp never affects scoring; leave it out of the key
+        key = tuple(sorted(item for item in payload.items() if item[0] != "timestamp"))
+        try:
+            score, factors = self._score_cache(event.source, key)
+        except TypeError:
+            # Unhashable (nested) payload values: score without the cache
+            score, factors = self._score_from_key(event.source, payload)
+        return score, dict(factors)
+    
+    def _score_from_key(self, source: str, key) -> Tuple[int, tuple]:
+        payload = dict(key)
+        score = self._scorers.get(source, _default_score)(payload)
+        factors = self._factor_extractors.get(source, _no_factors)(payload)
+        return score, tuple(factors.items())
     
     def _assign_threat_level(self, score: int) -> ThreatLevel:
         """Assign threat level based on confidence score."""
-        if score < 60:
-            return ThreatLevel.LOW
-        elif score < 85:
-            return ThreatLevel.MEDIUM
-        else:
-            return ThreatLevel.HIGH
+        return self._levels[bisect_right(self._level_cuts, score)]
     
     def _generate_decision(self, event: Event, analysis: Dict) -> Decision:
         """Generate actionable decision from analysis."""
-        threat_level = ThreatLevel[analysis["threat_level"].upper()]
+        threat_level = THREAT_LEVEL_BY_VALUE[analysis["threat_level"]]
         
         # Recommend action based on threat
         action = "escalate"  # Default: escalate to OrchB/human
@@ -275,32 +618,38 @@ class OrchA:
             "event_id": event_id,
             "feedback": feedback,
             "correct_classification": correct_classification,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
         
-        self.learning_history.append(feedback_entry)
-        
-        if feedback == "false_positive":
-            self.false_positives.append(event_id)
+        with self._counters_lock:
+            self.learning_history.append(feedback_entry)
+            self._counters["learning_entries"] += 1
+            
+            if feedback == "false_positive":
+                self.false_positives.append(event_id)
+                self._counters["false_positives"] += 1
         
-        self.audit_logger.log_decision(
+        self.audit_logger.log_activity(
             agent=self.logger_name,
-            decision="learn_from_feedback",
+            activity="learn_from_feedback",
             details=feedback_entry
         )
     
     def get_stats(self) -> Dict[str, Any]:
         """Return OrchA statistics."""
+        with self._counters_lock:
+            counters = dict(self._counters)
         return {
             "agent_name": self.logger_name,
             "active": self.active,
             "events_queued": len(self.event_queue.queue),
-            "decisions_made": len(self.decisions),
-            "false_positives_tracked": len(self.false_positives),
-            "learning_entries": len(self.learning_history),
+            "events_ingested": counters["events"],
+            "decisions_made": counters["decisions"],
+            "false_positives_tracked": counters["false_positives"],
+            "learning_entries": counters["learning_entries"],
             "threat_thresholds": {k.value: v for k, v in self.threat_thresholds.items()}
         }
     
     def get_recent_decisions(self, limit: int = 10) -> List[Dict]:
         """Get recent decisions for audit trail."""
-        return [d.to_dict() for d in self.decisions[-limit:]]
\ No newline at end of file
+        return [d.to_dict() for d in deque_tail(self.decisions, limit)]
\ No newline at end of file
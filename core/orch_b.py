@@ -4,11 +4,60 @@ OrchB: Human-Facing orchestrator for permissions, escalation & user interaction.
 Bridges OrchA decisions with human approval & feedback loops.
 """
 
+import functools
+import threading
 from typing import Dict, List, Any, Tuple, Optional
-from datetime import datetime
 from .agent_utils import (
-    PermissionLevel, ThreatLevel, AuditLogger, Decision, ThreatScore
+    PermissionLevel, ThreatLevel, AuditLogger, AuditWriter, Decision, ThreatScore, deque_tail, iso_now
 )
+from collections import deque
+
+
+# Minimum permission level required per action (unknown actions: OBSERVE)
+_ACTION_REQ = {
+    "observe": PermissionLevel.OBSERVE,
+    "alert": PermissionLevel.ALERT,
+    "analyze": PermissionLevel.ANALYZE,
+    "isolate": PermissionLevel.ISOLATE,
+    "quarantine": PermissionLevel.ISOLATE,
+    "process_kill": PermissionLevel.ISOLATE,
+    "network_block": PermissionLevel.ISOLATE,
+    "auto_respond": PermissionLevel.AUTO_RESPOND,
+}
+
+# Permission levels ranked from least to most privileged
+_PERM_RANK = {
+    PermissionLevel.OBSERVE: 0,
+    PermissionLevel.ALERT: 1,
+    PermissionLevel.ANALYZE: 2,
+    PermissionLevel.ISOLATE: 3,
+    PermissionLevel.AUTO_RESPOND: 4,
+}
+
+
+# Escalation context formatting, dispatched on the value's type (subclasses
+# such as OrderedDict/defaultdict resolve to the dict formatter)
+@functools.singledispatch
+def _format_context_entry(value, key) -> str:
+    return f"  {key}: {value}"
+
+
+@_format_context_entry.register(dict)
+def _format_context_dict(value: Dict, key) -> str:
+    return "\n".join((f"  {key}:", *(f"    - {k}: {v}" for k, v in value.items())))
+
+
+# Static parts of the escalation prompt, built once
+_ESCALATION_HEADER = """
+╔════════════════════════════════════════════════════╗
+║           ⚠️  ESCALATION REQUIRED                 ║
+╚════════════════════════════════════════════════════╝
+
+"""
+_ESCALATION_FOOTER = """
+════════════════════════════════════════════════════
+
+Allow action? [Y/n]: """
 
 
 class OrchB:
@@ -21,6 +70,8 @@ class OrchB:
     - Bridges dispatcher execution with human approval
     """
     
+    AUDIT_LOG = "logs/audit.log"
+    
     def __init__(self, audit_logger: AuditLogger, user_config: Dict[str, Any] = None):
         self.audit_logger = audit_logger
         self.user_config = user_config or {}
@@ -28,13 +79,24 @@ class OrchB:
         # Current user permission level (default: OBSERVE)
         self.permission_level = PermissionLevel.OBSERVE
         
-        # Track user decisions for learning
-        self.user_decisions = []
-        self.approved_actions = []
-        self.denied_actions = []
+        # Track user decisions for learning (bounded for long-running sessions)
+        history_limit = self.user_config.get("decision_history", 10000)
+        self.user_decisions = deque(maxlen=history_limit)
+        self.approved_actions = deque(maxlen=history_limit)
+        self.denied_actions = deque(maxlen=history_limit)
         
         # Escalation history
-        self.escalations = []
+        self.escalations = deque(maxlen=history_limit)
+        
+        # Lifetime totals (the histories above only keep the newest entries)
+        self._counters = {
+            "decisions": 0,
+            "approved": 0,
+            "denied": 0,
+            "escalations": 0,
+        }
+        # Escalations run on the orchestrator's worker threads
+        self._counters_lock = threading.Lock()
         
         # User preferences
         self.auto_approve_thresholds = self.user_config.get("auto_approve", {
@@ -45,6 +107,15 @@ class OrchB:
         
         self.logger_name = "OrchB"
         self.active = False
+        
+        # Background audit log writer (started on first write, closed on stop)
+        self._audit_writer = None
+    
+    def _write_audit(self, line: str):
+        """Queue one line for the audit log; file I/O happens off this thread."""
+        if self._audit_writer is None:
+            self._audit_writer = AuditWriter(self.AUDIT_LOG)
+        self._audit_writer.write(line)
     
     def start(self):
         """Activate OrchB."""
@@ -55,6 +126,9 @@ class OrchB:
     def stop(self):
         """Deactivate OrchB."""
         self.active = False
+        if self._audit_writer is not None:
+            self._audit_writer.close()
+            self._audit_writer = None
         print(f"   ✓ {self.logger_name} deactivated")
         return True
     
@@ -63,41 +137,14 @@ class OrchB:
         old_level = self.permission_level
         self.permission_level = level
         
-        # Simple audit logging (with UTF-8 encoding)
-        with open("logs/audit.log", "a", encoding="utf-8") as f:
-            f.write(f"[{datetime.now().isoformat()}] PERMISSION_CHANGE: {old_level.value} -> {level.value}\n")
+        self._write_audit(f"[{iso_now()}] PERMISSION_CHANGE: {old_level.value} -> {level.value}\n")
         
         print(f"   ✓ Permission level changed: {old_level.value} -> {level.value}")
     
     def check_permission(self, action: str, threat_level: ThreatLevel = None, widget: str = None) -> Tuple[bool, str]:
         """Check if user has permission to perform action."""
-        action_requirements = {
-            "observe": PermissionLevel.OBSERVE,
-            "alert": PermissionLevel.ALERT,
-            "analyze": PermissionLevel.ANALYZE,
-            "isolate": PermissionLevel.ISOLATE,
-            "quarantine": PermissionLevel.ISOLATE,
-            "process_kill": PermissionLevel.ISOLATE,
-            "network_block": PermissionLevel.ISOLATE,
-            "auto_respond": PermissionLevel.AUTO_RESPOND,
-        }
-        
-        required_level = action_requirements.get(action, PermissionLevel.OBSERVE)
-        
-        perm_order = [
-            PermissionLevel.OBSERVE,
-            PermissionLevel.ALERT,
-            PermissionLevel.ANALYZE,
-            PermissionLevel.ISOLATE,
-            PermissionLevel.AUTO_RESPOND
-        ]
-        
-        try:
-            user_index = perm_order.index(self.permission_level)
-            required_index = perm_order.index(required_level)
-            allowed = user_index >= required_index
-        except ValueError:
-            allowed = False
+        required_level = _ACTION_REQ.get(action, PermissionLevel.OBSERVE)
+        allowed = _PERM_RANK.get(self.permission_level, -1) >= _PERM_RANK[required_level]
         
         reason = f"User: {self.permission_level.value} | Required: {required_level.value}"
         return allowed, reason
@@ -121,30 +168,25 @@ class OrchB:
     def escalate_to_user(self, decision: Decision, threat_level: ThreatLevel, context: Dict) -> bool:
         """Escalate decision to user for approval."""
         escalation_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_now(),
             "threat_level": threat_level.value,
             "recommended_action": decision.action,
             "confidence": decision.confidence,
             "reasoning": decision.reasoning
         }
         self.escalations.append(escalation_entry)
+        with self._counters_lock:
+            self._counters["escalations"] += 1
         
-        prompt_text = f"""
-╔════════════════════════════════════════════════════╗
-║           ⚠️  ESCALATION REQUIRED                 ║
-╚════════════════════════════════════════════════════╝
-
-🔴 Threat Level: {threat_level.value.upper()}
-📊 Confidence: {decision.confidence*100:.1f}%
-💡 Recommended Action: {decision.action}
-📝 Reason: {decision.reasoning}
-
-Context:
-{self._format_context(context)}
-
-════════════════════════════════════════════════════
-
-Allow action? [Y/n]: """
+        prompt_text = (
+            f"{_ESCALATION_HEADER}"
+            f"🔴 Threat Level: {threat_level.value.upper()}\n"
+            f"📊 Confidence: {decision.confidence*100:.1f}%\n"
+            f"💡 Recommended Action: {decision.action}\n"
+            f"📝 Reason: {decision.reasoning}\n"
+            f"\nContext:\n{self._format_context(context)}\n"
+            f"{_ESCALATION_FOOTER}"
+        )
         
         user_input = input(prompt_text).lower().strip()
         approved = user_input in ['y', 'yes', '']
@@ -153,7 +195,7 @@ Allow action? [Y/n]: """
             "decision_id": decision.decision_id,
             "action": decision.action,
             "approved": approved,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
         
         if approved:
@@ -164,10 +206,11 @@ Allow action? [Y/n]: """
             print("   ❌ Action denied")
         
         self.user_decisions.append(decision_record)
+        with self._counters_lock:
+            self._counters["approved" if approved else "denied"] += 1
+            self._counters["decisions"] += 1
         
-        # Simple audit logging (with UTF-8 encoding)
-        with open("logs/audit.log", "a", encoding="utf-8") as f:
-            f.write(f"[{datetime.now().isoformat()}] USER_APPROVAL: {decision.action} - {approved}\n")
+        self._write_audit(f"[{iso_now()}] USER_APPROVAL: {decision.action} - {approved}\n")
         
         return approved
     
@@ -196,9 +239,7 @@ Choice [1-4]: """
         feedback = feedback_map.get(choice)
         
         if feedback:
-            # Simple audit logging (with UTF-8 encoding)
-            with open("logs/audit.log", "a", encoding="utf-8") as f:
-                f.write(f"[{datetime.now().isoformat()}] USER_FEEDBACK: {event_id} - {feedback}\n")
+            self._write_audit(f"[{iso_now()}] USER_FEEDBACK: {event_id} - {feedback}\n")
             print(f"   ✓ Feedback recorded: {feedback}")
         
         return feedback
@@ -220,40 +261,39 @@ Choice [1-4]: """
     
     def _format_context(self, context: Dict) -> str:
         """Format context dict for readable display."""
-        lines = []
-        for key, value in context.items():
-            if isinstance(value, dict):
-                lines.append(f"  {key}:")
-                for k, v in value.items():
-                    lines.append(f"    - {k}: {v}")
-            else:
-                lines.append(f"  {key}: {value}")
-        return "\n".join(lines)
+        return "\n".join(
+            _format_context_entry(value, key)
+            for key, value in context.items()
+        )
     
     def get_stats(self) -> Dict[str, Any]:
         """Return OrchB statistics."""
+        with self._counters_lock:
+            counters = dict(self._counters)
         return {
             "agent_name": self.logger_name,
             "active": self.active,
             "current_permission_level": self.permission_level.value,
-            "approved_actions": len(self.approved_actions),
-            "denied_actions": len(self.denied_actions),
-            "escalations_handled": len(self.escalations),
-            "total_user_decisions": len(self.user_decisions),
-            "recent_decisions": [d for d in self.user_decisions[-5:]] if self.user_decisions else []
+            "approved_actions": counters["approved"],
+            "denied_actions": counters["denied"],
+            "escalations_handled": counters["escalations"],
+            "total_user_decisions": counters["decisions"],
+            "recent_decisions": deque_tail(self.user_decisions, 5)
         }
     
     def get_approval_stats(self) -> Dict[str, Any]:
         """Get approval/denial statistics."""
-        total = len(self.user_decisions)
+        with self._counters_lock:
+            counters = dict(self._counters)
+        total = counters["decisions"]
         if total == 0:
             return {"total": 0, "approval_rate": "N/A"}
         
-        approval_rate = (len(self.approved_actions) / total) * 100
+        approval_rate = (counters["approved"] / total) * 100
         
         return {
             "total_decisions": total,
-            "approved": len(self.approved_actions),
-            "denied": len(self.denied_actions),
+            "approved": counters["approved"],
+            "denied": counters["denied"],
             "approval_rate": f"{approval_rate:.1f}%"
         }
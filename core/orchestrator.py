@@ -4,16 +4,32 @@ Master Orchestrator: Coordinates Widgets, OrchA, OrchB, and Dispatcher.
 The central nervous system of Archie Guardian v1.0+
 """
 
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+import os
 import threading
 import time
 
-from .agent_utils import AuditLogger, Event, PermissionLevel, ThreatLevel, EventQueue
+from .agent_utils import AuditLogger, Event, PermissionLevel, ThreatLevel, EventQueue, deque_tail, iso_now, THREAT_LEVEL_BY_VALUE
 from .orch_a import OrchA
 from .orch_b import OrchB
 
 
+# Per-event progress output (ARCHIE_VERBOSE=0 silences it under high event rates)
+_VERBOSE_DEFAULT = os.environ.get("ARCHIE_VERBOSE", "1") != "0"
+
+# (decision action, event source) -> widget action; anything else is "log_only".
+# The "all" entries only match a source literally named "all", as they always have.
+_ACTION_MAP: Dict[Tuple[str, str], str] = {
+    ("quarantine", "file_integrity"): "quarantine",
+    ("quarantine", "process_monitor"): "kill_process",
+    ("quarantine", "network_sniffer"): "block_ip",
+    ("alert", "all"): "log_alert",
+    ("escalate", "all"): "escalate_to_security",
+}
+
+
 class MasterOrchestrator:
     """
     Central orchestrator that:
@@ -24,25 +40,49 @@ class MasterOrchestrator:
     5. Tracks feedback for learning
     """
     
-    def __init__(self, audit_logger: AuditLogger, dispatcher=None, config: Dict[str, Any] = None):
+    def __init__(self, audit_logger: AuditLogger, dispatcher=None, config: Dict[str, Any] = None,
+                 connector=None, connector_factory=None):
         self.audit_logger = audit_logger
         self.dispatcher = dispatcher  # Widget action executor
         self.config = config or {}
         
-        # Initialize sub-orchestrators
-        self.orcha = OrchA(audit_logger, config.get("orcha_config", {}))
+        # Initialize sub-orchestrators; OrchA refines batch analyses through
+        # the (optional) OllamaConnector while it is connected
+        self.orcha = OrchA(audit_logger, config.get("orcha_config", {}), connector=connector,
+                           connector_factory=connector_factory)
         self.orchb = OrchB(audit_logger, config.get("orchb_config", {}))
         
-        # Event management
+        # Event management; processed-event history is kept column-wise
+        # (one bounded deque per field) rather than as a dict per event
         self.event_queue = EventQueue()
-        self.processed_events = []
-        self.decisions_made = []
+        history_limit = self.config.get("decision_history", 10000)
+        self._proc = {
+            "event_ids": deque(maxlen=history_limit),
+            "statuses": deque(maxlen=history_limit),
+            "decisions": deque(maxlen=history_limit),
+            "feedbacks": deque(maxlen=history_limit),
+        }
+        self._proc_lock = threading.Lock()  # Keeps the columns aligned across workers
+        # Lifetime totals (the history columns above stop growing at history_limit)
+        self._counters = {"processed": 0, "decisions": 0}
+        self.decisions_made = deque(maxlen=history_limit)
+        self._noise_count = 0  # Events dropped by OrchA.is_noise before queueing
+        # Lifetime ingested count and events queued or being handled
+        self._ingested = 0
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+        # Observe-only sources: queued and audited, but never analyzed
+        self._ignored_sources = frozenset(self.config.get("ignored_sources", ()))
         
         # Thread management (for event processing)
         self.active = False
-        self.processing_thread = None
-        self.lock = threading.Lock()
+        self.processing_thread = None  # Batch dispatcher
+        self._executor = None  # Event-handling workers, reused across batches
+        self._workers = max(1, int(self.config.get("workers", 2)))
+        # Escalation and feedback prompts read stdin; one at a time
+        self._prompt_lock = threading.Lock()
         
+        self.verbose = self.config.get("verbose", _VERBOSE_DEFAULT)
         self.logger_name = "MasterOrch"
     
     def start(self):
@@ -54,15 +94,16 @@ class MasterOrchestrator:
         self.orcha.start()
         self.orchb.start()
         
-        # Start event processing thread
+        # Start event-handling pool and the dispatcher thread feeding it
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix=self.logger_name)
         self.processing_thread = threading.Thread(target=self._process_events_loop, daemon=True)
         self.processing_thread.start()
         
         print(f"   ✓ {self.logger_name} activated")
-        self.audit_logger.log_decision(
+        self.audit_logger.log_activity(
             agent=self.logger_name,
-            decision="orchestrator_start",
-            details={"timestamp": datetime.now().isoformat()}
+            activity="orchestrator_start",
+            details={"timestamp_ns": time.time_ns()}
         )
     
     def stop(self):
@@ -77,82 +118,145 @@ class MasterOrchestrator:
         # Wait for processing thread
         if self.processing_thread:
             self.processing_thread.join(timeout=5)
+        if self._executor:
+            # Don't wait: a worker may be blocked in an OrchB input() prompt.
+            # Queued events are dropped; a running one finishes on its own
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
         
         print(f"   ✓ {self.logger_name} deactivated")
-        self.audit_logger.log_decision(
+        self.audit_logger.log_activity(
             agent=self.logger_name,
-            decision="orchestrator_stop",
-            details={"timestamp": datetime.now().isoformat()}
+            activity="orchestrator_stop",
+            details={"timestamp_ns": time.time_ns()}
         )
     
     def ingest_widget_event(self, event: Event):
         """
         Accept event from widget (file_integrity, process_monitor, etc).
         """
-        with self.lock:
-            self.event_queue.push(event)
-            
-            self.audit_logger.log_decision(
-                agent=self.logger_name,
-                decision="ingest_event",
-                details={
-                    "event_id": event.event_id,
-                    "source": event.source,
-                    "event_type": event.event_type,
-                    "timestamp": datetime.now().isoformat()
-                }
-            )
+        if self.orcha.is_noise(event):
+            with self._inflight_lock:
+                self._noise_count += 1
+            return
+        
+        # EventQueue and AuditLogger synchronize internally; no outer lock
+        with self._inflight_lock:
+            self._ingested += 1
+            self._inflight += 1
+        self.event_queue.push(event)
+        
+        self.audit_logger.log_activity(
+            agent=self.logger_name,
+            activity="ingest_event",
+            details={
+                "event_id": event.event_id,
+                "source": event.source,
+                "event_type": event.event_type,
+                "timestamp_ns": event.timestamp_ns
+            }
+        )
     
     def _process_events_loop(self):
         """
         Main event processing loop (runs in background thread).
-        Continuously processes unprocessed events.
+        Continuously processes unprocessed events, a batch at a time.
         """
         while self.active:
+            drained = 0
             try:
-                # Get next unprocessed event
-                event = self.event_queue.pop()
-                if event:
-                    self._handle_event(event)
-                else:
-                    time.sleep(0.1)  # Avoid busy-waiting
+                batch = self._drain_batch()
+                drained = len(batch)
+                if self._ignored_sources:
+                    batch = [event for event in batch if not self._skip_ignored(event)]
+                if not batch:
+                    continue
+                
+                # One OrchA pass for the whole batch, then per-event handling
+                # on the pool; the batch completes before the next is drained
+                analyses = self.orcha.analyze_batch(batch)
+                futures = [
+                    self._executor.submit(self._handle_event, event, analysis)
+                    for event, analysis in zip(batch, analyses)
+                ]
+                wait(futures)
+                for future in futures:
+                    if future.exception() is not None:
+                        self._log_processing_error(future.exception())
+                
+                self.audit_logger.flush()
             except Exception as e:
-                self.audit_logger.log_alert(
-                    alert_id=f"orch_error_{int(time.time())}",
-                    level=ThreatLevel.LOW,
-                    message=f"Error in event processing: {e}",
-                    context={}
-                )
+                self._log_processing_error(e)
                 time.sleep(1)
+            finally:
+                self._release_inflight(drained)
+    
+    def _drain_batch(self, max_items: int = 64, max_wait_ms: int = 20) -> List[Event]:
+        """
+        Collect events until max_items are gathered or max_wait_ms has passed
+        since the first one arrived. Empty if nothing arrives within a second.
+        """
+        # Block until an event arrives (woken by push); the timeout
+        # only bounds how long stop() waits for this thread
+        event = self.event_queue.pop(timeout=1.0)
+        if event is None:
+            return []
+        
+        batch = [event]
+        deadline = time.monotonic() + max_wait_ms / 1000
+        while len(batch) < max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            event = self.event_queue.pop(timeout=remaining)
+            if event is None:
+                break
+            batch.append(event)
+        return batch
+    
+    def _release_inflight(self, count: int):
+        if count:
+            with self._inflight_lock:
+                self._inflight -= count
+    
+    def _log_processing_error(self, error: Exception):
+        self.audit_logger.log_alert(
+            alert_id=f"orch_error_{int(time.time())}",
+            level=ThreatLevel.LOW,
+            message=f"Error in event processing: {error}",
+            context={}
+        )
     
-    def _handle_event(self, event: Event):
+    def _handle_event(self, event: Event, analysis: Optional[Dict[str, Any]] = None):
         """
         Handle single event through full pipeline:
         Widget Event → OrchA Analysis → OrchB Escalation → Dispatcher Execution
+        analysis may be passed in when the event was analyzed as part of a batch.
         """
+        if self._skip_ignored(event):
+            return
         
-        print(f"\n🔄 Processing event: {event.event_id} from {event.source}")
+        if self.verbose:
+            print(f"\n🔄 Processing event: {event.event_id} from {event.source}")
         
         # Step 1: OrchA analyzes threat
-        analysis = self.orcha.analyze_event(event)
-        threat_level = ThreatLevel[analysis["threat_level"].upper()]
+        if analysis is None:
+            analysis = self.orcha.analyze_event(event)
+        threat_level = THREAT_LEVEL_BY_VALUE[analysis["threat_level"]]
         
-        print(f"   📊 OrchA analysis: {threat_level.value} threat ({analysis['confidence_score']}%)")
+        if self.verbose:
+            print(f"   📊 OrchA analysis: {threat_level.value} threat ({analysis['confidence_score']}%)")
         
         # Step 2: OrchA generates decision
-        orcha_decisions = self.orcha.process_events()
-        if not orcha_decisions:
+        decision = self.orcha.decide(event, analysis)
+        if decision is None:
             # No threat detected, log and continue
             event.processed = True
-            self.processed_events.append({
-                "event_id": event.event_id,
-                "status": "no_threat",
-                "analysis": analysis
-            })
+            self._record_processed(event.event_id, "no_threat")
             return
         
-        decision = orcha_decisions[0]  # Get first decision
-        print(f"   💡 Recommendation: {decision.action}")
+        if self.verbose:
+            print(f"   💡 Recommendation: {decision.action}")
         
         # Step 3: Check if needs human escalation
         needs_escalation = self.orchb.evaluate_escalation(decision, threat_level)
@@ -160,44 +264,60 @@ class MasterOrchestrator:
         if needs_escalation:
             # Step 4: Escalate to user for approval
             print(f"   ⚠️  Escalating to user...")
-            approved = self.orchb.escalate_to_user(decision, threat_level, analysis)
+            with self._prompt_lock:
+                approved = self.orchb.escalate_to_user(decision, threat_level, analysis)
             
             if not approved:
                 # User denied action
                 event.processed = True
-                self.processed_events.append({
-                    "event_id": event.event_id,
-                    "status": "user_denied",
-                    "decision": decision.to_dict()
-                })
+                self._record_processed(event.event_id, "user_denied", decision.to_dict())
                 return
-        else:
+        elif self.verbose:
             print(f"   ✅ Auto-approved (permission level: {self.orchb.permission_level.value})")
         
         # Step 5: Execute action via dispatcher
         if self.dispatcher:
             action_result = self._execute_action(decision, event, analysis)
             
-            if action_result["status"] == "success":
+            if action_result["status"] == "success" and self.verbose:
                 print(f"   ✅ Action executed: {decision.action}")
-        else:
+        elif self.verbose:
             print(f"   ⚠️  No dispatcher available (action would be: {decision.action})")
         
         # Step 6: Request user feedback (for learning)
-        feedback = self.orchb.get_user_feedback(event.event_id, analysis["confidence_score"])
+        with self._prompt_lock:
+            feedback = self.orchb.get_user_feedback(event.event_id, analysis["confidence_score"])
         if feedback:
             self.orcha.learn_from_feedback(event.event_id, feedback)
         
         # Mark event as processed
         event.processed = True
-        self.processed_events.append({
-            "event_id": event.event_id,
-            "status": "completed",
-            "decision": decision.to_dict(),
-            "feedback": feedback
-        })
+        self._record_processed(event.event_id, "completed", decision.to_dict(), feedback)
         
-        self.decisions_made.append(decision)
+        with self._proc_lock:
+            self.decisions_made.append(decision)
+            self._counters["decisions"] += 1
+    
+    def _record_processed(self, event_id: str, status: str, decision: Optional[Dict] = None, feedback=None):
+        """Append one processed event to the history columns."""
+        proc = self._proc
+        with self._proc_lock:
+            proc["event_ids"].append(event_id)
+            proc["statuses"].append(status)
+            proc["decisions"].append(decision)
+            proc["feedbacks"].append(feedback)
+            self._counters["processed"] += 1
+    
+    def _skip_ignored(self, event: Event) -> bool:
+        """Mark events from observe-only sources processed; True if skipped."""
+        if event.source in self._ignored_sources:
+            event.processed = True
+            return True
+        return False
+    
+    def set_ignored_sources(self, sources):
+        """Replace the set of observe-only sources (bypass OrchA analysis)."""
+        self._ignored_sources = frozenset(sources)
     
     def _execute_action(self, decision, event: Event, analysis: Dict) -> Dict[str, Any]:
         """
@@ -205,21 +325,7 @@ class MasterOrchestrator:
         Maps OrchA decisions to widget actions.
         """
         
-        action_map = {
-            "quarantine": {
-                "file_integrity": "quarantine",
-                "process_monitor": "kill_process",
-                "network_sniffer": "block_ip"
-            },
-            "alert": {
-                "all": "log_alert"
-            },
-            "escalate": {
-                "all": "escalate_to_security"
-            }
-        }
-        
-        widget_action = action_map.get(decision.action, {}).get(event.source, "log_only")
+        widget_action = _ACTION_MAP.get((decision.action, event.source), "log_only")
         
         try:
             # Call dispatcher action
@@ -246,25 +352,25 @@ class MasterOrchestrator:
         """Get comprehensive orchestrator statistics."""
         return {
             "master_status": "active" if self.active else "inactive",
-            "events_ingested": len(self.event_queue.queue),
-            "events_processed": len(self.processed_events),
-            "decisions_made": len(self.decisions_made),
+            "events_ingested": self._ingested,
+            "events_in_flight": self._inflight,
+            "events_processed": self._counters["processed"],
+            "decisions_made": self._counters["decisions"],
+            "events_filtered_as_noise": self._noise_count,
             "orcha_stats": self.orcha.get_stats(),
             "orchb_stats": self.orchb.get_stats(),
             "orchb_approvals": self.orchb.get_approval_stats(),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
     
     def get_recent_decisions(self, limit: int = 10) -> List[Dict]:
         """Get recent orchestrator decisions."""
+        proc = self._proc
+        with self._proc_lock:
+            columns = [deque_tail(proc[key], limit) for key in ("event_ids", "statuses", "decisions", "feedbacks")]
         return [
-            {
-                "event_id": d["event_id"],
-                "status": d["status"],
-                "decision": d.get("decision"),
-                "feedback": d.get("feedback")
-            }
-            for d in self.processed_events[-limit:]
+            {"event_id": event_id, "status": status, "decision": decision, "feedback": feedback}
+            for event_id, status, decision, feedback in zip(*columns)
         ]
     
     def set_user_permission(self, level: PermissionLevel):
@@ -8,14 +8,16 @@ Integrates: Widgets + OrchA (AI) + OrchB (Human) + Dispatcher + Master Orchestra
 import sys
 import json
 import os
+import importlib
+import re
+import threading
+import time
 from datetime import datetime
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import widgets dynamically
-AVAILABLE_WIDGETS = {}
-
+# Widget name -> (module, class); modules are imported on first enable
 widget_imports = {
     "file_integrity": ("widgets.file_integrity", "FileIntegrityWidget"),
     "process_monitor": ("widgets.process_monitor", "ProcessMonitorWidget"),
@@ -25,20 +27,63 @@ widget_imports = {
     "ollama_chat": ("widgets.ollama_chat", "OllamaChatWidget"),  # NEW: Ollama as widget
 }
 
-# Try to import each widget
-for widget_name, (module_path, class_name) in widget_imports.items():
-    try:
-        module = __import__(module_path, fromlist=[class_name])
-        widget_class = getattr(module, class_name)
-        AVAILABLE_WIDGETS[widget_name] = widget_class
-        print(f"   ✅ {widget_name} loaded")
-    except (ImportError, AttributeError) as e:
-        print(f"   ⚠️  {widget_name} not available: {e}")
+AVAILABLE_WIDGETS = dict(widget_imports)
+
+
+# Optional widget methods resolved once per instance instead of hasattr per call
+_WIDGET_METHODS = (
+    "start", "stop", "get_stats", "get_status", "get_recent_events", "get_actions",
+)
+
+
+class _LazyWidgets(dict):
+    """
+    Widget name -> instance, imported and constructed on first access.
+    Membership covers every registered widget, so unused widgets (and their
+    watchdog/psutil/scapy imports) cost nothing at startup.
+    """
+    
+    def __init__(self, specs):
+        super().__init__()
+        self._specs = specs
+        self._failed = set()
+        # Widget name -> {method name: bound method or None}, filled on load
+        self.caps = {}
+    
+    def __setitem__(self, widget_name, widget):
+        super().__setitem__(widget_name, widget)
+        self.caps[widget_name] = {
+            method: getattr(widget, method, None) for method in _WIDGET_METHODS
+        }
+    
+    def __contains__(self, widget_name):
+        return widget_name in self._specs and widget_name not in self._failed
+    
+    def __missing__(self, widget_name):
+        if widget_name not in self:
+            raise KeyError(widget_name)
+        module_path, class_name = self._specs[widget_name]
+        try:
+            widget = getattr(importlib.import_module(module_path), class_name)()
+        except Exception as e:
+            self._failed.add(widget_name)
+            print(f"   ⚠️  {widget_name} not available: {e}")
+            raise KeyError(widget_name) from e
+        self[widget_name] = widget
+        return widget
+    
+    def get(self, widget_name, default=None):
+        try:
+            return self[widget_name]
+        except KeyError:
+            return default
+
+from core.agent_utils import tail_lines
 
 # Import orchestrator components
 ORCHESTRATOR_AVAILABLE = False
 try:
-    from core.agent_utils import AuditLogger, PermissionLevel, ThreatLevel
+    from core.agent_utils import AuditLogger, AuditWriter, PermissionLevel, ThreatLevel
     from core.orch_a import OrchA
     from core.orch_b import OrchB
     from core.orchestrator import MasterOrchestrator
@@ -49,6 +94,7 @@ except ImportError as e:
     class AuditLogger:
         def __init__(self, log_file):
             self.log_file = log_file
+    AuditWriter = None
     ORCHESTRATOR_AVAILABLE = False
 
 print("=" * 60)
@@ -60,23 +106,88 @@ print()
 os.makedirs("logs", exist_ok=True)
 audit_logger = AuditLogger("logs/audit.log")
 
+# log_event lines are queued and appended by a background writer thread
+audit_writer = AuditWriter("logs/audit.log") if AuditWriter else None
+
 # Widget state dictionary
 widget_state = {}
-widgets_instances = {}
+widgets_instances = _LazyWidgets(AVAILABLE_WIDGETS)
+widget_caps = widgets_instances.caps
 
 # Initialize all available widgets as disabled
 for widget_name in AVAILABLE_WIDGETS:
     widget_state[widget_name] = False
 
+# Registered widget names in display order; the set is fixed after startup
+_WIDGET_NAMES_SORTED = tuple(sorted(widget_state))
+# Names padded to the status column width once, not per render
+_WIDGET_LABELS = {name: f"{name:<20}" for name in _WIDGET_NAMES_SORTED}
+
+# Names of enabled widgets, kept in step with widget_state
+_ENABLED = set()
+# Bumped on every enable/disable so UI-side caches can tell state moved on
+widget_generation = 0
+# Serializes widget start/stop and state changes between the interactive CLI,
+# the control channel threads and the in-process API bridge
+widget_lock = threading.RLock()
+
+
+def set_widget_enabled(widget_name, enabled):
+    """Record a widget's enabled flag in widget_state and the enabled set."""
+    global widget_generation
+    widget_state[widget_name] = enabled
+    widget_generation += 1
+    _stats_cache.pop(widget_name, None)
+    if enabled:
+        _ENABLED.add(widget_name)
+    else:
+        _ENABLED.discard(widget_name)
+
+
+# Widget name -> {call key: (monotonic time, result)}; coalesces rapid
+# status/events/export calls into one widget read per STATS_TTL
+_stats_cache = {}
+STATS_TTL = 1.0
+
+
+def _cached_widget_call(widget_name, key, call, *args):
+    now = time.monotonic()
+    entries = _stats_cache.setdefault(widget_name, {})
+    cached = entries.get(key)
+    if cached is not None and now - cached[0] < STATS_TTL:
+        return cached[1]
+    result = call(*args)
+    entries[key] = (now, result)
+    return result
+
+
+def cached_widget_stats(widget_name, widget):
+    """Return widget.get_stats(), reusing a result younger than STATS_TTL seconds."""
+    return _cached_widget_call(widget_name, "stats", widget.get_stats)
+
+
+def cached_widget_events(widget_name, widget, limit=20):
+    """Return widget.get_recent_events(limit), reusing a result younger than STATS_TTL seconds."""
+    return _cached_widget_call(widget_name, ("events", limit), widget.get_recent_events, limit)
+
 # Master orchestrator instance (if available)
 master_orch = None
 
+def _ollama_connector():
+    """Local LLM for OrchA's batch analysis, built on its first batch."""
+    from core.ollama_connector import OllamaConnector
+    return OllamaConnector()
+
 def log_event(event_type, details):
     """Log event to audit log."""
+    line = f"[{datetime.now().isoformat()}] {event_type}: {details}\n"
+    if audit_writer is not None:
+        audit_writer.write(line)
+        return
     try:
         with open("logs/audit.log", "a") as f:
-            f.write(f"[{datetime.now().isoformat()}] {event_type}: {details}\n")
-    except:
+            f.write(line)
+    except OSError:
         pass
 
 def export_state():
@@ -91,7 +202,7 @@ def export_state():
         # Export each widget's state
         for widget_name in widget_state.keys():
             is_enabled = widget_state.get(widget_name, False)
-            widget_instance = widgets_instances.get(widget_name)
+            widget_instance = widgets_instances.get(widget_name) if is_enabled else None
             
             widget_info = {
                 'enabled': is_enabled,
@@ -101,18 +212,18 @@ def export_state():
             
             # Add additional stats if widget is active
             if is_enabled and widget_instance:
-                if hasattr(widget_instance, 'get_stats'):
+                if widget_caps[widget_name]['get_stats']:
                     try:
-                        stats = widget_instance.get_stats()
+                        stats = cached_widget_stats(widget_name, widget_instance)
                         widget_info.update(stats)
-                    except:
+                    except Exception:
                         pass
                 
-                if hasattr(widget_instance, 'get_status'):
+                if widget_caps[widget_name]['get_status']:
                     try:
                         status = widget_instance.get_status()
                         widget_info.update(status)
-                    except:
+                    except Exception:
                         pass
             
             state_data['widgets'][widget_name] = widget_info
@@ -128,67 +239,64 @@ def export_state():
 
 def enable_widget_cli(widget_name):
     """Enable widget from CLI command"""
-    if widget_name not in widgets_instances:
-        print(f"❌ Widget '{widget_name}' not found")
-        return False
-    
-    if widget_state.get(widget_name, False):
-        print(f"⚠️  Widget '{widget_name}' already enabled")
-        export_state()
-        return True
-    
-    widget = widgets_instances[widget_name]
-    if hasattr(widget, 'start') and widget.start():
-        widget_state[widget_name] = True
-        log_event("WIDGET_ENABLED", widget_name)
-        print(f"✅ {widget_name} enabled")
-        export_state()
-        return True
-    else:
-        print(f"❌ Failed to enable {widget_name}")
-        return False
+    with widget_lock:
+        if widget_name not in widgets_instances:
+            print(f"❌ Widget '{widget_name}' not found")
+            return False
+        
+        if widget_state.get(widget_name, False):
+            print(f"⚠️  Widget '{widget_name}' already enabled")
+            export_state()
+            return True
+        
+        widget = widgets_instances.get(widget_name)
+        if widget is not None and widget_caps[widget_name]['start'] and widget.start():
+            set_widget_enabled(widget_name, True)
+            log_event("WIDGET_ENABLED", widget_name)
+            print(f"✅ {widget_name} enabled")
+            export_state()
+            return True
+        else:
+            print(f"❌ Failed to enable {widget_name}")
+            return False
 
 def disable_widget_cli(widget_name):
     """Disable widget from CLI command"""
-    if widget_name not in widgets_instances:
-        print(f"❌ Widget '{widget_name}' not found")
-        return False
-    
-    if not widget_state.get(widget_name, False):
-        print(f"⚠️  Widget '{widget_name}' already disabled")
+    with widget_lock:
+        if widget_name not in widgets_instances:
+            print(f"❌ Widget '{widget_name}' not found")
+            return False
+        
+        if not widget_state.get(widget_name, False):
+            print(f"⚠️  Widget '{widget_name}' already disabled")
+            export_state()
+            return True
+        
+        widget = widgets_instances[widget_name]
+        if widget_caps[widget_name]['stop']:
+            widget.stop()
+        
+        set_widget_enabled(widget_name, False)
+        log_event("WIDGET_DISABLED", widget_name)
+        print(f"✅ {widget_name} disabled")
         export_state()
         return True
-    
-    widget = widgets_instances[widget_name]
-    if hasattr(widget, 'stop'):
-        widget.stop()
-    
-    widget_state[widget_name] = False
-    log_event("WIDGET_DISABLED", widget_name)
-    print(f"✅ {widget_name} disabled")
-    export_state()
-    return True
 
 # Startup sequence
 try:
     print("[1/7] Checking core modules...")
     print("   ✅ Core imports successful")
-    
+        
     print("[2/7] Checking widget system...")
-    print(f"   ✅ Widget system ready ({len(AVAILABLE_WIDGETS)}/{len(widget_imports)} widgets available)")
-    
+    print(f"   ✅ Widget system ready ({len(AVAILABLE_WIDGETS)} widgets registered)")
+        
     print("[3/7] Initializing audit logger...")
     log_event("STARTUP", "Guardian v1.0 initialized with Ollama integration")
     print("   ✅ Audit logger initialized (logs/audit.log)")
 
     print("[4/7] Initializing widget instances...")
-    for widget_name, widget_class in AVAILABLE_WIDGETS.items():
-        try:
-            widgets_instances[widget_name] = widget_class()
-            print(f"   ✅ {widget_name} ready")
-        except Exception as e:
-            print(f"   ❌ Failed to init {widget_name}: {e}")
-    
+    print("   ✅ Widgets load on first enable")
+        
     print("[5/7] Initializing orchestrator system...")
     if ORCHESTRATOR_AVAILABLE:
         master_orch = MasterOrchestrator(
@@ -197,21 +305,22 @@ try:
             config={
                 "orcha_config": {},
                 "orchb_config": {}
-            }
+            },
+            connector_factory=_ollama_connector
         )
         print("   ✅ Master Orchestrator ready (OrchA + OrchB)")
     else:
         print("   ⚠️  Orchestrator not available (CLI-only mode)")
-    
+        
     print("[6/7] Verifying state management...")
     print("   ✅ State tracking initialized")
-    
+        
     print("[7/7] CLI interface ready...")
     print("   ✅ All systems operational\n")
-    
+        
     # Export initial state for UI
     export_state()
-    
+        
 except Exception as e:
     print(f"❌ Error: {e}")
     import traceback
@@ -222,27 +331,32 @@ except Exception as e:
 # CLI FUNCTIONS (v1.0 - With Ollama Chat)
 # ============================================================================
 
+# Rendered once; main_menu() writes it in a single call
+_MAIN_MENU = (
+    "╔════════════════════════════════════════════════════╗\n"
+    "║     ARCHIE GUARDIAN v1.0 - MAIN MENU              ║\n"
+    "║  Widget Manager + Multi-Agent Orchestration       ║\n"
+    "║  + Local AI Chat (Ollama)                         ║\n"
+    "╚════════════════════════════════════════════════════╝\n"
+    "\n"
+    "Commands:\n"
+    "  1. status      - Show Guardian status\n"
+    "  2. enable      - Enable widget(s) [numbered]\n"
+    "  3. disable     - Disable widget(s) [numbered]\n"
+    "  4. action      - Execute widget action [numbered]\n"
+    "  5. events      - Show live widget events\n"
+    "  6. logs        - View audit logs\n"
+    "  7. orch_stats  - Show orchestrator statistics\n"
+    "  8. set_perms   - Set user permission level\n"
+    "  9. help        - Show help\n"
+    "  10. chat       - Interactive Ollama chat (NEW!)\n"
+    "  0. quit        - Exit Guardian\n"
+    "\n"
+)
+
 def main_menu():
     """Display main menu."""
-    print("╔════════════════════════════════════════════════════╗")
-    print("║     ARCHIE GUARDIAN v1.0 - MAIN MENU              ║")
-    print("║  Widget Manager + Multi-Agent Orchestration       ║")
-    print("║  + Local AI Chat (Ollama)                         ║")
-    print("╚════════════════════════════════════════════════════╝")
-    print()
-    print("Commands:")
-    print("  1. status      - Show Guardian status")
-    print("  2. enable      - Enable widget(s) [numbered]")
-    print("  3. disable     - Disable widget(s) [numbered]")
-    print("  4. action      - Execute widget action [numbered]")
-    print("  5. events      - Show live widget events")
-    print("  6. logs        - View audit logs")
-    print("  7. orch_stats  - Show orchestrator statistics")
-    print("  8. set_perms   - Set user permission level")
-    print("  9. help        - Show help")
-    print("  10. chat       - Interactive Ollama chat (NEW!)")
-    print("  0. quit        - Exit Guardian")
-    print()
+    sys.stdout.write(_MAIN_MENU)
 
 def show_status():
     """Show status with real widget state."""
@@ -254,42 +368,43 @@ def show_status():
     print()
     print("Widgets:")
     
-    for widget_name in sorted(widget_state.keys()):
-        enabled = widget_state[widget_name]
+    for widget_name in _WIDGET_NAMES_SORTED:
+        label = _WIDGET_LABELS[widget_name]
+        enabled = widget_name in _ENABLED
         status_icon = "🟢" if enabled else "⭕"
         
-        if widget_name in widgets_instances and enabled:
+        if enabled:
             widget = widgets_instances[widget_name]
             
             # Special handling for ollama_chat
             if widget_name == "ollama_chat":
-                if hasattr(widget, 'get_status'):
+                if widget_caps[widget_name]['get_status']:
                     try:
                         stats = widget.get_status()
                         model = stats.get("model", "unknown")
-                        print(f"  {status_icon} {widget_name:<20} - LIVE ({model})")
-                    except:
-                        print(f"  {status_icon} {widget_name:<20} - LIVE")
+                        print(f"  {status_icon} {label} - LIVE ({model})")
+                    except Exception:
+                        print(f"  {status_icon} {label} - LIVE")
                 else:
-                    print(f"  {status_icon} {widget_name:<20} - LIVE")
+                    print(f"  {status_icon} {label} - LIVE")
             else:
-                if hasattr(widget, 'get_stats'):
+                if widget_caps[widget_name]['get_stats']:
                     try:
-                        stats = widget.get_stats()
+                        stats = cached_widget_stats(widget_name, widget)
                         events = stats.get("events_buffered", 0)
-                        print(f"  {status_icon} {widget_name:<20} - LIVE ({events} events)")
+                        print(f"  {status_icon} {label} - LIVE ({events} events)")
                     except Exception as e:
-                        print(f"  {status_icon} {widget_name:<20} - LIVE (error: {e})")
+                        print(f"  {status_icon} {label} - LIVE (error: {e})")
                 else:
-                    print(f"  {status_icon} {widget_name:<20} - LIVE")
+                    print(f"  {status_icon} {label} - LIVE")
         else:
-            print(f"  {status_icon} {widget_name:<20} - Idle")
+            print(f"  {status_icon} {label} - Idle")
     
     print()
     if master_orch and master_orch.active:
         orch_stats = master_orch.get_orchestrator_stats()
         print(f"Orchestrator: ✅ ACTIVE")
-        print(f"  Events queued: {orch_stats['events_ingested']}")
+        print(f"  Events queued: {orch_stats['events_in_flight']}")
         print(f"  Decisions made: {orch_stats['decisions_made']}")
     else:
         print("Orchestrator: ⭕ Standby (CLI-only mode)")
@@ -298,6 +413,33 @@ def show_status():
     print("Audit Log: logs/audit.log")
     print("=" * 50 + "\n")
 
+# One pass over a menu selection: "3", "1,2,5", "1-3", or mixed "1-2, 5"
+_SELECTION_TOKEN = re.compile(r"(\d+)\s*-\s*(\d+)|(\d+)")
+_SELECTION_VALID = re.compile(r"[\d,\-\s]+")
+_PASTE_MARKERS = re.compile(r"\x1b\[20[01]~")
+
+def parse_selection(selection, options):
+    """
+    Map a numbered menu selection onto options (1-based), in order, without
+    duplicates. Raises ValueError on anything but numbers, commas and ranges.
+    Bracketed-paste markers around pasted input are ignored.
+    """
+    selection = _PASTE_MARKERS.sub("", selection)
+    if not _SELECTION_VALID.fullmatch(selection):
+        raise ValueError(selection)
+    
+    count = len(options)
+    picked = {}
+    for start, end, single in _SELECTION_TOKEN.findall(selection):
+        if single:
+            first = last = int(single)
+        else:
+            first, last = int(start), int(end)
+        # Clamp before expanding so "1-99999" costs at most len(options)
+        for i in range(max(first, 1) - 1, min(last, count)):
+            picked.setdefault(options[i], None)
+    return list(picked)
+
 def enable_widget_menu():
     """Interactive widget selection (numbered)"""
     print("\n🔋 ENABLE WIDGETS")
@@ -308,30 +450,14 @@ def enable_widget_menu():
     # Show options
     print("Available widgets:")
     for i, widget in enumerate(available_widgets, 1):
-        status = "✅ ENABLED" if widget_state[widget] else "⭕ Disabled"
+        status = "✅ ENABLED" if widget in _ENABLED else "⭕ Disabled"
         print(f"  {i}. {widget:<20} [{status}]")
     
     # Get selection
     selection = input("\nSelect widget(s) (e.g. 1,2,3 or 1-3 or just 1): ").strip()
     
-    widgets_to_enable = []
-    
     try:
-        if "-" in selection:
-            start, end = selection.split("-")
-            start, end = int(start.strip()), int(end.strip())
-            for i in range(start - 1, end):
-                if 0 <= i < len(available_widgets):
-                    widgets_to_enable.append(available_widgets[i])
-        elif "," in selection:
-            for num in selection.split(","):
-                idx = int(num.strip()) - 1
-                if 0 <= idx < len(available_widgets):
-                    widgets_to_enable.append(available_widgets[idx])
-        else:
-            idx = int(selection) - 1
-            if 0 <= idx < len(available_widgets):
-                widgets_to_enable.append(available_widgets[idx])
+        widgets_to_enable = parse_selection(selection, available_widgets)
     except ValueError:
         print("❌ Invalid input. Use numbers (1, 2, 3) or ranges (1-3)\n")
         return
@@ -339,18 +465,19 @@ def enable_widget_menu():
     # Enable selected widgets
     enabled_count = 0
     for widget_name in widgets_to_enable:
-        if widget_state[widget_name]:
-            print(f"⚠️  {widget_name} already enabled")
-            continue
-        
-        if widget_name in widgets_instances:
-            widget = widgets_instances[widget_name]
-            if hasattr(widget, 'start') and widget.start():
-                widget_state[widget_name] = True
-                log_event("WIDGET_ENABLED", widget_name)
-                print(f"✅ {widget_name} enabled")
-                enabled_count += 1
-                export_state()  # Export state after widget change
+        with widget_lock:
+            if widget_name in _ENABLED:
+                print(f"⚠️  {widget_name} already enabled")
+                continue
+            
+            widget = widgets_instances.get(widget_name)
+            if widget is not None:
+                if widget_caps[widget_name]['start'] and widget.start():
+                    set_widget_enabled(widget_name, True)
+                    log_event("WIDGET_ENABLED", widget_name)
+                    print(f"✅ {widget_name} enabled")
+                    enabled_count += 1
+                    export_state()  # Export state after widget change
     
     print(f"\n✅ Enabled {enabled_count} widget(s)\n")
 
@@ -359,7 +486,7 @@ def disable_widget_menu():
     print("\n🔴 DISABLE WIDGETS")
     print("=" * 50)
     
-    active_widgets = [w for w in widget_state if widget_state[w]]
+    active_widgets = sorted(_ENABLED)
     
     if not active_widgets:
         print("❌ No active widgets to disable.\n")
@@ -371,47 +498,46 @@ def disable_widget_menu():
     
     selection = input("\nSelect widget(s) to disable (e.g. 1,2 or 1-2): ").strip()
     
-    widgets_to_disable = []
-    
     try:
-        if "-" in selection:
-            start, end = selection.split("-")
-            start, end = int(start.strip()), int(end.strip())
-            for i in range(start - 1, end):
-                if 0 <= i < len(active_widgets):
-                    widgets_to_disable.append(active_widgets[i])
-        elif "," in selection:
-            for num in selection.split(","):
-                idx = int(num.strip()) - 1
-                if 0 <= idx < len(active_widgets):
-                    widgets_to_disable.append(active_widgets[idx])
-        else:
-            idx = int(selection) - 1
-            if 0 <= idx < len(active_widgets):
-                widgets_to_disable.append(active_widgets[idx])
+        widgets_to_disable = parse_selection(selection, active_widgets)
     except ValueError:
         print("❌ Invalid input.\n")
         return
     
     for widget_name in widgets_to_disable:
-        if widget_name in widgets_instances:
-            widget = widgets_instances[widget_name]
-            if hasattr(widget, 'stop'):
-                widget.stop()
-        
-        widget_state[widget_name] = False
-        log_event("WIDGET_DISABLED", widget_name)
-        print(f"✅ {widget_name} disabled")
-        export_state()  # Export state after widget change
+        with widget_lock:
+            if widget_name not in _ENABLED:
+                continue  # Disabled over the control channel meanwhile
+            if widget_name in widgets_instances:
+                widget = widgets_instances[widget_name]
+                if widget_caps[widget_name]['stop']:
+                    widget.stop()
+            
+            set_widget_enabled(widget_name, False)
+            log_event("WIDGET_DISABLED", widget_name)
+            print(f"✅ {widget_name} disabled")
+            export_state()  # Export state after widget change
     
     print()
 
+# Numeric shapes accepted for action parameters; anything else stays a string
+_INT_PARAM = re.compile(r"[+-]?\d+")
+_FLOAT_PARAM = re.compile(r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?")
+
+def _coerce_param(val):
+    """int or float for numeric-looking values, the string itself otherwise."""
+    if _INT_PARAM.fullmatch(val):
+        return int(val)
+    if _FLOAT_PARAM.fullmatch(val):
+        return float(val)
+    return val
+
 def execute_action_menu():
     """Interactive action execution (numbered selection)"""
     print("\n⚡ ACTION EXECUTION")
     print("=" * 60)
     
-    active_widgets = [w for w in widget_state if widget_state[w]]
+    active_widgets = sorted(_ENABLED)
     if not active_widgets:
         print("❌ No active widgets. Enable one first.\n")
         return
@@ -432,7 +558,7 @@ def execute_action_menu():
         return
     
     widget = widgets_instances[widget_name]
-    if not hasattr(widget, 'get_actions'):
+    if not widget_caps[widget_name]['get_actions']:
         print(f"❌ Widget '{widget_name}' does not support actions\n")
         return
     
@@ -469,13 +595,7 @@ def execute_action_menu():
         for param in param_input.split():
             if "=" in param:
                 key, val = param.split("=", 1)
-                try:
-                    kwargs[key.strip()] = int(val.strip())
-                except ValueError:
-                    try:
-                        kwargs[key.strip()] = float(val.strip())
-                    except ValueError:
-                        kwargs[key.strip()] = val.strip()
+                kwargs[key.strip()] = _coerce_param(val.strip())
     
     print(f"\n▶️  Executing {widget_name}.{action_name}({kwargs})...")
     
@@ -498,6 +618,38 @@ def execute_action_menu():
         print(f"Error: {str(e)}")
         print("=" * 60 + "\n")
 
+def _format_file_integrity_event(ts, event):
+    event_type = event.get("event_type", "unknown")
+    path = event.get("path", "unknown")
+    if len(path) > 40:
+        path = "..." + path[-37:]
+    return f"  [{ts}] {event_type:8} | {path}"
+
+def _format_process_monitor_event(ts, event):
+    return f"  [{ts}] PID {event.get('pid', '?'):5} | {event.get('name', 'unknown')}"
+
+def _format_network_sniffer_event(ts, event):
+    return f"  [{ts}] {event.get('process', 'unknown'):15} -> {event.get('remote_address', '?')}"
+
+def _format_windows_defender_event(ts, event):
+    return f"  [{ts}] {event.get('action', 'scan'):12} | Threats: {event.get('threats_found', 0)}"
+
+def _format_rrnc_event(ts, event):
+    return f"  [{ts}] {event.get('action', 'unknown'):18} | {event.get('status', 'unknown')}"
+
+def _format_ollama_chat_event(ts, event):
+    return f"  [{ts}] USER: {event.get('user', 'user')[:30]}"
+
+# Widget name -> one-line event formatter used by show_events
+_EVENT_FORMATTERS = {
+    "file_integrity": _format_file_integrity_event,
+    "process_monitor": _format_process_monitor_event,
+    "network_sniffer": _format_network_sniffer_event,
+    "windows_defender": _format_windows_defender_event,
+    "rrnc": _format_rrnc_event,
+    "ollama_chat": _format_ollama_chat_event,
+}
+
 def show_events():
     """Show live events from enabled widgets."""
     print("\n📡 LIVE WIDGET EVENTS")
@@ -505,72 +657,48 @@ def show_events():
     
     has_events = False
     
-    for widget_name in sorted(widget_state.keys()):
-        if widget_state[widget_name] and widget_name in widgets_instances:
-            widget = widgets_instances[widget_name]
+    pollable = [
+        name for name in _WIDGET_NAMES_SORTED
+        if name in _ENABLED and widget_caps[name]['get_recent_events']
+    ]
+    
+    # Rendered into one buffer and written once, not a print per line
+    out = []
+    for widget_name in pollable:
+        # In-memory deque reads: cheaper sequentially than on worker threads
+        events = cached_widget_events(widget_name, widgets_instances[widget_name], 20)
+        
+        if events:
+            has_events = True
+            out.append(f"\n🔍 {widget_name.upper()}:")
+            out.append("-" * 60)
             
-            if hasattr(widget, 'get_recent_events'):
-                events = widget.get_recent_events(20)
-                
-                if events:
-                    has_events = True
-                    print(f"\n🔍 {widget_name.upper()}:")
-                    print("-" * 60)
-                    
-                    for event in events[-10:]:
-                        if isinstance(event, dict) and "timestamp" in event:
-                            ts = datetime.fromtimestamp(event.get("timestamp", 0)).strftime("%H:%M:%S")
-                            
-                            if widget_name == "file_integrity":
-                                event_type = event.get("event_type", "unknown")
-                                path = event.get("path", "unknown")
-                                if len(path) > 40:
-                                    path = "..." + path[-37:]
-                                print(f"  [{ts}] {event_type:8} | {path}")
-                            
-                            elif widget_name == "process_monitor":
-                                pid = event.get("pid", "?")
-                                name = event.get("name", "unknown")
-                                print(f"  [{ts}] PID {pid:5} | {name}")
-                            
-                            elif widget_name == "network_sniffer":
-                                process = event.get("process", "unknown")
-                                remote = event.get("remote_address", "?")
-                                print(f"  [{ts}] {process:15} -> {remote}")
-                            
-                            elif widget_name == "windows_defender":
-                                action = event.get("action", "scan")
-                                threats = event.get("threats_found", 0)
-                                print(f"  [{ts}] {action:12} | Threats: {threats}")
-                            
-                            elif widget_name == "rrnc":
-                                action = event.get("action", "unknown")
-                                status = event.get("status", "unknown")
-                                print(f"  [{ts}] {action:18} | {status}")
-                            
-                            elif widget_name == "ollama_chat":
-                                user = event.get("user", "user")[:30]
-                                print(f"  [{ts}] USER: {user}")
-                        else:
-                            print(f"  {event}")
-                
-                print("-" * 60)
+            # Formatter chosen once per widget, not re-dispatched per event
+            format_event = _EVENT_FORMATTERS.get(widget_name)
+            for event in events[-10:]:
+                if isinstance(event, dict) and "timestamp" in event:
+                    if format_event is not None:
+                        ts = datetime.fromtimestamp(event.get("timestamp", 0)).strftime("%H:%M:%S")
+                        out.append(format_event(ts, event))
+                else:
+                    out.append(f"  {event}")
+        
+        out.append("-" * 60)
     
     if not has_events:
-        print("No active widget events yet. Enable a widget first!")
+        out.append("No active widget events yet. Enable a widget first!")
     
-    print("=" * 60 + "\n")
+    out.append("=" * 60 + "\n")
+    sys.stdout.write("\n".join(out) + "\n")
 
 def show_logs():
     """Show recent audit logs."""
     print("\n📝 RECENT AUDIT LOGS")
     print("=" * 60)
     try:
-        with open("logs/audit.log", "r") as f:
-            lines = f.readlines()
-            recent = lines[-20:] if len(lines) > 20 else lines
-            for line in recent:
-                print(line.rstrip())
+        recent = tail_lines("logs/audit.log", 20)
+        if recent:
+            sys.stdout.write("\n".join(line.rstrip() for line in recent) + "\n")
     except FileNotFoundError:
         print("No logs found yet.")
     print("=" * 60 + "\n")
@@ -660,9 +788,12 @@ def interactive_chat():
                 continue
             
             print("\n⏳ Thinking...")
-            response = ollama_widget.send_message(user_input)
-            
-            print(f"\n🤖 Ollama:\n{response}\n")
+            # Print the reply as Ollama generates it
+            sys.stdout.write("\n🤖 Ollama:\n")
+            for chunk in ollama_widget.send_message_stream(user_input):
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+            sys.stdout.write("\n\n")
             log_event("CHAT_INTERACTION", f"User: {user_input[:50]}...")
             
         except KeyboardInterrupt:
@@ -731,62 +862,193 @@ ROADMAP:
 DOCS: [https://github.com/ArchieGate/archie-guardian](https://github.com/ArchieGate/archie-guardian)
     """)
 
+# Menu command -> handler; numbers and names map to the same function
+_CLI_HANDLERS = {
+    "1": show_status, "status": show_status,
+    "2": enable_widget_menu, "enable": enable_widget_menu,
+    "3": disable_widget_menu, "disable": disable_widget_menu,
+    "4": execute_action_menu, "action": execute_action_menu,
+    "5": show_events, "events": show_events,
+    "6": show_logs, "logs": show_logs,
+    "7": show_orchestrator_stats, "orch_stats": show_orchestrator_stats,
+    "8": set_permission_menu, "set_perms": set_permission_menu,
+    "9": show_help, "help": show_help,
+    "10": interactive_chat, "chat": interactive_chat,
+}
+_CLI_QUIT = frozenset(("0", "quit", "exit"))
+_CLI_COMMAND_NAMES = tuple(sorted(
+    name for name in list(_CLI_HANDLERS) + list(_CLI_QUIT) if not name.isdigit()
+))
+
+def _complete_command(text, state):
+    matches = [name for name in _CLI_COMMAND_NAMES if name.startswith(text)]
+    return matches[state] if state < len(matches) else None
+
+def _enable_line_editing():
+    """Arrow-key history and tab completion of menu commands, where readline exists."""
+    try:
+        import readline
+    except ImportError:
+        # Not shipped on Windows; input() still works, just without history
+        return
+    readline.set_completer(_complete_command)
+    readline.parse_and_bind("tab: complete")
+
+def shutdown():
+    """Stop enabled widgets and the orchestrator, then log the exit."""
+    print("\n🛑 Shutting down Archie Guardian...")
+    with widget_lock:
+        for widget_name in list(_ENABLED):
+            try:
+                widget = widgets_instances[widget_name]
+                if widget_caps[widget_name]['stop']:
+                    widget.stop()
+            except Exception as e:
+                print(f"   ⚠️  Error stopping {widget_name}: {e}")
+                log_event("WIDGET_STOP_ERROR", f"{widget_name}: {e}")
+    
+    if master_orch:
+        try:
+            master_orch.stop()
+        except Exception as e:
+            print(f"   ⚠️  Error stopping orchestrator: {e}")
+            log_event("ORCHESTRATOR_STOP_ERROR", str(e))
+    
+    log_event("SHUTDOWN", "Guardian graceful exit")
+    print("✅ Goodbye!\n")
+
 def interactive_cli():
     """Interactive CLI loop."""
+    _enable_line_editing()
     while True:
         main_menu()
         choice = input("Enter command (0-9, 10): ").strip().lower()
         
-        if choice in ["1", "status"]:
-            show_status()
-        
-        elif choice in ["2", "enable"]:
-            enable_widget_menu()
-        
-        elif choice in ["3", "disable"]:
-            disable_widget_menu()
-        
-        elif choice in ["4", "action"]:
-            execute_action_menu()
-        
-        elif choice in ["5", "events"]:
-            show_events()
-        
-        elif choice in ["6", "logs"]:
-            show_logs()
-        
-        elif choice in ["7", "orch_stats"]:
-            show_orchestrator_stats()
-        
-        elif choice in ["8", "set_perms"]:
-            set_permission_menu()
-        
-        elif choice in ["9", "help"]:
-            show_help()
-        
-        elif choice in ["10", "chat"]:
-            interactive_chat()
-        
-        elif choice in ["0", "quit", "exit"]:
-            print("\n🛑 Shutting down Archie Guardian...")
-            for widget_name in widget_state:
-                if widget_state[widget_name] and widget_name in widgets_instances:
-                    try:
-                        widget = widgets_instances[widget_name]
-                        if hasattr(widget, 'stop'):
-                            widget.stop()
-                    except:
-                        pass
-            
-            if master_orch:
-                master_orch.stop()
-            
-            log_event("SHUTDOWN", "Guardian graceful exit")
-            print("✅ Goodbye!\n")
+        if choice in _CLI_QUIT:
+            shutdown()
             break
         
-        else:
+        handler = _CLI_HANDLERS.get(choice)
+        if handler is None:
             print("❌ Unknown command. Try again.\n")
+        else:
+            handler()
+
+def handle_control_command(request):
+    """
+    Apply one UI control command and return its reply.
+    
+    Commands: {"cmd": "enable"|"disable"|"state", "widget": name}
+    Replies:  {"ok": bool, "widget": name, "enabled": bool}
+    """
+    try:
+        cmd, widget_name = request.get("cmd"), request.get("widget")
+        if cmd == "enable":
+            ok = enable_widget_cli(widget_name)
+        elif cmd == "disable":
+            ok = disable_widget_cli(widget_name)
+        elif cmd == "state":
+            ok = widget_name in widget_state
+        else:
+            return {"ok": False, "error": f"unknown command: {cmd}"}
+        return {"ok": bool(ok), "widget": widget_name, "enabled": widget_state.get(widget_name, False)}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+def start_control_server(address=None):
+    """
+    Serve handle_control_command on a named pipe (Windows) or Unix socket in
+    the per-user runtime directory (core.control_channel). Clients must pass
+    the HMAC handshake with this run's key. Messages are length-prefixed JSON
+    frames (multiprocessing.connection send_bytes/recv_bytes). Returns the
+    listener, or None if unavailable.
+    """
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Client, Listener
+    from core.control_channel import control_address, publish_control_key
+    
+    try:
+        address = address or control_address()
+    except OSError:
+        return None
+    authkey = os.urandom(32)
+    
+    try:
+        listener = Listener(address, authkey=authkey)
+    except OSError:
+        # A socket file left by a crashed run: reclaim it unless someone answers
+        if os.name == "nt" or not os.path.exists(address):
+            return None
+        try:
+            Client(address).close()
+            return None  # Another Guardian already serves this address
+        except OSError:
+            pass
+        try:
+            os.unlink(address)
+            listener = Listener(address, authkey=authkey)
+        except OSError:
+            return None
+    
+    try:
+        publish_control_key(authkey)
+    except OSError:
+        listener.close()
+        return None
+    
+    def serve(conn):
+        with conn:
+            while True:
+                try:
+                    request = json.loads(conn.recv_bytes())
+                except (EOFError, OSError):
+                    return
+                except ValueError:
+                    conn.send_bytes(json.dumps({"ok": False, "error": "invalid JSON"}).encode())
+                    continue
+                conn.send_bytes(json.dumps(handle_control_command(request)).encode())
+    
+    def accept_loop():
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError):
+                continue  # Client without the key, or one that hung up mid-handshake
+            except OSError:
+                return  # Listener closed
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+    
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return listener
+
+def run_worker():
+    """
+    Long-lived worker for the UI API: one JSON command per stdin line,
+    one JSON reply per stdout line (see handle_control_command). Widgets
+    stay running between commands.
+    """
+    # Keep stdout for the protocol; everything printed from here on goes to stderr
+    replies = sys.stdout
+    sys.stdout = sys.stderr
+    
+    def reply(message):
+        replies.write(json.dumps(message) + "\n")
+        replies.flush()
+    
+    export_state()
+    reply({"ready": True})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            reply({"ok": False, "error": "invalid JSON"})
+            continue
+        reply(handle_control_command(request))
+    
+    # stdin closed: the API went away
+    shutdown()
 
 if __name__ == "__main__":
     import argparse
@@ -795,9 +1057,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Archie Guardian')
     parser.add_argument('--action', type=str, help='Action to perform')
     parser.add_argument('--widget', type=str, help='Widget name')
+    parser.add_argument('--daemon', action='store_true', help='Serve widget commands as JSON lines on stdin/stdout')
     
     args = parser.parse_args()
     
+    if args.daemon:
+        run_worker()
+        sys.exit(0)
+    
     # Handle CLI commands from UI
     if args.action and args.widget:
         if args.action == 'enable_widget':
@@ -813,24 +1080,16 @@ if __name__ == "__main__":
     # Export initial state
     export_state()
     
+    # Let the UI API drive this instance's widgets directly
+    control_listener = start_control_server()
+    
     try:
         interactive_cli()
     except KeyboardInterrupt:
         print("\n\n🛑 Guardian interrupted by user")
         log_event("INTERRUPT", "User Ctrl+C")
-        for widget_name in widgets_instances:
-            if widget_state.get(widget_name):
-                try:
-                    widget = widgets_instances[widget_name]
-                    if hasattr(widget, 'stop'):
-                        widget.stop()
-                except:
-                    pass
-        
-        if master_orch:
-            try:
-                master_orch.stop()
-            except:
-                pass
-        
+        shutdown()
         sys.exit(0)
+    finally:
+        if control_listener:
+            control_listener.close()
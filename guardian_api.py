@@ -3,21 +3,67 @@ Flask API voor Archie Guardian UI
 REST API endpoints voor widget management, chat, logs, en status
 """
 
-from flask import Flask, jsonify, request, Response, stream_with_context, render_template, send_from_directory
+from flask import Flask, jsonify, request, Response, stream_with_context, render_template, send_from_directory, abort
 from flask_cors import CORS
 import json
 import logging
+import mimetypes
 from functools import wraps
 from datetime import datetime
 import time
 import os
 import sys
-import subprocess
-import requests
+import threading
+import queue
+from urllib.parse import quote
+
+try:
+    from werkzeug.utils import safe_join
+except ImportError:  # Werkzeug < 2.0
+    from werkzeug.security import safe_join
+
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+    
+    class OrjsonProvider(DefaultJSONProvider):
+        """jsonify()/request.get_json() through orjson; bytes straight into the response."""
+        
+        def dumps(self, obj, **kwargs):
+            option = orjson.OPT_NON_STR_KEYS
+            # Same key order as the stdlib provider (sort_keys defaults to True)
+            if kwargs.get("sort_keys", self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get("indent"):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+    
+    _json_loads = orjson.loads
+    
+    def _sse_frame(payload):
+        """One SSE 'data:' frame as bytes, ready to yield."""
+        return b"data: " + orjson.dumps(payload) + b"\n\n"
+except ImportError:
+    OrjsonProvider = None
+    _json_loads = json.loads
+    
+    def _sse_frame(payload):
+        """One SSE 'data:' frame as bytes, ready to yield."""
+        return f"data: {json.dumps(payload)}\n\n".encode()
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+# Browser cache lifetime for /assets files (seconds)
+ASSETS_MAX_AGE = 86400
+# Behind nginx: internal location aliased to ASSETS_DIR (e.g. "/_internal_assets/").
+# When set, /assets responses carry X-Accel-Redirect and nginx sends the file.
+ASSETS_ACCEL_PREFIX = os.environ.get('ARCHIE_ASSETS_ACCEL_PREFIX', '').rstrip('/')
+
 # Import GuardianBridge
 try:
     from services.guardian_bridge import GuardianBridge
@@ -27,6 +73,8 @@ except ImportError as e:
 
 # Initialize Flask app
 app = Flask(__name__, template_folder='templates', static_folder='static')
+if OrjsonProvider:
+    app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for all routes
 
 # Configure logging
@@ -50,12 +98,25 @@ WIDGET_COMMANDS = {
     'ollama_chat': 'ollama_chat'
 }
 
+# Parsed guardian_state.json, reused until the file's (mtime, size) changes
+_state_cache = {"key": None, "data": None}
+_state_cache_lock = threading.Lock()
+
 def read_guardian_state():
-    """Read guardian state from JSON file"""
+    """Read guardian state from JSON file (cached until the file changes)"""
     try:
-        if os.path.exists('guardian_state.json'):
-            with open('guardian_state.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+        st = os.stat('guardian_state.json')
+        key = (st.st_mtime_ns, st.st_size)
+        with _state_cache_lock:
+            if _state_cache["key"] == key:
+                return _state_cache["data"]
+            with open('guardian_state.json', 'rb') as f:
+                data = _json_loads(f.read())
+            _state_cache["key"] = key
+            _state_cache["data"] = data
+            return data
+    except FileNotFoundError:
+        pass
     except Exception as e:
         logger.error(f"Error reading guardian state: {e}")
     
@@ -122,44 +183,154 @@ def get_widgets():
     return jsonify(widgets_list)
 
 
+class GuardianWorker:
+    """
+    Widget control when no in-process bridge is available. Prefers the
+    control channel of an already running Guardian (per-user named pipe / Unix
+    socket, authenticated with the key it publishes, length-prefixed JSON
+    frames; see core.control_channel); otherwise keeps one `guardian.py --daemon`
+    subprocess and talks JSON lines over its pipes. Either way a widget call
+    costs a round trip instead of an interpreter start.
+    """
+    
+    def __init__(self, timeout=10.0, address=None):
+        self.timeout = timeout
+        self.address = address
+        self._conn = None
+        self._proc = None
+        self._replies = None
+        self._lock = threading.Lock()
+    
+    def _call_running_guardian(self, message):
+        """Reply from a running Guardian's control channel, or None if there is none."""
+        from multiprocessing import AuthenticationError
+        from multiprocessing.connection import Client
+        from core.control_channel import control_address, read_control_key
+        
+        for _ in range(2):  # Reconnect once if a cached connection went stale
+            try:
+                if self._conn is None:
+                    authkey = read_control_key()
+                    if authkey is None:
+                        return None  # No Guardian has served the channel yet
+                    self._conn = Client(self.address or control_address(), authkey=authkey)
+                self._conn.send_bytes(json.dumps(message).encode())
+                if not self._conn.poll(self.timeout):
+                    raise TimeoutError(f'Guardian did not reply within {self.timeout}s')
+                return _json_loads(self._conn.recv_bytes())
+            except TimeoutError:
+                self._conn.close()
+                self._conn = None
+                raise
+            except (OSError, EOFError, AuthenticationError):
+                # AuthenticationError: key of an earlier run, re-read on retry
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+        return None
+    
+    def _start(self):
+        # Only this fallback path needs subprocess; keep it off the import path
+        import subprocess
+        guardian_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'guardian.py')
+        self._proc = subprocess.Popen(
+            [sys.executable, guardian_path, '--daemon'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding='utf-8', bufsize=1,
+            cwd=os.path.dirname(guardian_path)
+        )
+        # Reader thread so replies can be awaited with a timeout on every platform
+        self._replies = queue.Queue()
+        threading.Thread(target=self._read_replies, args=(self._proc.stdout, self._replies), daemon=True).start()
+        # Startup banners precede the protocol; wait for the ready marker
+        while not self._next_reply().get('ready'):
+            pass
+    
+    @staticmethod
+    def _read_replies(stream, replies):
+        for line in stream:
+            replies.put(line)
+        replies.put(None)
+    
+    def _next_reply(self):
+        while True:
+            try:
+                line = self._replies.get(timeout=self.timeout)
+            except queue.Empty:
+                self._stop()
+                raise TimeoutError(f'Guardian worker did not reply within {self.timeout}s')
+            if line is None:
+                self._stop()
+                raise ConnectionError('Guardian worker exited')
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # Console output before the protocol started
+            if isinstance(message, dict):
+                return message
+    
+    def _stop(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc = None
+    
+    def call(self, cmd, name):
+        """Send one command and return the worker's reply dict."""
+        with self._lock:
+            reply = self._call_running_guardian({'cmd': cmd, 'widget': name})
+            if reply is not None:
+                return reply
+            
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            self._proc.stdin.write(json.dumps({'cmd': cmd, 'widget': name}) + "\n")
+            self._proc.stdin.flush()
+            return self._next_reply()
+
+
+guardian_worker = GuardianWorker()
+
+
 @app.route('/api/widgets/<name>/start', methods=['POST'])
 @handle_errors
 def start_widget(name):
-    """Start widget via CLI command to guardian.py"""
+    """Start widget in-process via GuardianBridge (guardian worker as fallback)"""
     if name not in WIDGET_COMMANDS:
         return jsonify({'error': 'Unknown widget'}), 404
     
+    if bridge and bridge.is_connected():
+        result = bridge.start_widget(name)
+        if result.get('success'):
+            return jsonify({
+                'success': True,
+                'widget': name,
+                'status': result.get('status', 'active'),
+                'message': f'Widget {name} started'
+            })
+        return jsonify({
+            'success': False,
+            'error': 'Failed to start widget',
+            'details': result.get('error')
+        }), 500
+    
     try:
-        # Get guardian.py path
-        guardian_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'guardian.py')
+        result = guardian_worker.call('enable', name)
         
-        # Call guardian.py CLI with enable command
-        result = subprocess.run([
-            sys.executable, guardian_path,
-            '--action', 'enable_widget',
-            '--widget', name
-        ], capture_output=True, text=True, timeout=10, cwd=os.path.dirname(guardian_path))
-        
-        if result.returncode == 0:
-            # Wait a bit for state file to update
-            time.sleep(0.5)
-            state = read_guardian_state()
-            widget_status = state.get('widgets', {}).get(name, {})
-            
+        if result.get('ok'):
             return jsonify({
                 'success': True,
                 'widget': name,
-                'status': 'active' if widget_status.get('enabled') else 'idle',
+                'status': 'active' if result.get('enabled') else 'idle',
                 'message': f'Widget {name} started'
             })
         else:
             return jsonify({
                 'success': False,
                 'error': 'Failed to start widget',
-                'details': result.stderr or result.stdout
+                'details': result.get('error')
             }), 500
     
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         return jsonify({'success': False, 'error': 'Command timeout'}), 504
     except Exception as e:
         logger.error(f"Error starting widget {name}: {e}", exc_info=True)
@@ -169,27 +340,29 @@ def start_widget(name):
 @app.route('/api/widgets/<name>/stop', methods=['POST'])
 @handle_errors
 def stop_widget(name):
-    """Stop widget via CLI command to guardian.py"""
+    """Stop widget in-process via GuardianBridge (guardian worker as fallback)"""
     if name not in WIDGET_COMMANDS:
         return jsonify({'error': 'Unknown widget'}), 404
     
+    if bridge and bridge.is_connected():
+        result = bridge.stop_widget(name)
+        if result.get('success'):
+            return jsonify({
+                'success': True,
+                'widget': name,
+                'status': 'idle',
+                'message': f'Widget {name} stopped'
+            })
+        return jsonify({
+            'success': False,
+            'error': 'Failed to stop widget',
+            'details': result.get('error')
+        }), 500
+    
     try:
-        # Get guardian.py path
-        guardian_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'guardian.py')
-        
-        # Call guardian.py CLI with disable command
-        result = subprocess.run([
-            sys.executable, guardian_path,
-            '--action', 'disable_widget',
-            '--widget', name
-        ], capture_output=True, text=True, timeout=10, cwd=os.path.dirname(guardian_path))
+        result = guardian_worker.call('disable', name)
         
-        if result.returncode == 0:
-            # Wait a bit for state file to update
-            time.sleep(0.5)
-            state = read_guardian_state()
-            widget_status = state.get('widgets', {}).get(name, {})
-            
+        if result.get('ok'):
             return jsonify({
                 'success': True,
                 'widget': name,
@@ -200,10 +373,10 @@ def stop_widget(name):
             return jsonify({
                 'success': False,
                 'error': 'Failed to stop widget',
-                'details': result.stderr or result.stdout
+                'details': result.get('error')
             }), 500
     
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         return jsonify({'success': False, 'error': 'Command timeout'}), 504
     except Exception as e:
         logger.error(f"Error stopping widget {name}: {e}", exc_info=True)
@@ -238,18 +411,17 @@ def stream_logs():
     """SSE voor CLI output (audit.log)."""
     def generate():
         if not bridge:
-            yield f"data: {json.dumps({'type': 'error', 'message': 'GuardianBridge not available', 'timestamp': datetime.now().isoformat()})}\n\n"
+            yield _sse_frame({'type': 'error', 'message': 'GuardianBridge not available', 'timestamp': datetime.now().isoformat()})
             return
         
         last_position = int(request.args.get('last_position', 0))
         
         # Send initial connection message
-        yield f"data: {json.dumps({'type': 'connected', 'timestamp': datetime.now().isoformat()})}\n\n"
+        yield _sse_frame({'type': 'connected', 'timestamp': datetime.now().isoformat()})
         
-        # Stream logs
-        for log_entry in bridge.stream_logs(last_position):
-            yield f"data: {log_entry}\n\n"
-            time.sleep(0.1)  # Small delay to prevent overwhelming
+        # Stream logs: the bridge frames everything read in one poll (at most
+        # 64 KB of log) as a single bytes chunk, so one write per poll
+        yield from bridge.stream_log_frames(last_position)
     
     return Response(
         stream_with_context(generate()),
@@ -262,26 +434,103 @@ def stream_logs():
     )
 
 
+class WidgetStatusBroadcaster:
+    """
+    One background poll of bridge.get_all_widgets_status() shared by every
+    /api/stream/widgets client. Each client gets its own small queue of
+    pre-serialized SSE messages; the poll thread runs only while clients exist.
+    A status frame is built and sent only when the widget list changed; new
+    clients get the latest one on subscribe, idle streams a keepalive comment.
+    """
+    
+    KEEPALIVE = b": keepalive\n\n"
+    
+    def __init__(self, poll_interval=2.0, error_interval=5.0, keepalive_interval=15.0):
+        self.poll_interval = poll_interval
+        self.error_interval = error_interval
+        self.keepalive_interval = keepalive_interval
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_widgets = None
+        self._last_frame = None
+    
+    def subscribe(self):
+        client = queue.Queue(maxsize=4)
+        with self._lock:
+            self._subscribers.add(client)
+            if self._last_frame is not None:
+                client.put_nowait(self._last_frame)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return client
+    
+    def unsubscribe(self, client):
+        with self._lock:
+            self._subscribers.discard(client)
+    
+    def _publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for client in subscribers:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop its oldest update rather than block the poll
+                try:
+                    client.get_nowait()
+                    client.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+    
+    def _run(self):
+        last_sent = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._last_widgets = self._last_frame = None
+                    return
+            try:
+                widgets = bridge.get_all_widgets_status()
+                if widgets != self._last_widgets:
+                    frame = _sse_frame({'type': 'status_update', 'widgets': widgets, 'timestamp': datetime.now().isoformat()})
+                    with self._lock:
+                        self._last_widgets, self._last_frame = widgets, frame
+                    self._publish(frame)
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= self.keepalive_interval:
+                    # Unchanged for a while: a comment line keeps proxies from closing the stream
+                    self._publish(self.KEEPALIVE)
+                    last_sent = time.monotonic()
+                time.sleep(self.poll_interval)
+            except Exception as e:
+                self._publish(_sse_frame({'type': 'error', 'message': str(e), 'timestamp': datetime.now().isoformat()}))
+                time.sleep(self.error_interval)
+
+
+widget_broadcaster = WidgetStatusBroadcaster()
+
+
 @app.route('/api/stream/widgets', methods=['GET'])
 @handle_errors
 def stream_widgets():
     """SSE voor widget status updates."""
     def generate():
         if not bridge:
-            yield f"data: {json.dumps({'type': 'error', 'message': 'GuardianBridge not available', 'timestamp': datetime.now().isoformat()})}\n\n"
+            yield _sse_frame({'type': 'error', 'message': 'GuardianBridge not available', 'timestamp': datetime.now().isoformat()})
             return
         
         # Send initial connection message
-        yield f"data: {json.dumps({'type': 'connected', 'timestamp': datetime.now().isoformat()})}\n\n"
+        yield _sse_frame({'type': 'connected', 'timestamp': datetime.now().isoformat()})
         
-        while True:
-            try:
-                widgets = bridge.get_all_widgets_status()
-                yield f"data: {json.dumps({'type': 'status_update', 'widgets': widgets, 'timestamp': datetime.now().isoformat()})}\n\n"
-                time.sleep(2)  # Update every 2 seconds
-            except Exception as e:
-                yield f"data: {json.dumps({'type': 'error', 'message': str(e), 'timestamp': datetime.now().isoformat()})}\n\n"
-                time.sleep(5)
+        client = widget_broadcaster.subscribe()
+        try:
+            while True:
+                yield client.get()
+        finally:
+            widget_broadcaster.unsubscribe(client)
     
     return Response(
         stream_with_context(generate()),
@@ -369,7 +618,7 @@ def get_config():
     config = {
         'version': '1.0',
         'permission_level': bridge.get_permission_level().get('permission_level'),
-        'available_widgets': [w['name'] for w in bridge.get_all_widgets_status()]
+        'available_widgets': bridge.list_widget_names()
     }
     return jsonify(config)
 
@@ -444,14 +693,16 @@ def update_permissions():
 # Health Check
 # ============================================================================
 
+# Only the timestamp and bridge flag vary between health checks
+_HEALTH_TEMPLATE = b'{"status":"ok","timestamp":"%s","bridge_connected":%s}'
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        'status': 'ok',
-        'timestamp': datetime.now().isoformat(),
-        'bridge_connected': bridge.is_connected() if bridge else False
-    })
+    connected = b'true' if bridge and bridge.is_connected() else b'false'
+    body = _HEALTH_TEMPLATE % (datetime.now().isoformat().encode(), connected)
+    return Response(body, mimetype='application/json')
 
 
 # ============================================================================
@@ -467,9 +718,19 @@ def index():
 @app.route('/assets/<path:filename>')
 def serve_assets(filename):
     """Serve assets from assets folder."""
-    import os
-    assets_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
-    return send_from_directory(assets_dir, filename)
+    if ASSETS_ACCEL_PREFIX:
+        if safe_join(ASSETS_DIR, filename) is None:
+            abort(404)
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{ASSETS_ACCEL_PREFIX}/{quote(filename)}"
+    else:
+        response = send_from_directory(ASSETS_DIR, filename)
+    # Set on the response rather than via max_age= so older Flask works too;
+    # send_from_directory marks it no-cache by default, which would win
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = ASSETS_MAX_AGE
+    return response
 
 
 # ============================================================================
@@ -488,5 +749,7 @@ if __name__ == '__main__':
     print("🌐 Open http://localhost:5000 in your browser")
     print("=" * 60)
     
-    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
+    # No debug by default: the reloader would start a second process with
+    # its own widget state. Set FLASK_DEBUG=1 to opt in while developing.
+    app.run(host='0.0.0.0', port=5000, threaded=True)
 
@@ -6,10 +6,94 @@ Interface tussen Flask UI en guardian.py backend
 import sys
 import os
 import json
+import logging
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 from typing import Dict, List, Any, Optional, Generator
 from datetime import datetime
 
+_json_str = json.encoder.encode_basestring_ascii
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+
+
+class _LogWatcher:
+    """
+    Wakes log followers when a file changes instead of letting each one poll.
+    One watchdog observer per directory is shared by every follower; without
+    watchdog, wait() is a plain sleep and followers fall back to polling.
+    """
+    
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._changed = threading.Condition()
+        self.generation = 0  # Bumped on every change; lets waiters skip missed wakeups
+        self._observer = None
+        self._start_lock = threading.Lock()
+    
+    def _ensure_started(self):
+        if Observer is None or self._observer is not None:
+            return
+        with self._start_lock:
+            if self._observer is not None:
+                return
+            watcher = self
+            
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    paths = (getattr(event, "src_path", None), getattr(event, "dest_path", None))
+                    if watcher.path in paths:
+                        with watcher._changed:
+                            watcher.generation += 1
+                            watcher._changed.notify_all()
+            
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(_Handler(), os.path.dirname(self.path), recursive=False)
+            observer.start()
+            self._observer = observer
+    
+    def watch(self) -> int:
+        """Start watching (if possible) and return the current generation."""
+        if Observer is not None:
+            try:
+                self._ensure_started()
+            except OSError:
+                pass
+        return self.generation
+    
+    def wait(self, since: int, timeout: float):
+        """Block until the file has changed after generation `since`, or timeout."""
+        if self._observer is None:
+            time.sleep(timeout)
+            return
+        with self._changed:
+            self._changed.wait_for(lambda: self.generation != since, timeout)
+
+
+_audit_log_watcher = _LogWatcher("logs/audit.log")
+
+# Probes widget get_stats/get_status concurrently; created on first use
+_status_pool = None
+_status_pool_lock = threading.Lock()
+
+
+def _get_status_pool(workers: int) -> ThreadPoolExecutor:
+    global _status_pool
+    if _status_pool is None:
+        with _status_pool_lock:
+            if _status_pool is None:
+                _status_pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="widget-status")
+    return _status_pool
+
 # Add parent directory to path to import guardian modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -18,18 +102,47 @@ try:
     # Note: guardian.py must be imported before GuardianBridge is used
     # The start_ui.py script handles this initialization
     import guardian
-    from core.agent_utils import PermissionLevel
+    from core.agent_utils import PERMISSION_LEVEL_BY_VALUE, PermissionLevel, tail_lines
 except ImportError as e:
     # If guardian is not yet loaded, we'll handle it gracefully
     guardian = None
     try:
-        from core.agent_utils import PermissionLevel
+        from core.agent_utils import PERMISSION_LEVEL_BY_VALUE, PermissionLevel, tail_lines
     except ImportError:
+        PERMISSION_LEVEL_BY_VALUE = {}
         PermissionLevel = None
+        tail_lines = None
 except Exception as e:
-    print(f"Warning: Error loading guardian: {e}")
+    logger.warning("Error loading guardian: %s", e)
     guardian = None
+    PERMISSION_LEVEL_BY_VALUE = {}
     PermissionLevel = None
+    tail_lines = None
+
+_PERMISSION_VALUES = tuple(PERMISSION_LEVEL_BY_VALUE)
+
+
+def _ttl_cached(seconds: float):
+    """
+    Cache a no-argument bridge method for `seconds`. Entries are also dropped
+    when the bridge's or guardian's state generation moves on, so start/stop
+    and permission changes are visible immediately.
+    """
+    def decorator(method):
+        name = method.__name__
+        
+        @wraps(method)
+        def wrapper(self):
+            generation = (self._generation, getattr(guardian, "widget_generation", 0))
+            now = time.monotonic()
+            cached = self._ttl_cache.get(name)
+            if cached is not None and cached[0] == generation and now < cached[1]:
+                return cached[2]
+            value = method(self)
+            self._ttl_cache[name] = (generation, now + seconds, value)
+            return value
+        return wrapper
+    return decorator
 
 
 class GuardianBridge:
@@ -56,6 +169,9 @@ class GuardianBridge:
         
         self._initialized = True
         self._guardian_loaded = False
+        # Short-lived results of the status getters polled by dashboards
+        self._ttl_cache = {}
+        self._generation = 0
         
         # Try to load guardian.py globals
         self._load_guardian()
@@ -69,12 +185,12 @@ class GuardianBridge:
                 self.master_orch = guardian.master_orch
                 self.audit_logger = guardian.audit_logger
                 self._guardian_loaded = True
-                print("✅ GuardianBridge: Connected to guardian.py backend")
+                logger.info("GuardianBridge: connected to guardian.py backend")
             else:
-                print("⚠️  GuardianBridge: guardian.py not loaded, using fallback mode")
+                logger.warning("GuardianBridge: guardian.py not loaded, using fallback mode")
                 self._guardian_loaded = False
         except Exception as e:
-            print(f"⚠️  GuardianBridge: Error loading guardian: {e}")
+            logger.warning("GuardianBridge: error loading guardian: %s", e)
             self._guardian_loaded = False
     
     def is_connected(self) -> bool:
@@ -100,7 +216,8 @@ class GuardianBridge:
         
         try:
             is_active = self.widget_state.get(widget_name, False)
-            widget_instance = self.widgets_instances.get(widget_name)
+            # Only active widgets are looked up; idle ones stay unimported
+            widget_instance = self.widgets_instances.get(widget_name) if is_active else None
             
             status = {
                 "name": widget_name,
@@ -110,21 +227,22 @@ class GuardianBridge:
             
             # Get additional stats if widget is active
             if is_active and widget_instance:
-                if hasattr(widget_instance, 'get_stats'):
+                caps = guardian.widget_caps[widget_name]
+                if caps['get_stats']:
                     try:
-                        stats = widget_instance.get_stats()
+                        stats = guardian.cached_widget_stats(widget_name, widget_instance)
                         status.update(stats)
-                    except:
+                    except Exception:
                         pass
                 
-                if hasattr(widget_instance, 'get_status'):
+                if caps['get_status']:
                     try:
-                        widget_status = widget_instance.get_status()
+                        widget_status = caps['get_status']()
                         status.update(widget_status)
                         # Include model info for ollama_chat widget
                         if widget_name == 'ollama_chat' and 'model' in widget_status:
                             status['model'] = widget_status['model']
-                    except:
+                    except Exception:
                         pass
             
             return status
@@ -137,16 +255,21 @@ class GuardianBridge:
                 "error": str(e)
             }
     
+    @_ttl_cached(0.5)
     def get_all_widgets_status(self) -> List[Dict[str, Any]]:
         """Haal status van alle widgets op."""
         if not self._guardian_loaded:
             return []
         
-        widgets = []
-        for widget_name in self.widget_state.keys():
-            widgets.append(self.get_widget_status(widget_name))
-        
-        return widgets
+        # Widget probes may do IO (Ollama, sockets); run them side by side
+        names = list(self.widget_state)
+        return list(_get_status_pool(len(names)).map(self.get_widget_status, names))
+    
+    def list_widget_names(self) -> List[str]:
+        """Namen van alle widgets, zonder status op te vragen."""
+        if not self._guardian_loaded:
+            return []
+        return list(self.widget_state.keys())
     
     def start_widget(self, widget_name: str) -> Dict[str, Any]:
         """
@@ -164,59 +287,57 @@ class GuardianBridge:
                 "error": "Guardian backend not loaded"
             }
         
-        try:
-            # Check if widget exists
-            if widget_name not in self.widgets_instances:
-                return {
-                    "success": False,
-                    "error": f"Widget '{widget_name}' not found"
-                }
-            
-            # Check if already active
-            if self.widget_state.get(widget_name, False):
-                return {
-                    "success": True,
-                    "message": f"Widget '{widget_name}' already active",
-                    "status": "active"
-                }
-            
-            # Start widget
-            widget_instance = self.widgets_instances[widget_name]
-            if hasattr(widget_instance, 'start'):
-                success = widget_instance.start()
-                if success:
-                    self.widget_state[widget_name] = True
-                    
-                    # Log event
-                    if hasattr(self, 'audit_logger'):
-                        try:
-                            with open("logs/audit.log", "a", encoding="utf-8") as f:
-                                f.write(f"[{datetime.now().isoformat()}] WIDGET_ENABLED: {widget_name}\n")
-                        except:
-                            pass
-                    
+        with guardian.widget_lock:
+            try:
+                # Check if widget exists
+                if widget_name not in self.widgets_instances:
+                    return {
+                        "success": False,
+                        "error": f"Widget '{widget_name}' not found"
+                    }
+                
+                # Check if already active
+                if self.widget_state.get(widget_name, False):
                     return {
                         "success": True,
-                        "message": f"Widget '{widget_name}' started",
+                        "message": f"Widget '{widget_name}' already active",
                         "status": "active"
                     }
+                
+                # Start widget
+                widget_instance = self.widgets_instances[widget_name]
+                if guardian.widget_caps[widget_name]['start']:
+                    success = widget_instance.start()
+                    if success:
+                        guardian.set_widget_enabled(widget_name, True)
+                        
+                        # Log event (queued through guardian's audit writer)
+                        if hasattr(self, 'audit_logger'):
+                            guardian.log_event("WIDGET_ENABLED", widget_name)
+                        guardian.export_state()
+                        
+                        return {
+                            "success": True,
+                            "message": f"Widget '{widget_name}' started",
+                            "status": "active"
+                        }
+                    else:
+                        return {
+                            "success": False,
+                            "error": f"Failed to start widget '{widget_name}'"
+                        }
                 else:
                     return {
                         "success": False,
-                        "error": f"Failed to start widget '{widget_name}'"
+                        "error": f"Widget '{widget_name}' has no start() method"
                     }
-            else:
+                    
+            except Exception as e:
                 return {
                     "success": False,
-                    "error": f"Widget '{widget_name}' has no start() method"
+                    "error": str(e)
                 }
-                
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
-    
+        
     def stop_widget(self, widget_name: str) -> Dict[str, Any]:
         """
         Stop een widget.
@@ -233,52 +354,50 @@ class GuardianBridge:
                 "error": "Guardian backend not loaded"
             }
         
-        try:
-            # Check if widget exists
-            if widget_name not in self.widgets_instances:
-                return {
-                    "success": False,
-                    "error": f"Widget '{widget_name}' not found"
-                }
-            
-            # Check if already inactive
-            if not self.widget_state.get(widget_name, False):
-                return {
-                    "success": True,
-                    "message": f"Widget '{widget_name}' already inactive",
-                    "status": "idle"
-                }
-            
-            # Stop widget
-            widget_instance = self.widgets_instances[widget_name]
-            if hasattr(widget_instance, 'stop'):
-                widget_instance.stop()
-                self.widget_state[widget_name] = False
+        with guardian.widget_lock:
+            try:
+                # Check if widget exists
+                if widget_name not in self.widgets_instances:
+                    return {
+                        "success": False,
+                        "error": f"Widget '{widget_name}' not found"
+                    }
                 
-                # Log event
-                try:
-                    with open("logs/audit.log", "a", encoding="utf-8") as f:
-                        f.write(f"[{datetime.now().isoformat()}] WIDGET_DISABLED: {widget_name}\n")
-                except:
-                    pass
+                # Check if already inactive
+                if not self.widget_state.get(widget_name, False):
+                    return {
+                        "success": True,
+                        "message": f"Widget '{widget_name}' already inactive",
+                        "status": "idle"
+                    }
                 
-                return {
-                    "success": True,
-                    "message": f"Widget '{widget_name}' stopped",
-                    "status": "idle"
-                }
-            else:
+                # Stop widget
+                widget_instance = self.widgets_instances[widget_name]
+                if guardian.widget_caps[widget_name]['stop']:
+                    widget_instance.stop()
+                    guardian.set_widget_enabled(widget_name, False)
+                    
+                    # Log event (queued through guardian's audit writer)
+                    guardian.log_event("WIDGET_DISABLED", widget_name)
+                    guardian.export_state()
+                    
+                    return {
+                        "success": True,
+                        "message": f"Widget '{widget_name}' stopped",
+                        "status": "idle"
+                    }
+                else:
+                    return {
+                        "success": False,
+                        "error": f"Widget '{widget_name}' has no stop() method"
+                    }
+                    
+            except Exception as e:
                 return {
                     "success": False,
-                    "error": f"Widget '{widget_name}' has no stop() method"
+                    "error": str(e)
                 }
-                
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
-    
+        
     def stream_logs(self, last_position: int = 0) -> Generator[str, None, None]:
         """
         Stream logs vanaf een bepaalde positie.
@@ -289,45 +408,66 @@ class GuardianBridge:
         Yields:
             str: Nieuwe log entries
         """
+        for batch in self.stream_log_batches(last_position):
+            yield from batch
+    
+    def stream_log_frames(self, last_position: int = 0) -> Generator[bytes, None, None]:
+        """
+        Zoals stream_log_batches, maar als kant-en-klare SSE bytes: een chunk
+        van 'data:' frames per poll, in een keer ge-encode.
+        """
+        for batch in self.stream_log_batches(last_position):
+            yield ("data: " + "\n\ndata: ".join(batch) + "\n\n").encode()
+    
+    def stream_log_batches(self, last_position: int = 0) -> Generator[List[str], None, None]:
+        """
+        Zoals stream_logs, maar levert per poll alle nieuwe entries als een lijst,
+        zodat de SSE-laag ze in een keer kan flushen.
+        """
         log_file = "logs/audit.log"
         
         if not os.path.exists(log_file):
-            yield json.dumps({
+            yield [json.dumps({
                 "log": "No log file found",
                 "timestamp": datetime.now().isoformat()
-            }) + "\n"
+            }) + "\n"]
             return
         
         try:
-            with open(log_file, "r", encoding="utf-8") as f:
+            with open(log_file, "rb") as f:
                 # Seek to last position
                 if last_position > 0:
                     f.seek(last_position)
                 
+                partial = b""  # Unterminated last line, completed by a later read
                 while True:
-                    line = f.readline()
-                    if line:
-                        yield json.dumps({
-                            "log": line.rstrip(),
-                            "timestamp": datetime.now().isoformat()
-                        }) + "\n"
+                    # Taken before reading, so a write racing the read still wakes us
+                    seen = _audit_log_watcher.watch()
+                    chunk = f.read(65536)
+                    if chunk:
+                        lines = (partial + chunk).split(b"\n")
+                        partial = lines.pop()
+                        if lines:
+                            # One timestamp per read; each entry is then two concatenations
+                            # (same bytes json.dumps({"log": ..., "timestamp": ...}) gives)
+                            suffix = ', "timestamp": "' + datetime.now().isoformat() + '"}\n'
+                            yield [
+                                '{"log": ' + _json_str(line.decode("utf-8", errors="replace").rstrip()) + suffix
+                                for line in lines
+                            ]
+                    elif os.fstat(f.fileno()).st_size < f.tell():
+                        # File was truncated or rotated, start from beginning
+                        f.seek(0)
+                        partial = b""
                     else:
-                        # Check file size for new content
-                        current_pos = f.tell()
-                        file_size = os.path.getsize(log_file)
-                        
-                        if file_size > current_pos:
-                            # File was truncated or rotated, start from beginning
-                            f.seek(0)
-                        else:
-                            # No new content, wait a bit
-                            import time
-                            time.sleep(0.5)
+                        # No new content: sleep until the file changes (the
+                        # timeout still bounds it if a notification is missed)
+                        _audit_log_watcher.wait(seen, 0.5)
         except Exception as e:
-            yield json.dumps({
+            yield [json.dumps({
                 "log": f"Error reading log: {str(e)}",
                 "timestamp": datetime.now().isoformat()
-            }) + "\n"
+            }) + "\n"]
     
     def send_chat_message(self, message: str) -> Dict[str, Any]:
         """
@@ -385,19 +525,30 @@ class GuardianBridge:
         Returns:
             list: Chat history entries
         """
-        history_file = "logs/chat_history.json"
-        
-        if not os.path.exists(history_file):
-            return []
+        history_file = "logs/chat_history.jsonl"
+        legacy_file = "logs/chat_history.json"
         
         try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                history = json.load(f)
-                return history[-limit:] if len(history) > limit else history
+            # A loaded chat widget may hold messages its saver has not written yet
+            # (dict.get: look up without importing the widget)
+            chat_widget = dict.get(self.widgets_instances, "ollama_chat") if self._guardian_loaded else None
+            if chat_widget is not None:
+                return chat_widget.get_chat_history(limit)
+            if os.path.exists(history_file):
+                # One JSON object per line: only the tail needs reading
+                lines = tail_lines(history_file, limit)
+                return [json.loads(line) for line in lines if line.strip()]
+            if os.path.exists(legacy_file):
+                # Not yet migrated by the chat widget
+                with open(legacy_file, "r", encoding="utf-8") as f:
+                    history = json.load(f)
+                return history[-limit:] if limit > 0 else []
+            return []
         except Exception as e:
-            print(f"Error loading chat history: {e}")
+            logger.error("Error loading chat history: %s", e)
             return []
     
+    @_ttl_cached(0.5)
     def get_system_status(self) -> Dict[str, Any]:
         """Haal overall system status op."""
         if not self._guardian_loaded:
@@ -439,12 +590,13 @@ class GuardianBridge:
                 "error": str(e)
             }
     
+    @_ttl_cached(0.5)
     def get_permission_level(self) -> Dict[str, Any]:
         """Haal huidige permission level op."""
         if not self._guardian_loaded or not self.master_orch:
             return {
                 "permission_level": "observe",
-                "available_levels": [p.value for p in PermissionLevel]
+                "available_levels": list(_PERMISSION_VALUES)
             }
         
         try:
@@ -455,7 +607,7 @@ class GuardianBridge:
             
             return {
                 "permission_level": level,
-                "available_levels": [p.value for p in PermissionLevel]
+                "available_levels": list(_PERMISSION_VALUES)
             }
         except Exception as e:
             return {
@@ -481,9 +633,8 @@ class GuardianBridge:
         
         try:
             # Convert string to PermissionLevel enum
-            try:
-                perm_level = PermissionLevel(level.lower())
-            except ValueError:
+            perm_level = PERMISSION_LEVEL_BY_VALUE.get(level.lower())
+            if perm_level is None:
                 return {
                     "success": False,
                     "error": f"Invalid permission level: {level}"
@@ -500,6 +651,7 @@ class GuardianBridge:
                     "error": "Permission system not available"
                 }
             
+            self._generation += 1
             return {
                 "success": True,
                 "permission_level": level.lower()
@@ -0,0 +1,627 @@
+"""
+Unit tests for core/ (agent utilities and orchestrators).
+Run: python -m unittest discover -s test
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import agent_utils
+from core.agent_utils import (
+    AuditLogger, AuditWriter, ConfigLoader, Decision, Event, EventQueue, ThreatLevel, tail_lines
+)
+from core.ollama_connector import OllamaConnector
+from core.orch_a import OrchA, _KeywordMatcher, _score_file_integrity, _score_file_integrity_batch, np
+from core.orchestrator import MasterOrchestrator
+
+
+def _close_audit_logger(audit_logger):
+    """Flush and detach a test AuditLogger from the shared logging.Logger."""
+    audit_logger.close()
+    audit_logger.logger.removeHandler(audit_logger.handler)
+    audit_logger._stream.close()
+
+
+class TestTailLines(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "log.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write(self, text):
+        with open(self.path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+
+    def test_last_n_lines(self):
+        self._write("".join(f"line {i}\n" for i in range(100)))
+        self.assertEqual(tail_lines(self.path, 3), ["line 97", "line 98", "line 99"])
+
+    def test_n_larger_than_file(self):
+        self._write("a\nb\n")
+        self.assertEqual(tail_lines(self.path, 10), ["a", "b"])
+
+    def test_non_positive_n(self):
+        self._write("a\nb\n")
+        self.assertEqual(tail_lines(self.path, 0), [])
+        self.assertEqual(tail_lines(self.path, -1), [])
+
+    def test_small_blocks_match_full_read(self):
+        lines = [f"entry {i} " + "x" * (i % 7) for i in range(50)]
+        self._write("\n".join(lines) + "\n")
+        for n in (1, 5, 20, 50):
+            self.assertEqual(tail_lines(self.path, n, block=4), lines[-n:])
+
+    def test_no_trailing_newline(self):
+        self._write("first\nsecond\nthird")
+        self.assertEqual(tail_lines(self.path, 2), ["second", "third"])
+
+    def test_multibyte_split_across_blocks(self):
+        self._write("héllo wörld\n✅ done\n")
+        self.assertEqual(tail_lines(self.path, 2, block=3), ["héllo wörld", "✅ done"])
+
+    def test_empty_file(self):
+        self._write("")
+        self.assertEqual(tail_lines(self.path, 5), [])
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            tail_lines(os.path.join(self.tmpdir, "missing.txt"), 5)
+
+
+def _event(n, source="file_integrity"):
+    return Event("test", source, {"path": f"/tmp/file{n}.txt", "event_type": "modified"})
+
+
+class TestEventQueue(unittest.TestCase):
+
+    def test_pop_in_order(self):
+        q = EventQueue()
+        events = [_event(i) for i in range(3)]
+        for event in events:
+            q.push(event)
+        self.assertEqual([q.pop() for _ in range(3)], events)
+        self.assertIsNone(q.pop())
+
+    def test_processed_events_skipped(self):
+        q = EventQueue()
+        first, second = _event(1), _event(2)
+        q.push(first)
+        q.push(second)
+        first.processed = True
+        self.assertIs(q.pop(), second)
+        self.assertIsNone(q.pop())
+
+    def test_pop_timeout_when_empty(self):
+        q = EventQueue()
+        start = time.monotonic()
+        self.assertIsNone(q.pop(timeout=0.05))
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_pop_woken_by_push(self):
+        q = EventQueue()
+        event = _event(1)
+        timer = threading.Timer(0.05, q.push, args=(event,))
+        timer.start()
+        try:
+            self.assertIs(q.pop(timeout=5.0), event)
+        finally:
+            timer.cancel()
+
+    def test_bounded(self):
+        q = EventQueue(max_size=3)
+        events = [_event(i) for i in range(5)]
+        for event in events:
+            q.push(event)
+        self.assertEqual(list(q.queue), events[2:])
+        self.assertEqual(q.get_all_unprocessed(), events[2:])
+
+    def test_drain_batch_respects_max_n(self):
+        q = EventQueue()
+        events = [_event(i) for i in range(10)]
+        for event in events:
+            q.push(event)
+        self.assertEqual(q.drain_batch(4), events[:4])
+        self.assertEqual(q.drain_batch(100), events[4:])
+        self.assertEqual(q.drain_batch(), [])
+
+    def test_drain_batch_skips_processed(self):
+        q = EventQueue()
+        events = [_event(i) for i in range(4)]
+        for event in events:
+            q.push(event)
+        events[1].processed = True
+        self.assertEqual(q.drain_batch(), [events[0], events[2], events[3]])
+        # Drained events are gone from the pending queue, not just flagged
+        self.assertIsNone(q.pop())
+
+    def test_eviction_cost_is_linear(self):
+        # Regression: trimming with a list slice copied max_size items per push
+        def per_push_seconds(max_size):
+            n = 10 * max_size
+            event = _event(0)
+            best = float("inf")
+            for _ in range(3):
+                q = EventQueue(max_size=max_size)
+                start = time.perf_counter()
+                for _ in range(n):
+                    q.push(event)
+                best = min(best, time.perf_counter() - start)
+                self.assertEqual(len(q.queue), max_size)
+            return best / n
+
+        small, large = per_push_seconds(500), per_push_seconds(5000)
+        # Constant per push; the quadratic trim made this ratio ~10x
+        self.assertLess(large / small, 4)
+
+
+class TestAuditWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "audit.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_lines_written_in_order(self):
+        writer = AuditWriter(self.path)
+        lines = [f"line {i}\n" for i in range(1000)]
+        for line in lines:
+            writer.write(line)
+        writer.close()
+        self.assertEqual(self._read(), "".join(lines))
+        self.assertEqual(writer.dropped, 0)
+
+    def test_appends_to_existing_file(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("existing\n")
+        writer = AuditWriter(self.path)
+        writer.write("new\n")
+        writer.close()
+        self.assertEqual(self._read(), "existing\nnew\n")
+
+    def test_full_queue_counts_dropped(self):
+        writer = AuditWriter(self.path, max_queue=1)
+        gate = threading.Event()
+        # Hold the writer thread inside its first write so the queue fills up
+        original = writer._write_lines
+        writer._write_lines = lambda fd, chunks: (gate.wait(5.0), original(fd, chunks))
+        writer.write("first\n")
+        deadline = time.monotonic() + 5.0
+        while not writer._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.write("queued\n")
+        writer.write("dropped\n")
+        self.assertEqual(writer.dropped, 1)
+        gate.set()
+        writer.close()
+        self.assertEqual(self._read(), "first\nqueued\n")
+
+    def _write_lines(self, chunks):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            AuditWriter._write_lines(fd, chunks)
+        finally:
+            os.close(fd)
+
+    def test_write_lines_finishes_short_writev(self):
+        real_write = os.write
+        chunks = [b"alpha\n", b"beta\n", b"gamma\n"]
+        # writev that only gets the first chunk out, then os.write 3 bytes at a time
+        with mock.patch.object(os, "writev", lambda fd, bufs: real_write(fd, bufs[0]), create=True), \
+                mock.patch.object(os, "write", lambda fd, data: real_write(fd, bytes(data[:3]))):
+            self._write_lines(chunks)
+        self.assertEqual(self._read(), "alpha\nbeta\ngamma\n")
+
+    def test_write_lines_without_writev(self):
+        with mock.patch.object(os, "writev", create=True):
+            del os.writev  # As on Windows
+            self._write_lines([b"one\n", b"two\n"])
+        self.assertEqual(self._read(), "one\ntwo\n")
+
+
+class TestConfigLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "manifest.yaml")
+        ConfigLoader.reload()
+
+    def tearDown(self):
+        ConfigLoader.reload()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write(self, text, mtime):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_parsed_once_per_mtime(self):
+        self._write("widgets:\n  - file_integrity\n", 1_000_000)
+        with mock.patch.object(agent_utils, "_load_yaml", wraps=agent_utils._load_yaml) as load:
+            first = ConfigLoader.load_manifest(self.path)
+            second = ConfigLoader.load_manifest(self.path)
+        self.assertEqual(first, {"widgets": ["file_integrity"]})
+        self.assertEqual(second, first)
+        self.assertEqual(load.call_count, 1)
+
+    def test_edit_on_disk_is_picked_up(self):
+        self._write("level: 1\n", 1_000_000)
+        self.assertEqual(ConfigLoader.load_manifest(self.path), {"level": 1})
+        self._write("level: 2\n", 2_000_000)
+        self.assertEqual(ConfigLoader.load_manifest(self.path), {"level": 2})
+
+    def test_callers_get_copies(self):
+        self._write("widgets:\n  - file_integrity\n", 1_000_000)
+        ConfigLoader.load_manifest(self.path)["widgets"].append("tampered")
+        self.assertEqual(ConfigLoader.load_manifest(self.path), {"widgets": ["file_integrity"]})
+
+    def test_missing_user_config_defaults(self):
+        missing = os.path.join(self.tmpdir, "user_config.yaml")
+        with self.assertLogs(level="WARNING"):
+            config = ConfigLoader.load_user_config(missing)
+        self.assertEqual(config["permission_level"], "observe")
+        config["permission_level"] = "auto_respond"
+        self.assertEqual(ConfigLoader.load_user_config(missing)["permission_level"], "observe")
+
+    def test_reload_rereads(self):
+        self._write("level: 1\n", 1_000_000)
+        ConfigLoader.load_manifest(self.path)
+        with mock.patch.object(agent_utils, "_load_yaml", wraps=agent_utils._load_yaml) as load:
+            ConfigLoader.reload()
+            ConfigLoader.load_manifest(self.path)
+        self.assertEqual(load.call_count, 1)
+
+
+def _baseline_score(event):
+    """The original if/elif heuristics OrchA._score_event was refactored from."""
+    payload = event.payload
+    base_score = 0
+
+    if event.source == "file_integrity":
+        event_type = payload.get("event_type", "")
+        path = payload.get("path", "").lower()
+        if event_type == "modified":
+            base_score = 40
+        elif event_type in ["created", "deleted"]:
+            base_score = 30
+        if any(x in path for x in ["system32", "windows", "program files"]):
+            base_score += 30
+        elif any(x in path for x in [".exe", ".dll", ".sys"]):
+            base_score += 20
+        return min(base_score, 100)
+
+    elif event.source == "process_monitor":
+        process_name = payload.get("name", "").lower()
+        suspicious = ["powershell", "cmd.exe", "wscript", "cscript", "regsrv32"]
+        if any(x in process_name for x in suspicious):
+            base_score = 70
+        else:
+            base_score = 25
+        if "parent" in payload:
+            if payload["parent"] in suspicious:
+                base_score += 20
+        return min(base_score, 100)
+
+    elif event.source == "network_sniffer":
+        remote_addr = payload.get("remote_address", "")
+        process = payload.get("process", "").lower()
+        if any(x in process for x in ["powershell", "cmd", "wscript"]):
+            base_score = 75
+        if any(x in remote_addr for x in ["8.8.8.8", "1.1.1.1", "127.0.0.1"]):
+            base_score = max(base_score - 30, 0)
+        return min(base_score, 100)
+
+    elif event.source == "windows_defender":
+        threats_found = payload.get("threats_found", 0)
+        if threats_found > 0:
+            base_score = 80 + min(threats_found * 5, 20)
+        else:
+            base_score = 10
+        return min(base_score, 100)
+
+    elif event.source == "rrnc":
+        action = payload.get("action", "")
+        if action in ["process_kill", "quarantine"]:
+            base_score = 85
+        elif action == "capture_forensics":
+            base_score = 75
+        return min(base_score, 100)
+
+    return 45
+
+
+def _baseline_level(score):
+    if score < 60:
+        return ThreatLevel.LOW
+    elif score < 85:
+        return ThreatLevel.MEDIUM
+    return ThreatLevel.HIGH
+
+
+def _baseline_factors(event):
+    """The original _get_score_factors breakdown."""
+    payload = event.payload
+    factors = {}
+    if event.source == "file_integrity":
+        path = payload.get("path", "").lower()
+        if "system" in path:
+            factors["system_path"] = 0.8
+        if ".exe" in path or ".dll" in path:
+            factors["executable"] = 0.7
+        factors["modification"] = 0.6
+    elif event.source == "process_monitor":
+        process = payload.get("name", "").lower()
+        if "powershell" in process or "cmd" in process:
+            factors["suspicious_process"] = 0.9
+    elif event.source == "network_sniffer":
+        factors["network_activity"] = 0.6
+    return factors
+
+
+def _sample_events():
+    events = []
+    paths = [
+        "C:\\Windows\\System32\\drivers\\etc\\hosts", "C:\\Program Files\\App\\app.EXE",
+        "/home/user/notes.txt", "/opt/lib/plugin.dll", "/boot/driver.sys", "D:\\data\\report.docx",
+    ]
+    for path in paths:
+        for event_type in ("modified", "created", "deleted", "renamed"):
+            events.append(Event("file", "file_integrity", {"path": path, "event_type": event_type}))
+    for name in ("PowerShell.exe", "cmd.exe", "wscript.exe", "notepad.exe", "regsrv32.exe"):
+        for parent in (None, "cmd.exe", "explorer.exe"):
+            payload = {"name": name}
+            if parent:
+                payload["parent"] = parent
+            events.append(Event("process", "process_monitor", payload))
+    for process in ("powershell.exe", "chrome.exe", "CMD.EXE"):
+        for remote in ("8.8.8.8:53", "203.0.113.5:443", "127.0.0.1:8080"):
+            events.append(Event("net", "network_sniffer", {"process": process, "remote_address": remote}))
+    for threats in (0, 1, 3, 10):
+        events.append(Event("scan", "windows_defender", {"threats_found": threats, "scan_type": "quick"}))
+    for action in ("process_kill", "quarantine", "capture_forensics", "noop"):
+        events.append(Event("rrnc", "rrnc", {"action": action}))
+    events.append(Event("other", "unknown_widget", {"anything": 1}))
+    return events
+
+
+class TestOrchAScoring(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.audit_logger = AuditLogger(os.path.join(cls.tmpdir, "audit.log"))
+        cls.orch = OrchA(cls.audit_logger)
+
+    @classmethod
+    def tearDownClass(cls):
+        _close_audit_logger(cls.audit_logger)
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def test_score_matches_baseline_heuristics(self):
+        for event in _sample_events():
+            with self.subTest(source=event.source, payload=event.payload):
+                self.assertEqual(self.orch._score_event(event), _baseline_score(event))
+
+    def test_factors_match_baseline(self):
+        for event in _sample_events():
+            with self.subTest(source=event.source, payload=event.payload):
+                self.assertEqual(self.orch._get_score_factors(event), _baseline_factors(event))
+
+    def test_memoized_score_is_stable(self):
+        for event in _sample_events():
+            first = self.orch._score_and_factors(event)
+            again = Event(event.event_type, event.source, dict(event.payload, timestamp=123.0))
+            self.assertEqual(self.orch._score_and_factors(again), first)
+
+    def test_memoized_factors_are_copies(self):
+        event = Event("file", "file_integrity", {"path": "C:\\Windows\\x.dll", "event_type": "modified"})
+        self.orch._get_score_factors(event)["tampered"] = 1.0
+        self.assertNotIn("tampered", self.orch._get_score_factors(event))
+
+    def test_unhashable_payload_scored_without_cache(self):
+        event = Event("file", "file_integrity",
+                      {"path": "C:\\Windows\\x.dll", "event_type": "modified", "tags": ["a", "b"]})
+        self.assertEqual(self.orch._score_event(event), _baseline_score(event))
+
+    def test_score_batch_matches_per_event(self):
+        events = _sample_events() * 3  # Enough file_integrity events for the NumPy path
+        self.assertEqual(self.orch.score_batch(events), [self.orch._score_event(e) for e in events])
+        self.assertEqual(self.orch.score_batch([]), [])
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_vectorized_file_scoring_matches_scalar(self):
+        payloads = [e.payload_lower for e in _sample_events() if e.source == "file_integrity"]
+        self.assertEqual(_score_file_integrity_batch(payloads), [_score_file_integrity(p) for p in payloads])
+
+    def test_threat_level_boundaries(self):
+        for score in range(0, 101):
+            self.assertEqual(self.orch._assign_threat_level(score), _baseline_level(score))
+
+    def test_classify_batch_matches_per_score(self):
+        scores = list(range(0, 101))
+        self.assertEqual(self.orch.classify_batch(scores), [_baseline_level(s) for s in scores])
+        self.assertEqual(self.orch.classify_batch([]), [])
+
+    def test_analyze_event_keeps_full_shape_for_low(self):
+        event = Event("file", "file_integrity", {"path": "/home/user/notes.txt", "event_type": "created"})
+        analysis = self.orch.analyze_event(event)
+        self.assertEqual(analysis["threat_level"], ThreatLevel.LOW.value)
+        for key in ("source", "event_type", "factors", "timestamp", "reasoning"):
+            self.assertIn(key, analysis)
+        compact = self.orch.analyze_event(event, compact_low=True)
+        self.assertEqual(set(compact), {"event_id", "threat_level", "confidence_score"})
+
+    def test_keyword_matcher_reports_nested_keywords(self):
+        matcher = _KeywordMatcher({"cmd.exe": "launcher", "cmd": "shell", ".exe": ("binary", "factor:binary")})
+        self.assertEqual(matcher.tags("c:\\cmd.exe /c dir"), {"launcher", "shell", "binary", "factor:binary"})
+        self.assertEqual(matcher.tags("cmdline.txt"), {"shell"})
+        self.assertEqual(matcher.tags("notepad"), frozenset())
+
+
+class TestOllamaBatchAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        # Nothing listens on the discard port, so the connection probe fails fast
+        self.connector = OllamaConnector(base_url="http://127.0.0.1:9")
+        self.events = [{"event_id": "file_integrity_1"}, {"event_id": "process_monitor_2"}]
+
+    def _analyze(self, reply):
+        with mock.patch.object(self.connector, "chat", return_value=reply) as chat:
+            result = self.connector.analyze_security_events(self.events)
+        chat.assert_called_once()
+        return result
+
+    def test_array_wrapped_in_prose(self):
+        reply = (
+            'Here is my analysis:\n[{"event_id": "file_integrity_1", "threat_level": "HIGH", '
+            '"reasoning": "system binary [replaced]"}, {"event_id": "process_monitor_2", '
+            '"threat_level": "low"}]\nStay safe.'
+        )
+        self.assertEqual(self._analyze(reply), {
+            "file_integrity_1": {"threat_level": "high", "reasoning": "system binary [replaced]"},
+            "process_monitor_2": {"threat_level": "low", "reasoning": ""},
+        })
+
+    def test_entries_without_id_skipped(self):
+        reply = '[{"threat_level": "high"}, "noise", {"event_id": 7, "threat_level": "Medium"}]'
+        self.assertEqual(self._analyze(reply), {"7": {"threat_level": "medium", "reasoning": ""}})
+
+    def test_unparseable_replies(self):
+        for reply in ("No response returned", "] backwards [", "[not json]"):
+            with self.subTest(reply=reply):
+                self.assertIsNone(self._analyze(reply))
+
+    def test_no_events_skips_the_call(self):
+        with mock.patch.object(self.connector, "chat") as chat:
+            self.assertEqual(self.connector.analyze_security_events([]), {})
+        chat.assert_not_called()
+
+
+class _StubConnector:
+    is_connected = True
+
+    def __init__(self, results):
+        self.results = results
+
+    def analyze_security_events(self, events):
+        return self.results(events) if callable(self.results) else self.results
+
+
+class TestOrchALLMRefinement(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.audit_logger = AuditLogger(os.path.join(cls.tmpdir, "audit.log"))
+
+    @classmethod
+    def tearDownClass(cls):
+        _close_audit_logger(cls.audit_logger)
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        self.events = [
+            Event("file", "file_integrity", {"path": "/home/user/notes.txt", "event_type": "created"}),
+            Event("process", "process_monitor", {"name": "powershell.exe"}),
+        ]
+
+    def _analyze(self, results):
+        return OrchA(self.audit_logger, connector=_StubConnector(results)).analyze_batch(self.events)
+
+    def test_llm_levels_and_reasoning_applied(self):
+        first, second = (e.event_id for e in self.events)
+        analyses = self._analyze({
+            first: {"threat_level": "critical", "reasoning": "ransomware note"},
+            second: {"threat_level": "bogus", "reasoning": ""},
+        })
+        self.assertEqual(analyses[0]["threat_level"], ThreatLevel.HIGH.value)
+        self.assertEqual(analyses[0]["reasoning"], "ransomware note")
+        # Unknown levels and empty reasoning keep the heuristic values
+        self.assertEqual(analyses[1]["threat_level"], ThreatLevel.MEDIUM.value)
+        self.assertIn("scored 70%", analyses[1]["reasoning"])
+
+    def test_unparseable_reply_keeps_heuristics(self):
+        heuristic = OrchA(self.audit_logger).analyze_batch(self.events)
+        analyses = self._analyze(None)
+        self.assertEqual([a["threat_level"] for a in analyses], [a["threat_level"] for a in heuristic])
+
+    def test_connector_factory_called_once(self):
+        factory = mock.Mock(return_value=_StubConnector({}))
+        orch = OrchA(self.audit_logger, connector_factory=factory)
+        orch.analyze_batch([])
+        factory.assert_not_called()
+        orch.analyze_batch(self.events)
+        orch.analyze_batch(self.events)
+        factory.assert_called_once_with()
+
+    def test_connector_factory_import_error(self):
+        orch = OrchA(self.audit_logger, connector_factory=mock.Mock(side_effect=ImportError))
+        self.assertEqual(len(orch.analyze_batch(self.events)), 2)
+        self.assertIsNone(orch.connector)
+
+
+class _RecordingDispatcher:
+    def __init__(self):
+        self.actions = []
+
+    def execute_action(self, widget, action, **payload):
+        self.actions.append((widget, action))
+        return {"status": "ok"}
+
+
+class TestActionMap(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.audit_logger = AuditLogger(os.path.join(cls.tmpdir, "audit.log"))
+
+    @classmethod
+    def tearDownClass(cls):
+        _close_audit_logger(cls.audit_logger)
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        self.dispatcher = _RecordingDispatcher()
+        self.orch = MasterOrchestrator(self.audit_logger, dispatcher=self.dispatcher, config={})
+
+    def _widget_action(self, action, source):
+        event = Event("test", source, {"path": "/tmp/x"})
+        self.orch._execute_action(Decision("OrchA", action), event, {})
+        return self.dispatcher.actions[-1]
+
+    def test_quarantine_per_source(self):
+        self.assertEqual(self._widget_action("quarantine", "file_integrity"), ("file_integrity", "quarantine"))
+        self.assertEqual(self._widget_action("quarantine", "process_monitor"), ("process_monitor", "kill_process"))
+        self.assertEqual(self._widget_action("quarantine", "network_sniffer"), ("network_sniffer", "block_ip"))
+
+    def test_alert_and_escalate_are_log_only(self):
+        # The original table keyed these on a literal "all" source, so real widgets never matched
+        for action in ("alert", "escalate"):
+            for source in ("file_integrity", "process_monitor", "rrnc"):
+                with self.subTest(action=action, source=source):
+                    self.assertEqual(self._widget_action(action, source), (source, "log_only"))
+
+    def test_unknown_action_is_log_only(self):
+        self.assertEqual(self._widget_action("quarantine", "windows_defender"), ("windows_defender", "log_only"))
+        self.assertEqual(self._widget_action("reboot", "file_integrity"), ("file_integrity", "log_only"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,598 @@
+"""
+Unit tests for widgets/ and the guardian.py widget controls.
+Run: python -m unittest discover -s test
+"""
+
+import contextlib
+import errno
+import io
+import json
+import os
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import unittest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from widgets import file_integrity, network_sniffer, process_monitor
+from widgets.ollama_chat import OllamaChatWidget
+from widgets.windows_defender import WindowsDefenderWidget
+
+
+class _TempCwdTestCase(unittest.TestCase):
+    """Widgets keep their files under ./logs; run each test in a fresh directory."""
+
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.tmpdir = tempfile.mkdtemp()
+        os.chdir(self.tmpdir)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+class TestWindowsDefenderCustomScan(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = WindowsDefenderWidget({"verbose": False})
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.widget.start()
+
+    def test_existing_path(self):
+        result = self.widget.custom_scan(REPO_ROOT)
+        self.assertEqual(result["scan_type"], "custom")
+        self.assertEqual(self.widget.get_recent_events(1)[0]["path"], REPO_ROOT)
+
+    def test_missing_path(self):
+        result = self.widget.custom_scan(os.path.join(REPO_ROOT, "does-not-exist"))
+        self.assertEqual(result["status"], "Path does not exist")
+        self.assertEqual(result["result"], "failed")
+
+    def test_inaccessible_path(self):
+        denied = PermissionError(13, "Permission denied")
+        with mock.patch("widgets.windows_defender.os.stat", side_effect=denied):
+            result = self.widget.custom_scan("/root/secret")
+        self.assertEqual(result["status"], "Path not accessible: Permission denied")
+        self.assertEqual(result["result"], "failed")
+
+
+class TestWindowsDefenderVerbose(unittest.TestCase):
+
+    def _scan_output(self, widget):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            widget.quick_scan()
+            widget.full_scan()
+            widget.custom_scan(REPO_ROOT)
+            widget.quarantine_threat("/tmp/evil.exe")
+        return out.getvalue()
+
+    def _started(self, config):
+        widget = WindowsDefenderWidget(config)
+        with contextlib.redirect_stdout(io.StringIO()):
+            widget.start()
+        return widget
+
+    def test_quiet_widget_prints_nothing_per_scan(self):
+        widget = self._started({"verbose": False})
+        self.assertEqual(self._scan_output(widget), "")
+        self.assertEqual([e["action"] for e in widget.get_recent_events(4)],
+                         ["quick_scan", "full_scan", "custom_scan", "quarantine_threat"])
+
+    def test_verbose_widget_prints_banners(self):
+        output = self._scan_output(self._started({"verbose": True}))
+        self.assertIn("Quick scan complete", output)
+        self.assertIn("Full scan complete", output)
+        self.assertIn("Threat quarantined: /tmp/evil.exe", output)
+
+    def test_verbose_defaults_to_environment(self):
+        with mock.patch("widgets.windows_defender._VERBOSE_DEFAULT", False):
+            self.assertFalse(WindowsDefenderWidget().verbose)
+        with mock.patch("widgets.windows_defender._VERBOSE_DEFAULT", True):
+            self.assertTrue(WindowsDefenderWidget().verbose)
+
+
+class _FakeNetlinkSocket:
+    """Stands in for the AF_NETLINK socket: records the request, replays datagrams."""
+
+    def __init__(self, datagrams):
+        self.datagrams = list(datagrams)
+        self.sent = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def sendall(self, data):
+        self.sent += data
+
+    def recv(self, size):
+        return self.datagrams.pop(0) if self.datagrams else b""
+
+
+def _diag_msg(family, src, sport, dst, dport, inode, trailing=b""):
+    """One SOCK_DIAG_BY_FAMILY reply (nlmsghdr + inet_diag_msg + attributes)."""
+    src = socket.inet_pton(family, src).ljust(16, b"\0")
+    dst = socket.inet_pton(family, dst).ljust(16, b"\0")
+    body = network_sniffer._DIAG_MSG.pack(
+        family, 1, 0, 0, sport.to_bytes(2, "big"), dport.to_bytes(2, "big"), src, dst, 0, 0, 0, 0, 1000, inode
+    ) + trailing
+    length = network_sniffer._NLMSGHDR.size + len(body)
+    padding = b"\0" * (-length % 4)
+    return network_sniffer._NLMSGHDR.pack(length, 20, 2, 1, 0) + body + padding
+
+
+def _nlmsg(msg_type, payload=b"\0" * 4):
+    return network_sniffer._NLMSGHDR.pack(network_sniffer._NLMSGHDR.size + len(payload), msg_type, 0, 1, 0) + payload
+
+
+class TestSockDiag(unittest.TestCase):
+
+    def _run(self, family, datagrams):
+        fake = _FakeNetlinkSocket(datagrams)
+        with mock.patch.object(network_sniffer.socket, "socket", return_value=fake):
+            return network_sniffer._diag_established(family), fake
+
+    def test_ipv4_replies_across_datagrams(self):
+        first = _diag_msg(socket.AF_INET, "10.0.0.5", 50000, "93.184.216.34", 443, 111, trailing=b"\x05\0\0\0\x01")
+        second = _diag_msg(socket.AF_INET, "127.0.0.1", 8080, "127.0.0.1", 41000, 222)
+        conns, fake = self._run(socket.AF_INET, [first + second, _nlmsg(3)])
+        self.assertEqual(conns, [
+            (111, ("10.0.0.5", 50000), ("93.184.216.34", 443)),
+            (222, ("127.0.0.1", 8080), ("127.0.0.1", 41000)),
+        ])
+        # Request: inet_diag_req_v2 for TCP, established state only
+        family, protocol, _, _, states = struct.unpack_from("=BBBBI", fake.sent, network_sniffer._NLMSGHDR.size)
+        self.assertEqual((family, protocol, states), (socket.AF_INET, socket.IPPROTO_TCP, 1 << 1))
+
+    def test_ipv6_addresses(self):
+        reply = _diag_msg(socket.AF_INET6, "2001:db8::1", 443, "::1", 60000, 333)
+        conns, _ = self._run(socket.AF_INET6, [reply + _nlmsg(3)])
+        self.assertEqual(conns, [(333, ("2001:db8::1", 443), ("::1", 60000))])
+
+    def test_error_reply_raises(self):
+        with self.assertRaises(OSError):
+            self._run(socket.AF_INET, [_nlmsg(2, struct.pack("=i", -1) + b"\0" * 16)])
+
+    def test_owners_resolved_only_for_new_inodes(self):
+        widget = network_sniffer.NetworkSnifferWidget()
+        a, b = ("10.0.0.5", 1), ("10.0.0.6", 2)
+        sweeps = [[(1, a, b), (2, a, b)], [(2, a, b), (3, a, b)]]
+        with mock.patch.object(network_sniffer, "_diag_established", side_effect=lambda family: list(sweeps[0])), \
+                mock.patch.object(network_sniffer.socket, "has_ipv6", False), \
+                mock.patch.object(network_sniffer, "_socket_owners", return_value={1: 100}) as owners:
+            self.assertEqual(widget._established_diag(), {1: (100, a, b), 2: (None, a, b)})
+            owners.assert_called_once_with([1, 2])
+            sweeps.pop(0)
+            owners.reset_mock()
+            owners.return_value = {3: 300}
+            self.assertEqual(widget._established_diag(), {2: (None, a, b), 3: (300, a, b)})
+            owners.assert_called_once_with([3])
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "Linux sock_diag")
+    def test_live_connection_listed(self):
+        with socket.create_server(("127.0.0.1", 0)) as server:
+            with socket.create_connection(server.getsockname()) as client:
+                peer, _ = server.accept()
+                with peer:
+                    try:
+                        conns = network_sniffer._diag_established(socket.AF_INET)
+                    except OSError as e:
+                        self.skipTest(f"sock_diag unavailable: {e}")
+                    pairs = {(laddr, raddr) for _, laddr, raddr in conns}
+                    self.assertIn((client.getsockname(), client.getpeername()), pairs)
+
+
+def _proc_event(what, pid, tgid, extra=b""):
+    """One proc connector datagram part: nlmsghdr + cn_msg + proc_event."""
+    event = process_monitor._PROC_EVENT.pack(what, 0, 123456789, pid, tgid) + extra
+    cn_msg = process_monitor._CN_MSG.pack(1, 1, 0, 0, len(event), 0) + event
+    length = process_monitor._NLMSGHDR.size + len(cn_msg)
+    return process_monitor._NLMSGHDR.pack(length, 3, 0, 0, 0) + cn_msg + b"\0" * (-length % 4)
+
+
+class _FakeProcConnector:
+    """Replays datagrams, then stops the widget; items may be exceptions to raise."""
+
+    def __init__(self, widget, datagrams):
+        self.widget = widget
+        self.datagrams = list(datagrams)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, size):
+        if not self.datagrams:
+            self.widget.active = False
+            raise socket.timeout
+        item = self.datagrams.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+class TestProcConnector(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = process_monitor.ProcessMonitorWidget()
+        self.widget.active = True
+        self.recorded = []
+        self.widget._record = self.recorded.append
+
+    def _watch(self, datagrams):
+        return self.widget._watch_proc_events(_FakeProcConnector(self.widget, datagrams))
+
+    def test_exec_events_recorded(self):
+        fork = _proc_event(0x1, 10, 10, extra=b"\0" * 8)
+        thread_exec = _proc_event(0x2, 21, 20)
+        datagram = _proc_event(0x2, 30, 30) + fork + thread_exec + _proc_event(0x2, 40, 40, extra=b"\x01")
+        self.assertTrue(self._watch([datagram, _proc_event(0x2, 50, 50)]))
+        self.assertEqual(self.recorded, [30, 40, 50])
+
+    def test_truncated_datagram_ignored(self):
+        self.assertTrue(self._watch([_proc_event(0x2, 30, 30)[:-8]]))
+        self.assertEqual(self.recorded, [])
+
+    def test_overflow_keeps_listening(self):
+        overflow = OSError(errno.ENOBUFS, "No buffer space available")
+        self.assertTrue(self._watch([overflow, _proc_event(0x2, 30, 30)]))
+        self.assertEqual(self.recorded, [30])
+
+    def test_socket_failure_falls_back(self):
+        self.assertFalse(self._watch([OSError(errno.EBADF, "Bad file descriptor")]))
+
+    def test_subscription_message(self):
+        sock = mock.Mock()
+        with mock.patch.object(process_monitor.sys, "platform", "linux"), \
+                mock.patch.object(process_monitor.os, "geteuid", return_value=0, create=True), \
+                mock.patch.object(process_monitor.socket, "socket", return_value=sock):
+            self.assertIs(process_monitor._proc_connector(), sock)
+        sock.bind.assert_called_once_with((0, 1))
+        sent = sock.send.call_args[0][0]
+        length, msg_type = process_monitor._NLMSGHDR.unpack_from(sent)[:2]
+        self.assertEqual((length, msg_type), (len(sent), 3))
+        idx, val, _, _, op_len, _ = process_monitor._CN_MSG.unpack_from(sent, process_monitor._NLMSGHDR.size)
+        self.assertEqual((idx, val, op_len), (1, 1, 4))
+        self.assertEqual(sent[-4:], struct.pack("=I", 1))  # PROC_CN_MCAST_LISTEN
+
+    def test_not_root_keeps_polling(self):
+        with mock.patch.object(process_monitor.sys, "platform", "linux"), \
+                mock.patch.object(process_monitor.os, "geteuid", return_value=1000, create=True), \
+                mock.patch.object(process_monitor.socket, "socket") as sock:
+            self.assertIsNone(process_monitor._proc_connector())
+        sock.assert_not_called()
+
+
+class TestFileEventCoalescing(_TempCwdTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.widget = file_integrity.FileIntegrityWidget({"watch_paths": [self.tmpdir]})
+        self.clock = mock.Mock()
+        self.clock.monotonic.return_value = 100.0
+        self.clock.time.return_value = 1_700_000_000.0
+        patcher = mock.patch.object(file_integrity, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = os.path.join(self.tmpdir, "report.txt")
+
+    def _at(self, seconds, event_type, path=None):
+        self.clock.monotonic.return_value = 100.0 + seconds
+        self.widget.record_event(event_type, path or self.path)
+
+    def _recorded(self):
+        return [(e["event_type"], e["path"]) for e in self.widget.get_events()]
+
+    def test_burst_recorded_once(self):
+        for i in range(10):
+            self._at(i * 0.005, "modified")
+        self.assertEqual(self._recorded(), [("modified", self.path)])
+
+    def test_recorded_again_after_window(self):
+        self._at(0, "modified")
+        self._at(2 * file_integrity.FileIntegrityWidget.COALESCE_WINDOW, "modified")
+        self.assertEqual(len(self._recorded()), 2)
+
+    def test_other_event_type_or_path_not_coalesced(self):
+        other = os.path.join(self.tmpdir, "other.txt")
+        self._at(0, "created")
+        self._at(0.01, "modified")
+        self._at(0.02, "modified", other)
+        self._at(0.03, "deleted")
+        self.assertEqual(self._recorded(), [
+            ("created", self.path), ("modified", self.path), ("modified", other), ("deleted", self.path),
+        ])
+
+    def test_remembered_paths_bounded(self):
+        limit = file_integrity.FileIntegrityWidget.COALESCE_PATHS
+        for i in range(limit + 10):
+            self._at(0, "modified", os.path.join(self.tmpdir, f"f{i}"))
+        self.assertLessEqual(len(self.widget._last_seen), limit)
+
+    def test_handler_drops_directories_and_churn(self):
+        handler = file_integrity.FileIntegrityHandler(self.widget)
+        event = mock.Mock(is_directory=False)
+        for path, wanted in ((self.path, True),
+                             (os.path.join(self.tmpdir, "notes.txt.swp"), False),
+                             (os.path.join(self.tmpdir, ".git", "index"), False)):
+            event.src_path = path
+            with self.subTest(path=path):
+                self.assertEqual(handler._wanted(event), wanted)
+        event.is_directory = True
+        event.src_path = self.tmpdir
+        self.assertFalse(handler._wanted(event))
+
+
+_GUARDIAN_DIR = None
+
+
+def _guardian_dir():
+    global _GUARDIAN_DIR
+    if _GUARDIAN_DIR is None:
+        _GUARDIAN_DIR = tempfile.mkdtemp()
+    return _GUARDIAN_DIR
+
+
+def tearDownModule():
+    guardian = sys.modules.get("guardian")
+    if guardian is not None and guardian.audit_writer is not None:
+        guardian.audit_writer.close()
+    if _GUARDIAN_DIR is not None:
+        shutil.rmtree(_GUARDIAN_DIR, ignore_errors=True)
+
+
+class _GuardianTestCase(unittest.TestCase):
+    """guardian.py writes logs/ and guardian_state.json to the working directory; keep them in a temp dir."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.old_cwd = os.getcwd()
+        os.chdir(_guardian_dir())
+        with contextlib.redirect_stdout(io.StringIO()):
+            import guardian
+        cls.guardian = guardian
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.old_cwd)
+
+
+class TestParseSelection(_GuardianTestCase):
+
+    OPTIONS = ["file_integrity", "network_sniffer", "ollama_chat", "process_monitor"]
+
+    def _parse(self, selection):
+        return self.guardian.parse_selection(selection, self.OPTIONS)
+
+    def test_single_and_list(self):
+        self.assertEqual(self._parse("2"), ["network_sniffer"])
+        self.assertEqual(self._parse("3, 1"), ["ollama_chat", "file_integrity"])
+
+    def test_ranges(self):
+        self.assertEqual(self._parse("1-3"), self.OPTIONS[:3])
+        self.assertEqual(self._parse("2 - 2"), ["network_sniffer"])
+        self.assertEqual(self._parse("3-1"), [])
+
+    def test_duplicates_keep_first_position(self):
+        self.assertEqual(self._parse("2,1-3,2"), ["network_sniffer", "file_integrity", "ollama_chat"])
+
+    def test_out_of_range_clamped(self):
+        self.assertEqual(self._parse("0,4-99999"), ["process_monitor"])
+        self.assertEqual(self._parse("7"), [])
+
+    def test_paste_markers_ignored(self):
+        self.assertEqual(self._parse("\x1b[200~1,2\x1b[201~"), self.OPTIONS[:2])
+
+    def test_invalid_input(self):
+        for selection in ("", "all", "1;2", "1.5"):
+            with self.subTest(selection=selection):
+                with self.assertRaises(ValueError):
+                    self._parse(selection)
+
+    def test_separators_only_select_nothing(self):
+        self.assertEqual(self._parse(" , - "), [])
+
+
+class TestCoerceParam(_GuardianTestCase):
+
+    def test_matches_baseline_int_then_float_then_str(self):
+        def baseline(val):
+            try:
+                return int(val)
+            except ValueError:
+                try:
+                    return float(val)
+                except ValueError:
+                    return val
+
+        for val in ("42", "-7", "+3", "007", "3.5", "-0.25", ".5", "5.", "1e3", "2.5E-2",
+                    "C:\\Temp", "/tmp/x", "abc", "1.2.3", "0x1f", ""):
+            with self.subTest(val=val):
+                result = self.guardian._coerce_param(val)
+                self.assertEqual(result, baseline(val))
+                self.assertIs(type(result), type(baseline(val)))
+
+    def test_python_only_literals_stay_strings(self):
+        # int()/float() accept these, but as action parameters they are names, not numbers
+        for val in ("nan", "inf", "-Infinity", "1_000"):
+            self.assertEqual(self.guardian._coerce_param(val), val)
+
+
+class TestHandleControlCommand(_GuardianTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in list(cls.guardian._ENABLED):
+                cls.guardian.disable_widget_cli(name)
+        super().tearDownClass()
+
+    def _command(self, request):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.guardian.handle_control_command(request)
+
+    def test_unknown_command(self):
+        reply = self._command({"cmd": "reboot", "widget": "windows_defender"})
+        self.assertFalse(reply["ok"])
+        self.assertIn("unknown command", reply["error"])
+
+    def test_non_dict_request(self):
+        self.assertFalse(self._command(["enable", "windows_defender"])["ok"])
+
+    def test_state_of_known_widget(self):
+        reply = self._command({"cmd": "state", "widget": "windows_defender"})
+        self.assertEqual(reply, {"ok": True, "widget": "windows_defender",
+                                 "enabled": self.guardian.widget_state["windows_defender"]})
+
+    def test_unknown_widget(self):
+        for cmd in ("state", "enable", "disable"):
+            with self.subTest(cmd=cmd):
+                reply = self._command({"cmd": cmd, "widget": "no_such_widget"})
+                self.assertFalse(reply["ok"])
+                self.assertFalse(reply["enabled"])
+
+    def test_enable_then_disable(self):
+        reply = self._command({"cmd": "enable", "widget": "windows_defender"})
+        self.assertEqual(reply, {"ok": True, "widget": "windows_defender", "enabled": True})
+        self.assertIn("windows_defender", self.guardian._ENABLED)
+
+        # Repeating a command is accepted and leaves the state unchanged
+        self.assertTrue(self._command({"cmd": "enable", "widget": "windows_defender"})["enabled"])
+
+        reply = self._command({"cmd": "disable", "widget": "windows_defender"})
+        self.assertEqual(reply, {"ok": True, "widget": "windows_defender", "enabled": False})
+        self.assertNotIn("windows_defender", self.guardian._ENABLED)
+
+
+@unittest.skipIf(os.name == "nt", "Unix socket control channel")
+class TestControlServer(_GuardianTestCase):
+
+    def setUp(self):
+        # Publish keys into a private runtime dir, never the real user's
+        self.runtime = tempfile.mkdtemp()
+        os.chmod(self.runtime, 0o700)
+        env = mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": self.runtime})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(shutil.rmtree, self.runtime, True)
+
+        from core.control_channel import control_address, read_control_key
+        self.address = control_address()
+        self.listener = self.guardian.start_control_server()
+        self.assertIsNotNone(self.listener)
+        self.addCleanup(self.listener.close)
+        self.read_key = read_control_key
+
+    def test_round_trip(self):
+        with Client(self.address, authkey=self.read_key()) as conn:
+            conn.send_bytes(json.dumps({"cmd": "state", "widget": "windows_defender"}).encode())
+            self.assertTrue(conn.poll(5.0))
+            self.assertTrue(json.loads(conn.recv_bytes())["ok"])
+
+            conn.send_bytes(b"{not json")
+            self.assertTrue(conn.poll(5.0))
+            self.assertEqual(json.loads(conn.recv_bytes()), {"ok": False, "error": "invalid JSON"})
+
+    def test_wrong_key_rejected(self):
+        with self.assertRaises(AuthenticationError):
+            Client(self.address, authkey=b"x" * 32)
+        # The listener keeps serving clients with the right key
+        with Client(self.address, authkey=self.read_key()) as conn:
+            conn.send_bytes(json.dumps({"cmd": "state", "widget": "windows_defender"}).encode())
+            self.assertTrue(conn.poll(5.0))
+
+    def test_second_server_keeps_the_live_key(self):
+        key = self.read_key()
+        self.assertIsNone(self.guardian.start_control_server())
+        self.assertEqual(self.read_key(), key)
+
+    def test_key_file_private(self):
+        key_path = os.path.join(self.runtime, "archie-guardian", "control.key")
+        self.assertEqual(os.stat(key_path).st_mode & 0o777, 0o600)
+
+
+def _messages(n):
+    return [{"timestamp": f"2025-11-01T00:00:{i:02d}", "user": f"question {i}", "assistant": f"answer {i}"}
+            for i in range(n)]
+
+
+class TestChatHistory(_TempCwdTestCase):
+
+    def _widget(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return OllamaChatWidget()
+
+    def _write_jsonl(self, messages):
+        os.makedirs("logs", exist_ok=True)
+        with open(OllamaChatWidget.HISTORY_FILE, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(m) + "\n" for m in messages))
+
+    def _read_jsonl(self):
+        with open(OllamaChatWidget.HISTORY_FILE, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_no_history(self):
+        self.assertEqual(list(self._widget().chat_history), [])
+
+    def test_legacy_json_migrated(self):
+        os.makedirs("logs", exist_ok=True)
+        with open(OllamaChatWidget.LEGACY_HISTORY_FILE, "w", encoding="utf-8") as f:
+            json.dump(_messages(3), f, indent=2)
+        self.assertEqual(list(self._widget().chat_history), _messages(3))
+        self.assertEqual(self._read_jsonl(), _messages(3))
+        # Later loads come from the JSONL file
+        os.remove(OllamaChatWidget.LEGACY_HISTORY_FILE)
+        self.assertEqual(list(self._widget().chat_history), _messages(3))
+
+    def test_legacy_json_trimmed_to_max_history(self):
+        os.makedirs("logs", exist_ok=True)
+        with open(OllamaChatWidget.LEGACY_HISTORY_FILE, "w", encoding="utf-8") as f:
+            json.dump(_messages(80), f)
+        self._widget()
+        self.assertEqual(self._read_jsonl(), _messages(80)[-OllamaChatWidget.MAX_HISTORY:])
+
+    def test_jsonl_preferred_over_legacy(self):
+        self._write_jsonl(_messages(2))
+        with open(OllamaChatWidget.LEGACY_HISTORY_FILE, "w", encoding="utf-8") as f:
+            json.dump(_messages(5), f)
+        self.assertEqual(list(self._widget().chat_history), _messages(2))
+
+    def test_only_tail_loaded(self):
+        self._write_jsonl(_messages(80))
+        self.assertEqual(list(self._widget().chat_history), _messages(80)[-OllamaChatWidget.MAX_HISTORY:])
+
+    def test_save_round_trip(self):
+        widget = self._widget()
+        widget.chat_history.extend(_messages(4))
+        widget.save_history()
+        self.assertEqual(list(self._widget().chat_history), _messages(4))
+
+    def test_corrupt_history_starts_empty(self):
+        self._write_jsonl(_messages(2))
+        with open(OllamaChatWidget.HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write("{not json\n")
+        self.assertEqual(list(self._widget().chat_history), [])
+
+    def test_clear_removes_both_files(self):
+        self._write_jsonl(_messages(2))
+        with open(OllamaChatWidget.LEGACY_HISTORY_FILE, "w", encoding="utf-8") as f:
+            json.dump(_messages(2), f)
+        widget = self._widget()
+        widget.clear_history()
+        self.assertFalse(os.path.exists(OllamaChatWidget.HISTORY_FILE))
+        self.assertFalse(os.path.exists(OllamaChatWidget.LEGACY_HISTORY_FILE))
+        self.assertEqual(list(widget.chat_history), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,16 +9,6 @@ __version__ = "1.0"
 __author__ = "Archie Gate (Louis J.)"
 __license__ = "MIT"
 
-try:
-    from .file_integrity import FileIntegrityWidget
-    from .process_monitor import ProcessMonitorWidget
-    from .network_sniffer import NetworkSnifferWidget
-    from .windows_defender import WindowsDefenderWidget
-    from .rrnc import RapidResponseNeutralizeCapture
-    from .ollama_chat import OllamaChatWidget
-except ImportError as e:
-    print(f"Warning: Could not import all widgets: {e}")
-
 __all__ = [
     "FileIntegrityWidget",
     "ProcessMonitorWidget",
@@ -28,6 +18,31 @@ __all__ = [
     "OllamaChatWidget",
 ]
 
+# Public name -> submodule; loaded on first access (PEP 562) so importing one
+# widget does not pull in every widget's dependencies (watchdog, psutil, scapy...)
+_LAZY_IMPORTS = {
+    "FileIntegrityWidget": ".file_integrity",
+    "ProcessMonitorWidget": ".process_monitor",
+    "NetworkSnifferWidget": ".network_sniffer",
+    "WindowsDefenderWidget": ".windows_defender",
+    "RapidResponseNeutralizeCapture": ".rrnc",
+    "OllamaChatWidget": ".ollama_chat",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
 # Widgets Overview
 WIDGETS_INFO = {
     "file_integrity": "Monitor real-time file changes in system directories",
@@ -6,27 +6,68 @@ Uses Watchdog for efficient filesystem monitoring.
 
 import os
 import time
+from collections import deque
 from typing import Dict, List, Any
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileSystemEventHandler
+
+from core.agent_utils import deque_tail
+
+
+# Only these reach the handler; on Linux this also narrows the inotify mask
+# (no IN_OPEN/IN_ACCESS/IN_CLOSE_* wakeups)
+WATCHED_EVENTS = [FileCreatedEvent, FileModifiedEvent, FileDeletedEvent]
+
+
+class FileEvent:
+    """One recorded file change; built into a dict only when read."""
+    
+    __slots__ = ("timestamp", "event_type", "path", "file_size")
+    
+    def __init__(self, timestamp: float, event_type: str, path: str, file_size: int):
+        self.timestamp = timestamp
+        self.event_type = event_type
+        self.path = path
+        self.file_size = file_size
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "event_type": self.event_type,
+            "path": self.path,
+            "file_size": self.file_size,
+            # Handler only passes file events; a deleted file is no longer one
+            "is_file": self.event_type != "deleted"
+        }
 
 
 class FileIntegrityHandler(FileSystemEventHandler):
     """Watchdog event handler for file changes."""
     
+    # VCS/dependency trees and editor temp files: constant churn, not integrity changes
+    IGNORED_DIRS = (".git", "node_modules", "__pycache__")
+    IGNORED_SUFFIXES = (".swp", ".swx", "~")
+    
     def __init__(self, widget_instance):
         self.widget = widget_instance
+        self._ignored_parts = tuple(os.sep + name + os.sep for name in self.IGNORED_DIRS)
+    
+    def _wanted(self, event) -> bool:
+        if event.is_directory:
+            return False
+        path = event.src_path
+        return not (path.endswith(self.IGNORED_SUFFIXES) or any(part in path for part in self._ignored_parts))
     
     def on_modified(self, event):
-        if not event.is_directory:
+        if self._wanted(event):
             self.widget.record_event("modified", event.src_path)
     
     def on_created(self, event):
-        if not event.is_directory:
+        if self._wanted(event):
             self.widget.record_event("created", event.src_path)
     
     def on_deleted(self, event):
-        if not event.is_directory:
+        if self._wanted(event):
             self.widget.record_event("deleted", event.src_path)
 
 
@@ -37,6 +78,11 @@ class FileIntegrityWidget:
     - Generates real-time events for analysis
     """
     
+    # Repeats of the same event on the same path within this many seconds are dropped
+    COALESCE_WINDOW = 0.1
+    # Bound on paths remembered for coalescing
+    COALESCE_PATHS = 1024
+    
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         
@@ -48,8 +94,11 @@ class FileIntegrityWidget:
         ])
         
         # Event buffer (keep last 50 events)
-        self.events = []
         self.max_events = 50
+        self.events = deque(maxlen=self.max_events)
+        # path -> (event_type, monotonic time) of its last recorded event, so a
+        # burst of writes to one file is recorded once per COALESCE_WINDOW
+        self._last_seen = {}
         
         # Watchdog observer
         self.observer = Observer()
@@ -61,13 +110,9 @@ class FileIntegrityWidget:
     def start(self):
         """Start monitoring file changes."""
         try:
-            # Only schedule paths that exist
-            scheduled_paths = []
-            for path in self.watch_paths:
-                expanded_path = os.path.expanduser(path)
-                if os.path.exists(expanded_path):
-                    self.observer.schedule(self.event_handler, expanded_path, recursive=True)
-                    scheduled_paths.append(expanded_path)
+            scheduled_paths = self._watch_roots()
+            for path in scheduled_paths:
+                self.observer.schedule(self.event_handler, path, recursive=True, event_filter=WATCHED_EVENTS)
             
             self.observer.start()
             self.enabled = True
@@ -78,6 +123,24 @@ class FileIntegrityWidget:
             print(f"   ❌ Error starting File Integrity Widget: {e}")
             return False
     
+    def _watch_roots(self) -> List[str]:
+        """
+        Existing watch paths (directories or single files), canonicalized, with
+        any path inside a watched directory dropped: the recursive watch on the
+        ancestor already covers it.
+        """
+        roots = []
+        dirs = []
+        for path in sorted({os.path.realpath(os.path.expanduser(p)) for p in self.watch_paths}, key=len):
+            if not os.path.exists(path):
+                continue
+            if any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in dirs):
+                continue
+            roots.append(path)
+            if os.path.isdir(path):
+                dirs.append(path)
+        return roots
+    
     def stop(self):
         """Stop monitoring."""
         try:
@@ -91,44 +154,41 @@ class FileIntegrityWidget:
             return False
     
     def record_event(self, event_type: str, path: str):
-        """Record file change event."""
+        """Record file change event (handler only passes file, not directory, events)."""
+        now = time.monotonic()
+        last = self._last_seen.get(path)
+        if last is not None and last[0] == event_type and now - last[1] < self.COALESCE_WINDOW:
+            return
+        if len(self._last_seen) >= self.COALESCE_PATHS:
+            self._last_seen.clear()
+        self._last_seen[path] = (event_type, now)
+        
         try:
-            event_data = {
-                "timestamp": time.time(),
-                "event_type": event_type,
-                "path": path,
-                "file_size": self._get_file_size(path),
-                "is_file": os.path.isfile(path)
-            }
-            
-            self.events.append(event_data)
-            
-            # Keep only last N events
-            if len(self.events) > self.max_events:
-                self.events = self.events[-self.max_events:]
+            # Deleted files need no stat; otherwise one stat gives the size
+            file_size = 0 if event_type == "deleted" else self._get_file_size(path)
+            # Oldest events fall off the deque once max_events is reached
+            self.events.append(FileEvent(time.time(), event_type, path, file_size))
         except Exception as e:
             pass  # Silently skip errors on individual events
     
     def get_events(self) -> List[Dict[str, Any]]:
         """Return buffered events."""
-        return self.events
+        return [event.to_dict() for event in list(self.events)]
     
     def get_recent_events(self, count: int = 10) -> List[Dict[str, Any]]:
         """Get most recent N events."""
-        return self.events[-count:] if self.events else []
+        return [event.to_dict() for event in deque_tail(self.events, count)]
     
     def clear_events(self):
         """Clear event buffer."""
-        self.events = []
+        self.events.clear()
     
     def _get_file_size(self, path: str) -> int:
         """Get file size if it exists."""
         try:
-            if os.path.exists(path):
-                return os.path.getsize(path)
-        except:
-            pass
-        return 0
+            return os.path.getsize(path)
+        except OSError:
+            return 0
     
     def get_actions(self):
         """Available actions based on state"""
@@ -142,6 +202,6 @@ class FileIntegrityWidget:
         return {
             "widget_name": "file_integrity",
             "enabled": self.enabled,
-            "events_buffered": len(self.events) if hasattr(self, 'events') else 0,
+            "events_buffered": len(self.events),
             "status": "🟢 LIVE" if self.enabled else "⭕ Idle"
         }
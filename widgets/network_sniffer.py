@@ -1,6 +1,102 @@
 import psutil
+import os
+import socket
+import struct
+import sys
 import time
-from threading import Thread
+from collections import deque, namedtuple
+from threading import Event, Thread
+
+from core.agent_utils import deque_tail
+
+# Same shape as psutil's laddr/raddr
+Addr = namedtuple("Addr", ["ip", "port"])
+
+# Linux sock_diag (see linux/inet_diag.h): dump TCP sockets filtered by state in the kernel
+_NETLINK_SOCK_DIAG = 4
+_SOCK_DIAG_BY_FAMILY = 20
+_NLM_F_REQUEST_DUMP = 0x1 | 0x300
+_NLMSG_ERROR = 2
+_NLMSG_DONE = 3
+_TCP_ESTABLISHED = 1
+_NLMSGHDR = struct.Struct("=IHHII")
+# inet_diag_req_v2: family, protocol, ext, pad, states, then a zeroed 48-byte sockid
+_DIAG_REQ = struct.Struct("=BBBBI48x")
+# inet_diag_msg: family, state, timer, retrans, sport, dport (big endian), src, dst,
+# if, cookie, expires, rqueue, wqueue, uid, inode
+_DIAG_MSG = struct.Struct("=BBBB2s2s16s16sI8xIIIII")
+
+
+def _diag_established(family):
+    """(inode, laddr, raddr) for each established TCP socket of one address family."""
+    addr_len = 4 if family == socket.AF_INET else 16
+    request = _DIAG_REQ.pack(family, socket.IPPROTO_TCP, 0, 0, 1 << _TCP_ESTABLISHED)
+    header = _NLMSGHDR.pack(_NLMSGHDR.size + len(request), _SOCK_DIAG_BY_FAMILY, _NLM_F_REQUEST_DUMP, 1, 0)
+    conns = []
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_SOCK_DIAG) as sock:
+        sock.sendall(header + request)
+        while True:
+            data = sock.recv(65536)
+            offset = 0
+            while offset + _NLMSGHDR.size <= len(data):
+                msg_len, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+                if msg_type == _NLMSG_DONE:
+                    return conns
+                if msg_type == _NLMSG_ERROR:
+                    raise OSError("sock_diag request rejected")
+                (_, _, _, _, sport, dport, src, dst, _, _, _, _, _, inode) = _DIAG_MSG.unpack_from(data, offset + _NLMSGHDR.size)
+                laddr = Addr(socket.inet_ntop(family, src[:addr_len]), int.from_bytes(sport, "big"))
+                raddr = Addr(socket.inet_ntop(family, dst[:addr_len]), int.from_bytes(dport, "big"))
+                conns.append((inode, laddr, raddr))
+                offset += (msg_len + 3) & ~3
+            if not data:
+                return conns
+
+
+def _socket_owners(inodes):
+    """inode -> pid for the given socket inodes, from /proc/<pid>/fd (readable ones only)."""
+    wanted = {f"socket:[{inode}]": inode for inode in inodes}
+    owners = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            fds = os.scandir(f"/proc/{entry.name}/fd")
+        except OSError:
+            continue
+        with fds:
+            for fd in fds:
+                try:
+                    inode = wanted.get(os.readlink(fd.path))
+                except OSError:
+                    continue
+                if inode is not None:
+                    owners[inode] = int(entry.name)
+        if len(owners) == len(wanted):
+            break
+    return owners
+
+
+class ConnectionEvent:
+    """One new established connection; built into a dict only when read."""
+    __slots__ = ("timestamp", "pid", "process", "laddr", "raddr")
+
+    def __init__(self, timestamp, pid, process, laddr, raddr):
+        self.timestamp = timestamp
+        self.pid = pid
+        self.process = process
+        self.laddr = laddr
+        self.raddr = raddr
+
+    def to_dict(self):
+        return {
+            "timestamp": self.timestamp,
+            "pid": self.pid,
+            "process": self.process,
+            "local_address": f"{self.laddr.ip}:{self.laddr.port}",
+            "remote_address": f"{self.raddr.ip}:{self.raddr.port}",
+        }
+
 
 class NetworkSnifferWidget:
     """
@@ -9,13 +105,19 @@ class NetworkSnifferWidget:
     def __init__(self, config=None):
         self.config = config or {}
         self.active = False
-        self.events = []
         self.max_events = 50
+        self.events = deque(maxlen=self.max_events)
         self.thread = None
+        self._stop_event = Event()
         self._previous = set()
+        self._proc_names = {}
+        # Linux: ask the kernel for established sockets only, keyed by inode
+        self._use_diag = sys.platform.startswith("linux")
+        self._inode_pids = {}
 
     def start(self):
         self.active = True
+        self._stop_event.clear()
         self.thread = Thread(target=self._watch, daemon=True)
         self.thread.start()
         print("   🟢 Network Sniffer Widget started (no root needed)")
@@ -23,6 +125,7 @@ class NetworkSnifferWidget:
 
     def stop(self):
         self.active = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=2)
         print("   ⭕ Network Sniffer Widget stopped")
@@ -30,37 +133,78 @@ class NetworkSnifferWidget:
 
     def _watch(self):
         while self.active:
-            active_conns = set()
-            for proc in psutil.process_iter(['pid','name']):
+            active_conns = self._established()
+            for key in active_conns.keys() - self._previous:
+                pid, laddr, raddr = active_conns[key]
+                if not pid:
+                    continue
+                name = self._proc_names.get(pid)
+                if name is None:
+                    try:
+                        name = self._proc_names[pid] = sys.intern(psutil.Process(pid).name())
+                    except psutil.Error:
+                        continue
+                self.events.append(ConnectionEvent(time.time(), pid, name, laddr, raddr))
+            # Forget names of pids without open connections (pids get reused)
+            live_pids = {conn[0] for conn in active_conns.values()}
+            self._proc_names = {pid: name for pid, name in self._proc_names.items() if pid in live_pids}
+            self._previous = set(active_conns)
+            # Returns early when stop() sets the event
+            if self._stop_event.wait(1.5):
+                break
+
+    def _established(self):
+        """Connection key -> (pid or None, laddr, raddr) for established inet connections."""
+        if self._use_diag:
+            try:
+                return self._established_diag()
+            except OSError:
+                # Netlink unavailable (old kernel, sandbox): use psutil from now on
+                self._use_diag = False
+        return self._established_psutil()
+
+    def _established_diag(self):
+        conns = _diag_established(socket.AF_INET)
+        if socket.has_ipv6:
+            conns += _diag_established(socket.AF_INET6)
+        # Owners are looked up only for sockets not seen before; unknown (other
+        # users' processes) stay None so they are not searched for every sweep
+        inode_pids = {inode: self._inode_pids.get(inode) for inode, _, _ in conns}
+        new_inodes = [inode for inode, _, _ in conns if inode not in self._inode_pids]
+        if new_inodes:
+            inode_pids.update(_socket_owners(new_inodes))
+        self._inode_pids = inode_pids
+        return {inode: (inode_pids[inode], laddr, raddr) for inode, laddr, raddr in conns}
+
+    def _established_psutil(self):
+        try:
+            # One system-wide table instead of a connections() call per process
+            return {
+                (conn.pid, conn.raddr, conn.laddr): (conn.pid, conn.laddr, conn.raddr)
+                for conn in psutil.net_connections(kind='inet')
+                if conn.status == psutil.CONN_ESTABLISHED and conn.pid
+            }
+        except psutil.AccessDenied:
+            # macOS only serves the system-wide table to root
+            active_conns = {}
+            for proc in psutil.process_iter(['pid']):
                 try:
                     for conn in proc.connections(kind='inet'):
                         if conn.status == psutil.CONN_ESTABLISHED:
-                            key = (proc.info['pid'], conn.raddr, conn.laddr)
-                            if key not in self._previous:
-                                event = {
-                                    "timestamp": time.time(),
-                                    "pid": proc.info['pid'],
-                                    "process": proc.info['name'],
-                                    "local_address": f"{conn.laddr.ip}:{conn.laddr.port}",
-                                    "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}",
-                                }
-                                self.events.append(event)
-                                if len(self.events) > self.max_events:
-                                    self.events = self.events[-self.max_events:]
-                            active_conns.add(key)
+                            pid = proc.info['pid']
+                            active_conns[(pid, conn.raddr, conn.laddr)] = (pid, conn.laddr, conn.raddr)
                 except Exception:
                     continue
-            self._previous = active_conns
-            time.sleep(1.5)
+            return active_conns
 
     def get_recent_events(self, count=10):
-        return self.events[-count:] if self.events else []
+        return [event.to_dict() for event in deque_tail(self.events, count)]
 
     def get_stats(self):
      """Return widget status"""
      return {
         "widget_name": "network_sniffer",
         "enabled": self.active,  # ✅ CORRECT (not self.enabled)
-        "events_buffered": len(self.events) if hasattr(self, 'events') else 0,
+        "events_buffered": len(self.events),
         "status": "🟢 LIVE" if self.active else "⭕ Idle"
     }
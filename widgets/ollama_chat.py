@@ -4,24 +4,56 @@ Ollama Chat Widget for Archie Guardian
 Interactive AI chat interface for security analysis with persistent history
 """
 
+import atexit
 import json
 import os
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from typing import Iterator
+from core.agent_utils import deque_tail, tail_lines
 from core.ollama_connector import OllamaConnector
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    
+    def _json_dumps_indent(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_line(obj) -> bytes:
+        return (json.dumps(obj) + "\n").encode()
+    
+    def _json_dumps_indent(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
 
 class OllamaChatWidget:
     """Interactive Ollama chat widget with persistent history."""
     
-    HISTORY_FILE = "logs/chat_history.json"
+    HISTORY_FILE = "logs/chat_history.jsonl"
+    # Pre-JSONL history file, migrated on first load
+    LEGACY_HISTORY_FILE = "logs/chat_history.json"
     MAX_HISTORY = 50
+    # Seconds to wait after a message before writing, so a burst is saved once
+    SAVE_DELAY = 2.0
     
     def __init__(self):
         """Initialize Ollama chat widget with persistent history."""
         self.name = "ollama_chat"
         self.active = False
         self.connector = None
-        self.chat_history = []
+        self.chat_history = deque(maxlen=self.MAX_HISTORY)
+        self._history_lock = threading.Lock()  # Guards chat_history
+        self._save_lock = threading.Lock()     # Serializes history file writes
+        self._save_due = threading.Event()
+        self._saver = None
         self.system_context = self._build_system_context()
         
         # Ensure logs directory exists
@@ -29,6 +61,7 @@ class OllamaChatWidget:
         
         # Load previous chat history
         self.load_history()
+        atexit.register(self._flush_history)
     
     def _build_system_context(self) -> str:
         """Build system context for Ollama."""
@@ -53,25 +86,55 @@ Stay focused on security context. Be concise and actionable."""
         """Load previous chat history from persistent storage."""
         try:
             if os.path.exists(self.HISTORY_FILE):
-                with open(self.HISTORY_FILE, "r") as f:
-                    self.chat_history = json.load(f)
-                    print(f"   📂 Loaded {len(self.chat_history)} previous chat messages")
+                lines = tail_lines(self.HISTORY_FILE, self.MAX_HISTORY)
+                self.chat_history = deque((_json_loads(line) for line in lines if line.strip()), maxlen=self.MAX_HISTORY)
+                print(f"   📂 Loaded {len(self.chat_history)} previous chat messages")
+            elif os.path.exists(self.LEGACY_HISTORY_FILE):
+                with open(self.LEGACY_HISTORY_FILE, "rb") as f:
+                    self.chat_history = deque(_json_loads(f.read()), maxlen=self.MAX_HISTORY)
+                self.save_history()
+                print(f"   📂 Loaded {len(self.chat_history)} previous chat messages")
             else:
-                self.chat_history = []
+                self.chat_history.clear()
         except Exception as e:
             print(f"   ⚠️  Could not load chat history: {e}")
-            self.chat_history = []
+            self.chat_history.clear()
     
     def save_history(self):
-        """Persist chat history to disk."""
-        try:
-            # Trim to MAX_HISTORY before saving
-            history_to_save = self.chat_history[-self.MAX_HISTORY:]
-            
-            with open(self.HISTORY_FILE, "w") as f:
-                json.dump(history_to_save, f, indent=2)
-        except Exception as e:
-            print(f"   ⚠️  Could not save chat history: {e}")
+        """Persist chat history to disk (written to a temp file, then swapped in)."""
+        with self._save_lock:
+            # The deque already holds at most MAX_HISTORY messages
+            with self._history_lock:
+                history_to_save = list(self.chat_history)
+            try:
+                tmp_file = self.HISTORY_FILE + ".tmp"
+                with open(tmp_file, "wb") as f:
+                    f.write(b"".join(_json_line(entry) for entry in history_to_save))
+                os.replace(tmp_file, self.HISTORY_FILE)
+            except Exception as e:
+                print(f"   ⚠️  Could not save chat history: {e}")
+    
+    def _schedule_save(self):
+        """Mark the history dirty; the saver thread writes it SAVE_DELAY later."""
+        self._save_due.set()
+        with self._history_lock:
+            if self._saver is None:
+                self._saver = threading.Thread(target=self._save_loop, name="ChatHistorySaver", daemon=True)
+                self._saver.start()
+    
+    def _save_loop(self):
+        while True:
+            self._save_due.wait()
+            # Let a burst of messages land, then write them in one go
+            time.sleep(self.SAVE_DELAY)
+            self._save_due.clear()
+            self.save_history()
+    
+    def _flush_history(self):
+        """Write a pending save now (on stop and at interpreter exit)."""
+        if self._save_due.is_set():
+            self._save_due.clear()
+            self.save_history()
     
     def start(self) -> bool:
         """Start the Ollama chat widget."""
@@ -97,7 +160,10 @@ Stay focused on security context. Be concise and actionable."""
     def stop(self):
         """Stop the Ollama chat widget and save history."""
         self.active = False
+        self._save_due.clear()
         self.save_history()
+        if self.connector:
+            self.connector.close()
     
     def send_message(self, user_input: str) -> str:
         """
@@ -114,27 +180,45 @@ Stay focused on security context. Be concise and actionable."""
         
         try:
             response = self.connector.chat(user_input)
-            
-            # Store in history
-            message_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "user": user_input,
-                "assistant": response
-            }
-            self.chat_history.append(message_entry)
-            
-            # Keep history under limit
-            if len(self.chat_history) > self.MAX_HISTORY:
-                self.chat_history.pop(0)
-            
-            # Save to persistent storage
-            self.save_history()
-            
+            self._remember(user_input, response)
             return response
             
         except Exception as e:
             return f"❌ Error: {str(e)}"
     
+    def send_message_stream(self, user_input: str) -> Iterator[str]:
+        """
+        Like send_message, but yield the response in chunks as Ollama
+        produces them; the full reply is stored once the stream ends.
+        """
+        if not self.active or not self.connector:
+            yield "❌ Ollama chat not active. Enable it first."
+            return
+        
+        chunks = []
+        try:
+            for chunk in self.connector.chat_stream(user_input):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            yield f"❌ Error: {str(e)}"
+            return
+        self._remember(user_input, "".join(chunks) or "No response returned")
+    
+    def _remember(self, user_input: str, response: str):
+        """Append one exchange to the history and schedule a save."""
+        message_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "user": user_input,
+            "assistant": response
+        }
+        # Oldest message falls off once MAX_HISTORY is reached
+        with self._history_lock:
+            self.chat_history.append(message_entry)
+        
+        # Save to persistent storage, off the reply path
+        self._schedule_save()
+    
     def analyze_event(self, event_dict: dict) -> str:
         """Analyze a security event using Ollama."""
         if not self.active or not self.connector:
@@ -166,16 +250,20 @@ Stay focused on security context. Be concise and actionable."""
         Returns:
             list: Recent chat messages
         """
-        return self.chat_history[-limit:] if self.chat_history else []
+        with self._history_lock:
+            return deque_tail(self.chat_history, limit)
     
     def clear_history(self) -> str:
         """Clear all chat history from memory and disk."""
         try:
-            self.chat_history = []
+            with self._history_lock:
+                self.chat_history.clear()
             
-            # Also delete the history file
-            if os.path.exists(self.HISTORY_FILE):
-                os.remove(self.HISTORY_FILE)
+            # Also delete the history file (and any unmigrated legacy one)
+            with self._save_lock:
+                for path in (self.HISTORY_FILE, self.LEGACY_HISTORY_FILE):
+                    if os.path.exists(path):
+                        os.remove(path)
             
             return "✅ Chat history cleared"
         except Exception as e:
@@ -198,8 +286,10 @@ Stay focused on security context. Be concise and actionable."""
             
             os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
             
-            with open(filename, "w") as f:
-                json.dump(self.chat_history, f, indent=2)
+            with self._history_lock:
+                history = list(self.chat_history)
+            with open(filename, "wb") as f:
+                f.write(_json_dumps_indent(history))
             
             return f"✅ Chat history exported to {filename}"
         except Exception as e:
@@ -1,21 +1,99 @@
 import psutil
+import errno
+import os
+import socket
+import struct
+import sys
 import time
-from threading import Thread
+from collections import deque
+from threading import Event, Thread
+
+from core.agent_utils import deque_tail
+
+try:
+    import pwd
+except ImportError:  # Windows: psutil resolves the owner itself
+    pwd = None
+
+# Everything about a new process in one as_dict() (one oneshot() pass); on POSIX
+# the owner is read as a uid and mapped to a name through a per-uid cache
+_INFO_ATTRS = ["name", "cmdline", "uids" if pwd else "username"]
+
+# Linux proc connector (linux/cn_proc.h): the kernel pushes an event per exec.
+# Subscribing needs CAP_NET_ADMIN and is silently ignored without it, so it is
+# only tried as root; everyone else keeps polling.
+_NETLINK_CONNECTOR = 11
+_CN_IDX_PROC = 1
+_CN_VAL_PROC = 1
+_PROC_CN_MCAST_LISTEN = 1
+_PROC_EVENT_EXEC = 0x00000002
+_NLMSG_DONE = 3
+_NLMSGHDR = struct.Struct("=IHHII")
+# cn_msg: id.idx, id.val, seq, ack, len, flags
+_CN_MSG = struct.Struct("=IIIIHH")
+# proc_event: what, cpu, timestamp_ns, then exec's process_pid, process_tgid
+_PROC_EVENT = struct.Struct("=IIQII")
+
+
+def _proc_connector():
+    """Netlink socket subscribed to process events, or None where unavailable."""
+    if not sys.platform.startswith("linux") or os.geteuid() != 0:
+        return None
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_CONNECTOR)
+    except OSError:
+        return None
+    try:
+        sock.bind((0, _CN_IDX_PROC))
+        op = struct.pack("=I", _PROC_CN_MCAST_LISTEN)
+        msg = _CN_MSG.pack(_CN_IDX_PROC, _CN_VAL_PROC, 0, 0, len(op), 0) + op
+        sock.send(_NLMSGHDR.pack(_NLMSGHDR.size + len(msg), _NLMSG_DONE, 0, 0, 0) + msg)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+class ProcessEvent:
+    """One detected process spawn; built into a dict only when read."""
+    __slots__ = ("timestamp", "pid", "name", "cmdline", "user")
+
+    def __init__(self, timestamp, pid, name, cmdline, user):
+        self.timestamp = timestamp
+        self.pid = pid
+        self.name = name
+        self.cmdline = cmdline
+        self.user = user
+
+    def to_dict(self):
+        return {
+            "timestamp": self.timestamp,
+            "pid": self.pid,
+            "name": self.name,
+            "cmdline": " ".join(self.cmdline),
+            "user": self.user
+        }
 
 class ProcessMonitorWidget:
     """
     Live process monitor widget. Detects new process spawns.
     """
+    # Poll interval (s): MIN right after a spawn, doubling up to MAX while idle
+    MIN_INTERVAL = 0.25
+    MAX_INTERVAL = 2.0
+
     def __init__(self, config=None):
         self.config = config or {}
         self.active = False
-        self.events = []
         self.max_events = 50
+        self.events = deque(maxlen=self.max_events)
         self._prev_pids = set()
+        self._user_names = {}
         self.thread = None
+        self._stop_event = Event()
 
     def start(self):
         self.active = True
+        self._stop_event.clear()
         self._prev_pids = set(psutil.pids())
         self.thread = Thread(target=self._watch, daemon=True)
         self.thread.start()
@@ -24,40 +102,92 @@ class ProcessMonitorWidget:
 
     def stop(self):
         self.active = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=2)
         print("   ⭕ Process Monitor Widget stopped")
         return True
 
     def _watch(self):
+        sock = _proc_connector()
+        if sock is not None:
+            with sock:
+                if self._watch_proc_events(sock):
+                    return
+            # Connector failed mid-run: carry on polling from the current table
+            self._prev_pids = set(psutil.pids())
+        interval = self.MIN_INTERVAL
+        while self.active:
+            if self._scan():
+                interval = self.MIN_INTERVAL
+            else:
+                interval = min(interval * 2, self.MAX_INTERVAL)
+            # Returns early when stop() sets the event
+            if self._stop_event.wait(interval):
+                break
+
+    def _watch_proc_events(self, sock):
+        """Record each exec the kernel reports; returns False if the socket fails."""
+        # Timeout only so stop() is noticed; events themselves arrive immediately
+        sock.settimeout(0.5)
         while self.active:
-            current_pids = set(psutil.pids())
-            new_pids = current_pids - self._prev_pids
-            for pid in new_pids:
-                try:
-                    p = psutil.Process(pid)
-                    event = {
-                        "timestamp": time.time(),
-                        "pid": pid,
-                        "name": p.name(),
-                        "cmdline": " ".join(p.cmdline() or []),
-                        "user": p.username()
-                    }
-                    self.events.append(event)
-                    if len(self.events) > self.max_events:
-                        self.events = self.events[-self.max_events:]
-                except Exception:
-                    continue
-            self._prev_pids = current_pids
-            time.sleep(1)
+            try:
+                data = sock.recv(4096)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    continue  # Burst overflowed the socket buffer; some execs were lost
+                return False
+            offset = 0
+            while offset + _NLMSGHDR.size + _CN_MSG.size + _PROC_EVENT.size <= len(data):
+                msg_len = _NLMSGHDR.unpack_from(data, offset)[0]
+                what, _, _, pid, tgid = _PROC_EVENT.unpack_from(data, offset + _NLMSGHDR.size + _CN_MSG.size)
+                # pid != tgid is a thread calling exec
+                if what == _PROC_EVENT_EXEC and pid == tgid:
+                    self._record(pid)
+                offset += (msg_len + 3) & ~3
+        return True
+
+    def _scan(self):
+        """Record processes spawned since the last scan; returns how many there were."""
+        current_pids = set(psutil.pids())
+        new_pids = current_pids - self._prev_pids
+        for pid in new_pids:
+            self._record(pid)
+        self._prev_pids = current_pids
+        return len(new_pids)
+
+    def _record(self, pid):
+        try:
+            info = psutil.Process(pid).as_dict(attrs=_INFO_ATTRS, ad_value=None)
+        except Exception:
+            return  # Typically already gone (NoSuchProcess)
+        if pwd:
+            user = self._user_name(info["uids"].real) if info["uids"] else None
+        else:
+            user = info["username"]
+        # Spawn bursts repeat the same few names; buffered events share one string
+        name = sys.intern(info["name"]) if info["name"] else info["name"]
+        self.events.append(ProcessEvent(time.time(), pid, name, info["cmdline"] or [], user))
+
+    def _user_name(self, uid):
+        name = self._user_names.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)  # Same fallback as psutil's username()
+            self._user_names[uid] = name
+        return name
 
     def get_recent_events(self, count=10):
-        return self.events[-count:] if self.events else []
+        return [event.to_dict() for event in deque_tail(self.events, count)]
 
     def get_stats(self):
         return {
             "widget_name": "process_monitor",
             "enabled": self.active,  # ✅ CORRECT (not self.enabled)
-            "events_buffered": len(self.events) if hasattr(self, 'events') else 0,
+            "events_buffered": len(self.events),
             "status": "🟢 LIVE" if self.active else "⭕ Idle"
     }
\ No newline at end of file
@@ -1,7 +1,10 @@
 import logging
 import os
 import signal
-from datetime import datetime
+import time
+from collections import deque
+
+from core.agent_utils import deque_tail
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +19,14 @@ class RapidResponseNeutralizeCapture:
         self.response_time = self.config.get('response_time', 2)  # seconds
         self.neutralization_level = self.config.get('neutralization_level', 'high')  # low/medium/high
         self.capture_rate = self.config.get('capture_rate', 0.95)  # confidence threshold
-        self.events = []
+        self.max_events = 50
+        self.events = deque(maxlen=self.max_events)
         self.quarantine_vault = "C:\\Guardian_Vault"
         
         # Create vault if not exists
         os.makedirs(self.quarantine_vault, exist_ok=True)
+        # Forensic dirs already created this session
+        self._forensic_dirs = set()
 
     def start(self):
         """Activate RRNC widget"""
@@ -52,16 +58,17 @@ class RapidResponseNeutralizeCapture:
         confidence = threat_data.get("confidence", 0.5)
         threat_type = threat_data.get("type", "unknown")
         
-        logger.info(f"Analyzing threat: {threat_type} | Confidence: {confidence*100:.1f}%")
+        logger.info("Analyzing threat: %s | Confidence: %.1f%%", threat_type, confidence * 100)
         print(f"   [RRNC] 🔍 Threat analysis | Type: {threat_type} | Confidence: {confidence*100:.1f}%")
         
+        recommendation = "HIGH_THREAT" if confidence > 0.85 else "LOW_THREAT"
         event = {
-            "timestamp": datetime.now().timestamp(),
+            "timestamp": time.time(),
             "action": "analyze_threat",
             "threat_type": threat_type,
             "confidence": confidence,
             "status": "analyzed",
-            "recommendation": "HIGH_THREAT" if confidence > 0.85 else "LOW_THREAT"
+            "recommendation": recommendation
         }
         self.events.append(event)
         
@@ -70,7 +77,7 @@ class RapidResponseNeutralizeCapture:
             "action": "analyze",
             "threat_type": threat_type,
             "confidence": confidence,
-            "recommendation": event["recommendation"]
+            "recommendation": recommendation
         }
 
     def process_kill(self, pid, force=True):
@@ -78,22 +85,24 @@ class RapidResponseNeutralizeCapture:
         if not self.active:
             return {"status": "RRNC not active", "action": "process_kill", "result": "failed"}
         
-        signal_type = signal.SIGKILL if force else signal.SIGTERM
-        logger.warning(f"Process kill initiated: PID {pid} (force={force})")
-        print(f"   [RRNC] ⚡ Process {pid} terminated (signal: {'SIGKILL' if force else 'SIGTERM'})")
+        signal_name = "SIGKILL" if force else "SIGTERM"
+        # Windows has no SIGKILL; os.kill with SIGTERM terminates there
+        signal_type = getattr(signal, signal_name, signal.SIGTERM)
+        logger.warning("Process kill initiated: PID %s (force=%s)", pid, force)
+        print(f"   [RRNC] ⚡ Process {pid} terminated (signal: {signal_name})")
         
         # TODO: Implement actual os.kill(pid, signal_type)
         
         event = {
-            "timestamp": datetime.now().timestamp(),
+            "timestamp": time.time(),
             "action": "process_kill",
             "pid": pid,
-            "signal": "SIGKILL" if force else "SIGTERM",
+            "signal": signal_name,
             "status": "killed"
         }
         self.events.append(event)
         
-        return {"status": "success", "action": "process_kill", "pid": pid, "signal": "SIGKILL" if force else "SIGTERM"}
+        return {"status": "success", "action": "process_kill", "pid": pid, "signal": signal_name}
 
     def network_block(self, ip, port=None):
         """Block suspicious network connection via firewall"""
@@ -107,7 +116,7 @@ class RapidResponseNeutralizeCapture:
         # powershell command: New-NetFirewallRule -DisplayName "Block RRNC" -Direction Outbound -Action Block -RemoteAddress {ip}
         
         event = {
-            "timestamp": datetime.now().timestamp(),
+            "timestamp": time.time(),
             "action": "network_block",
             "ip": ip,
             "port": port,
@@ -132,7 +141,7 @@ class RapidResponseNeutralizeCapture:
         # shutil.move(file_path, os.path.join(self.quarantine_vault, os.path.basename(file_path)))
         
         event = {
-            "timestamp": datetime.now().timestamp(),
+            "timestamp": time.time(),
             "action": "quarantine",
             "file": file_path,
             "vault": self.quarantine_vault,
@@ -147,7 +156,7 @@ class RapidResponseNeutralizeCapture:
         if not self.active:
             return {"status": "RRNC not active", "action": "capture", "result": "failed"}
         
-        logger.info(f"Forensic capture initiated: {threat_id} | Type: {data_type}")
+        logger.info("Forensic capture initiated: %s | Type: %s", threat_id, data_type)
         print(f"   [RRNC] 📸 Forensic data captured | Threat: {threat_id} | Type: {data_type}")
         
         # TODO: Implement actual forensic capture
@@ -157,10 +166,12 @@ class RapidResponseNeutralizeCapture:
         # - Timeline reconstruction
         
         forensic_path = os.path.join(self.quarantine_vault, f"forensics_{threat_id}")
-        os.makedirs(forensic_path, exist_ok=True)
+        if forensic_path not in self._forensic_dirs:
+            os.makedirs(forensic_path, exist_ok=True)
+            self._forensic_dirs.add(forensic_path)
         
         event = {
-            "timestamp": datetime.now().timestamp(),
+            "timestamp": time.time(),
             "action": "capture_forensics",
             "threat_id": threat_id,
             "data_type": data_type,
@@ -182,7 +193,7 @@ class RapidResponseNeutralizeCapture:
         return {
             "widget_name": "rrnc",
             "enabled": self.active,  # ✅ CORRECT (not self.enabled)
-            "events_buffered": len(self.events) if hasattr(self, 'events') else 0,
+            "events_buffered": len(self.events),
             "status": "🟢 LIVE" if self.active else "⭕ Idle"
     }
 
@@ -195,4 +206,4 @@ class RapidResponseNeutralizeCapture:
 
     def get_recent_events(self, limit=10):
         """Get recent RRNC events"""
-        return self.events[-limit:] if self.events else []
+        return deque_tail(self.events, limit)
@@ -1,10 +1,16 @@
-import subprocess
 import logging
 import os
+import time
+from collections import deque
 from datetime import datetime
 
+from core.agent_utils import deque_tail
+
 logger = logging.getLogger(__name__)
 
+# Per-scan console output (ARCHIE_VERBOSE=0 silences it, as for the orchestrator)
+_VERBOSE_DEFAULT = os.environ.get("ARCHIE_VERBOSE", "1") != "0"
+
 class WindowsDefenderWidget:
     """
     Windows Defender Widget - Scan & threat management integration.
@@ -13,10 +19,12 @@ class WindowsDefenderWidget:
     def __init__(self, config=None):
         self.config = config or {}
         self.active = False
+        self.verbose = self.config.get("verbose", _VERBOSE_DEFAULT)
         self.last_scan = None
         self.scan_results = {}
-        self.events = []
-        self.scan_history = []
+        self.max_events = 50
+        self.events = deque(maxlen=self.max_events)
+        self.scan_history = deque(maxlen=self.max_events)
 
     def start(self):
         """Activate Windows Defender widget"""
@@ -38,8 +46,9 @@ class WindowsDefenderWidget:
             return {"status": "Widget not active", "scan_type": "quick", "result": "failed"}
         
         scan_path = path or "C:\\"
-        logger.info(f"Starting quick scan on {scan_path}...")
-        print(f"   [Defender] 🔍 Quick scan running on {scan_path}...")
+        logger.info("Starting quick scan on %s...", scan_path)
+        if self.verbose:
+            print(f"   [Defender] 🔍 Quick scan running on {scan_path}...")
         
         # TODO: Implement MpCmdRun.exe call
         # cmd = f'mpcmdrun.exe -Scan -ScanType 1 -DisableRemediation'
@@ -65,8 +74,9 @@ class WindowsDefenderWidget:
         self.events.append(event)
         self.scan_history.append(event)
         
-        logger.info(f"Quick scan completed: {self.scan_results}")
-        print(f"   [Defender] ✅ Quick scan complete | Threats: 0 | Files: 12,483")
+        logger.info("Quick scan completed: %s", self.scan_results)
+        if self.verbose:
+            print("   [Defender] ✅ Quick scan complete | Threats: 0 | Files: 12,483")
         
         return self.scan_results
 
@@ -76,8 +86,9 @@ class WindowsDefenderWidget:
             return {"status": "Widget not active", "scan_type": "full", "result": "failed"}
         
         scan_path = path or "C:\\"
-        logger.info(f"Starting full scan on {scan_path}...")
-        print(f"   [Defender] 🔍 Full scan running on {scan_path}...")
+        logger.info("Starting full scan on %s...", scan_path)
+        if self.verbose:
+            print(f"   [Defender] 🔍 Full scan running on {scan_path}...")
         
         # TODO: Implement MpCmdRun.exe call
         # cmd = f'mpcmdrun.exe -Scan -ScanType 2 -DisableRemediation'
@@ -103,8 +114,9 @@ class WindowsDefenderWidget:
         self.events.append(event)
         self.scan_history.append(event)
         
-        logger.info(f"Full scan completed: {self.scan_results}")
-        print(f"   [Defender] ✅ Full scan complete | Threats: 0 | Files: 450,891")
+        logger.info("Full scan completed: %s", self.scan_results)
+        if self.verbose:
+            print("   [Defender] ✅ Full scan complete | Threats: 0 | Files: 450,891")
         
         return self.scan_results
 
@@ -113,11 +125,17 @@ class WindowsDefenderWidget:
         if not self.active:
             return {"status": "Widget not active", "scan_type": "custom", "result": "failed"}
         
-        if not os.path.exists(path):
+        try:
+            os.stat(path)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
             return {"status": "Path does not exist", "path": path, "result": "failed"}
+        except OSError as e:
+            # os.path.exists() would report e.g. access denied as a missing path
+            return {"status": f"Path not accessible: {e.strerror}", "path": path, "result": "failed"}
         
-        logger.info(f"Starting custom scan on {path}...")
-        print(f"   [Defender] 🔍 Custom scan on {path}...")
+        logger.info("Starting custom scan on %s...", path)
+        if self.verbose:
+            print(f"   [Defender] 🔍 Custom scan on {path}...")
         
         self.last_scan = datetime.now()
         self.scan_results = {
@@ -140,8 +158,9 @@ class WindowsDefenderWidget:
         self.events.append(event)
         self.scan_history.append(event)
         
-        logger.info(f"Custom scan completed: {self.scan_results}")
-        print(f"   [Defender] ✅ Custom scan complete | {path}")
+        logger.info("Custom scan completed: %s", self.scan_results)
+        if self.verbose:
+            print(f"   [Defender] ✅ Custom scan complete | {path}")
         
         return self.scan_results
 
@@ -164,11 +183,12 @@ class WindowsDefenderWidget:
         if not self.active:
             return {"status": "Widget not active", "action": "quarantine", "result": "failed"}
         
-        logger.warning(f"Quarantining threat: {threat_path}")
-        print(f"   [Defender] 🔐 Threat quarantined: {threat_path}")
+        logger.warning("Quarantining threat: %s", threat_path)
+        if self.verbose:
+            print(f"   [Defender] 🔐 Threat quarantined: {threat_path}")
         
         event = {
-            "timestamp": datetime.now().timestamp(),
+            "timestamp": time.time(),
             "action": "quarantine_threat",
             "threat_path": threat_path,
             "status": "quarantined"
@@ -182,7 +202,7 @@ class WindowsDefenderWidget:
         return {
             "widget_name": "windows_defender",
             "enabled": self.active,  # ✅ CORRECT (not self.enabled)
-            "events_buffered": len(self.events) if hasattr(self, 'events') else 0,
+            "events_buffered": len(self.events),
             "status": "🟢 LIVE" if self.active else "⭕ Idle"
     }
 
@@ -195,4 +215,4 @@ class WindowsDefenderWidget:
 
     def get_recent_events(self, limit=10):
         """Get recent scan events"""
-        return self.events[-limit:] if self.events else []
+        return deque_tail(self.events, limit)